@@ -0,0 +1,64 @@
+"""
+Raw alert throughput: logging every threshold crossing as an incident vs the
+AlertAggregator (dedup window, counters flushed in batches).
+
+    python benchmarks/bench_alerts.py --events 500000 --fingerprints 50
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from incident.alerts import AlertAggregator
+from incident.logger import write_incident
+from incident.severity import decide_severity
+from incident.store import IncidentStore
+
+FEATURES = ["amount", "oldbalanceOrg", "newbalanceOrig", "oldbalanceDest", "newbalanceDest", "step"]
+
+
+def _events(n: int, fingerprints: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    sets = [tuple(f for f in FEATURES if rng.random() < 0.5) or ("amount",) for _ in range(fingerprints)]
+    keys = rng.integers(fingerprints, size=n)
+    scores = np.round(rng.uniform(0.2, 0.6, n), 3)
+    return [("Data Drift", {"drift_score": float(s)}, sets[k]) for k, s in zip(keys, scores)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark alert aggregation.")
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--fingerprints", type=int, default=50, help="Distinct alert types x feature sets")
+    parser.add_argument("--direct", type=int, default=5_000, help="Events to log directly (one incident each)")
+    args = parser.parse_args()
+
+    events = _events(args.events, args.fingerprints)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = IncidentStore(Path(tmp) / "direct.db")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for incident_type, event, features in events[:args.direct]:
+                write_incident(incident_type, decide_severity(event), {**event, "features": list(features)},
+                               store=store)
+        elapsed = time.perf_counter() - start
+        print(f"{'write_incident per event':<30}{args.direct / elapsed:>12,.0f} events/s  ({len(store):,} incidents)")
+
+        store = IncidentStore(Path(tmp) / "aggregated.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            agg = AlertAggregator(store, window_seconds=3600, flush_interval=1.0)
+            start = time.perf_counter()
+            for incident_type, event, features in events:
+                agg.fire(incident_type, event, features)
+            agg.close()
+        elapsed = time.perf_counter() - start
+        print(f"{'AlertAggregator.fire':<30}{args.events / elapsed:>12,.0f} events/s  ({len(store):,} incidents, "
+              f"{agg.stats['suppressed']:,} suppressed, {agg.stats['escalated']:,} escalated)")
@@ -0,0 +1,44 @@
+"""
+Streaming batch inference throughput and peak RSS on a synthetic input.
+
+Peak RSS should stay flat as --rows grows (try --rows 50000000):
+
+    python benchmarks/bench_batch_inference.py --model models/xgb_model.joblib --rows 5000000
+"""
+
+import argparse
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+import synthetic
+from inference import load_model, run_batch, MODEL_PATH
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark streaming batch inference.")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = synthetic.write_csv(Path(tmp) / "input.csv", args.rows)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        model = load_model(args.model)
+
+        start = time.perf_counter()
+        rows = run_batch(model, raw, Path(tmp) / f"out.{args.format}", batch_size=args.batch_size,
+                         workers=args.workers, fmt=args.format, resume=False)
+        elapsed = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"rows={rows:,}  {rows / elapsed:,.0f} rows/s  elapsed={elapsed:.1f}s")
+    print(f"peak RSS: {rss_after:.0f} MiB (before scoring: {rss_before:.0f} MiB)")
@@ -0,0 +1,63 @@
+"""
+Micro-batching vs one model call per request, in-process (no HTTP).
+
+    python benchmarks/bench_batcher.py --model models/xgb_model.joblib --clients 64
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from batcher import MicroBatcher
+from inference import load_model, score_array, MODEL_PATH
+from loadgen import make_transactions
+
+
+async def run_batched(model, X, clients: int, max_batch_size: int, max_wait_ms: float) -> tuple[float, dict]:
+    batcher = MicroBatcher.for_model(model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    await batcher.start()
+
+    async def client(rows):
+        for row in rows:
+            await batcher.submit(row)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(X[k::clients]) for k in range(clients)))
+    elapsed = time.perf_counter() - start
+    stats = batcher.stats()
+    await batcher.stop()
+    return elapsed, stats
+
+
+def run_unbatched(model, X) -> float:
+    start = time.perf_counter()
+    for i in range(len(X)):
+        score_array(model, X[i:i + 1])
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scoring micro-batcher.")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    X = make_transactions(args.rows).astype("float32")
+
+    elapsed = run_unbatched(model, X)
+    print(f"one call per row: {args.rows / elapsed:,.0f} rows/s")
+
+    elapsed, stats = asyncio.run(run_batched(model, X, args.clients, args.max_batch_size, args.max_wait_ms))
+    print(f"micro-batched ({args.clients} clients): {args.rows / elapsed:,.0f} rows/s")
+    print(json.dumps(stats, indent=2))
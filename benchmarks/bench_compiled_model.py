@@ -0,0 +1,85 @@
+"""
+Cold start and throughput: joblib XGBClassifier vs CompiledModel (.npz).
+
+Cold start is measured in a fresh interpreter (imports + load + first
+prediction):
+
+    python benchmarks/bench_compiled_model.py --model models/xgb_model.joblib
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = ROOT_DIR / "src"
+sys.path.insert(0, str(SRC_DIR))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from compiled_model import CompiledModel, compile_booster
+from inference import MODEL_PATH
+from loadgen import make_transactions
+
+COLD_JOBLIB = """
+import time; t = time.perf_counter()
+import joblib, numpy as np
+m = joblib.load({path!r}); m.predict_proba(np.zeros((1, 12), dtype=np.float32))
+print(time.perf_counter() - t)
+"""
+COLD_COMPILED = """
+import sys, time; t = time.perf_counter()
+sys.path.insert(0, {src!r})
+import numpy as np
+from compiled_model import CompiledModel
+m = CompiledModel.load({path!r}); m.predict(np.zeros((1, 12), dtype=np.float32))
+print(time.perf_counter() - t)
+"""
+
+
+def cold_start(code: str) -> float:
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def throughput(fn, X, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - start)
+    return len(X) / best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the compiled predictor.")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    import joblib
+    clf = joblib.load(args.model)
+    npz = args.model.with_suffix(".npz")
+    if not npz.exists():
+        compile_booster(clf).save(npz)
+    compiled = CompiledModel.load(npz)
+
+    print("cold start (s):")
+    print(f"  joblib XGBClassifier   {cold_start(COLD_JOBLIB.format(path=str(args.model))):.3f}")
+    print(f"  CompiledModel (.npz)   {cold_start(COLD_COMPILED.format(src=str(SRC_DIR), path=str(npz))):.3f}")
+
+    X = make_transactions(args.rows).astype(np.float32)
+    booster = clf.get_booster()
+    print(f"throughput on {args.rows:,} rows (rows/s):")
+    print(f"  predict + predict_proba   {throughput(lambda X: (clf.predict(X), clf.predict_proba(X)), X):>12,.0f}")
+    print(f"  booster.inplace_predict   {throughput(lambda X: booster.inplace_predict(X, validate_features=False), X):>12,.0f}")
+    print(f"  CompiledModel.predict     {throughput(compiled.predict, X):>12,.0f}")
+
+    one = X[:1]
+    start = time.perf_counter()
+    for _ in range(2000):
+        compiled.predict(one)
+    print(f"single row CompiledModel: {(time.perf_counter() - start) / 2000 * 1e6:.1f} µs")
@@ -0,0 +1,81 @@
+"""
+Throughput of the velocity feature store at scale.
+
+Builds a history in which each of `--accounts` origin accounts (and a
+quarter as many destinations) transacts once, then measures:
+
+ - bulk: the polars window expressions over the history (training path)
+   and `FeatureStore.from_history` (warm start);
+ - online: `lookup`, `update` and `observe` (lookup + update, the scoring
+   path) for `--ops` transactions on random existing accounts, one call at
+   a time, with the store's process RSS.
+
+    python benchmarks/bench_feature_store.py --accounts 10000000 --ops 1000000
+"""
+
+import argparse
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from feature_store import FeatureStore, add_velocity_features
+from synthetic import N_STEPS
+
+
+def make_history(accounts: int, seed: int = 0) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    orig = rng.permutation(accounts)
+    return pl.DataFrame({
+        "step": np.sort(rng.integers(1, N_STEPS, accounts)),
+        "amount": np.round(rng.lognormal(11.0, 1.4, accounts), 2),
+        "nameOrig": "C" + pl.Series(orig).cast(pl.Utf8).str.zfill(9),
+        "nameDest": "M" + pl.Series(orig % max(accounts // 4, 1)).cast(pl.Utf8).str.zfill(9),
+    })
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed(label: str, n: int, fn):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<26}{n:>12,}{seconds:>10.2f}{n / seconds:>14,.0f}{1e6 * seconds / n:>10.2f}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the velocity feature store.")
+    parser.add_argument("--accounts", type=int, default=10_000_000, help="Origin accounts in the store")
+    parser.add_argument("--ops", type=int, default=1_000_000, help="Online calls per measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    history = make_history(args.accounts, args.seed)
+    print(f"{args.accounts:,} origin and {args.accounts // 4:,} destination accounts")
+    print(f"{'':<26}{'n':>12}{'seconds':>10}{'per second':>14}{'us each':>10}")
+    timed("bulk expressions (rows)", len(history), lambda: add_velocity_features(history).select(pl.len()).item())
+    store = timed("warm start (rows)", len(history), lambda: FeatureStore.from_history(history))
+
+    # A day of traffic after the history, on random existing accounts
+    picks = history.sample(args.ops, with_replacement=True, seed=args.seed + 1)
+    last_step = int(history["step"].max())
+    del history
+    transactions = [
+        {"step": last_step + int(s), "amount": a, "nameOrig": o, "nameDest": d}
+        for s, a, o, d in zip(np.arange(args.ops) * 24 // args.ops,
+                              picks["amount"].to_list(), picks["nameOrig"].to_list(), picks["nameDest"].to_list())
+    ]
+    timed("lookup", args.ops, lambda: [store.lookup(tx) for tx in transactions])
+    timed("update", args.ops, lambda: [store.update(tx) for tx in transactions])
+    timed("observe (lookup + update)", args.ops, lambda: [store.observe(tx) for tx in transactions])
+    print(f"store: {store.stats()}, peak RSS {rss_mb():,.0f} MB")
@@ -0,0 +1,51 @@
+"""
+Per-row cost of the shared feature transform.
+
+Compares single-transaction calls (dict, 1-row pandas, 1-row polars) with
+vectorized batches:
+
+    python benchmarks/bench_features.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+import synthetic
+from features import RAW_COLUMNS, to_matrix
+
+
+def per_call_us(fn, arg, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(arg)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+if __name__ == "__main__":
+    raw = synthetic.generate(1_000_000).filter(pl.col("type").is_in(["TRANSFER", "CASH_OUT"])).select(RAW_COLUMNS)
+    row = raw.row(0, named=True)
+    out = np.empty((1, 12), dtype=np.float32)
+
+    print("single transaction (µs/call):")
+    print(f"  dict → preallocated row    {per_call_us(lambda r: to_matrix(r, out=out), row, 100_000):>9.2f}")
+    print(f"  dict                       {per_call_us(to_matrix, row, 100_000):>9.2f}")
+    print(f"  1-row pandas DataFrame     {per_call_us(to_matrix, raw.head(1).to_pandas(), 2_000):>9.2f}")
+    print(f"  1-row polars DataFrame     {per_call_us(to_matrix, raw.head(1), 2_000):>9.2f}")
+
+    print(f"batch of {raw.height:,} rows (ns/row):")
+    for label, data in [
+        ("polars", raw),
+        ("pandas", raw.to_pandas()),
+        ("record batch", raw.to_pandas().to_records(index=False)),
+    ]:
+        start = time.perf_counter()
+        to_matrix(data)
+        print(f"  {label:<25}{(time.perf_counter() - start) / raw.height * 1e9:>9.1f}")
@@ -0,0 +1,93 @@
+"""
+Old incident JSONL log (open/append/close per incident, readlines() for the
+tail) vs the SQLite incident store, plus concurrent writers.
+
+    python benchmarks/bench_incidents.py --history 200000 --writers 4
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from incident.store import IncidentStore, utc_now_iso
+
+SEVERITIES = ["P1", "P2", "P3", "P4"]
+TYPES = ["Data Drift", "Missing Feature", "Latency", "Model Error"]
+
+
+def _incident(i: int) -> dict:
+    return {"timestamp": utc_now_iso(), "incident_type": TYPES[i % 4], "severity": SEVERITIES[i % 7 % 4],
+            "details": {"drift_score": (i % 100) / 100, "features": ["amount", "oldbalanceOrg"]},
+            "status": "open", "notes": ""}
+
+
+def _jsonl_append(path: Path, entry: dict) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def _jsonl_tail(path: Path, limit: int) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    return [json.loads(l.strip()) for l in lines if l.strip()][-limit:]
+
+
+def _writer(db: str, n: int, batch: int) -> None:
+    store = IncidentStore(db)
+    for start in range(0, n, batch):
+        store.append_many(_incident(i) for i in range(start, min(start + batch, n)))
+
+
+def _timed(fn, *args, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark incident logging.")
+    parser.add_argument("--history", type=int, default=200_000, help="Incidents already logged")
+    parser.add_argument("--writes", type=int, default=2_000, help="Single-incident writes to time")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writer processes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        jsonl, store = tmp / "incident_log.jsonl", IncidentStore(tmp / "incidents.db")
+        history = [_incident(i) for i in range(args.history)]
+        jsonl.write_text("".join(json.dumps(e) + "\n" for e in history))
+        t = _timed(store.append_many, history)
+        print(f"{'store: bulk load':<34}{args.history / t:>12,.0f} incidents/s")
+
+        t = _timed(lambda: [_jsonl_append(jsonl, _incident(i)) for i in range(args.writes)])
+        print(f"{'jsonl: append one':<34}{args.writes / t:>12,.0f} incidents/s")
+        t = _timed(lambda: [store.append(_incident(i)) for i in range(args.writes)])
+        print(f"{'store: append one':<34}{args.writes / t:>12,.0f} incidents/s")
+        t = _timed(lambda: store.append_many(_incident(i) for i in range(args.writes)))
+        print(f"{'store: append_many':<34}{args.writes / t:>12,.0f} incidents/s")
+
+        print(f"{'jsonl: last 100':<34}{_timed(_jsonl_tail, jsonl, 100, repeat=3) * 1e3:>12.2f} ms")
+        print(f"{'store: last 100':<34}{_timed(store.tail, 100, repeat=100) * 1e3:>12.2f} ms")
+        print(f"{'store: P1 in type, last 100':<34}"
+              f"{_timed(lambda: store.query(severity='P1', incident_type='Latency', limit=100), repeat=100) * 1e3:>12.2f} ms")
+
+        ctx = mp.get_context("spawn")
+        n = args.writes * 5
+        procs = [ctx.Process(target=_writer, args=(str(store.path), n, 100)) for _ in range(args.writers)]
+        before, start = len(store), time.perf_counter()
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+        assert len(store) - before == n * args.writers
+        print(f"{f'store: {args.writers} writer processes':<34}{n * args.writers / elapsed:>12,.0f} incidents/s "
+              f"(batches of 100, incl. process start)")
@@ -0,0 +1,68 @@
+"""
+Per-call cost of the instrumentation layer (`utils.instrument`, `utils.logger`).
+
+Times a no-op function bare and under `span` at several sample rates, a
+queued log call, and `inference.predict` on one transaction with sampling
+on and off. Reported costs are over the bare call, best of `--repeat` runs.
+
+    python benchmarks/bench_instrument.py --calls 200000 [--model models/xgb_model.joblib]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from utils import instrument
+from utils.instrument import span
+from utils.logger import logger
+
+
+def per_call(fn, calls: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
+
+
+def noop(x):
+    return x
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark instrumentation overhead.")
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", type=Path, default=None, help="Also time inference.predict with this model")
+    args = parser.parse_args()
+
+    bare = per_call(noop, args.calls, args.repeat)
+    timed, logged = span("bench_noop")(noop), span("bench_noop_logged", log=True)(noop)
+    rows = []
+    for rate in (0.0, 0.01, 1.0):
+        instrument.set_sample_rate(rate)
+        rows.append((f"span, sample rate {rate:g}", per_call(timed, args.calls, args.repeat) - bare))
+    rows.append(("span with log line", per_call(logged, args.calls // 10, args.repeat) - bare))
+    rows.append(("logger.info (queued)", per_call(lambda i: logger.info("bench"), args.calls // 10, args.repeat)))
+    rows.append(("logger.debug (disabled)", per_call(lambda i: logger.debug("bench"), args.calls, args.repeat)))
+
+    if args.model is not None:
+        from features import FEATURE_COLUMNS
+        from inference import load_model, predict
+
+        model = load_model(args.model, watch=False)
+        tx = dict.fromkeys(FEATURE_COLUMNS[:7], 1.0)
+        for rate in (0.0, 1.0):
+            instrument.set_sample_rate(rate)
+            rows.append((f"predict, sample rate {rate:g}", per_call(lambda i: predict(model, tx), 2_000, args.repeat)))
+
+    print(f"bare call {bare:.3f} us")
+    print(f"{'':<28}{'us per call':>12}")
+    for name, us in rows:
+        print(f"{name:<28}{us:>12.3f}")
@@ -0,0 +1,87 @@
+"""
+Latency of single-transaction scoring with and without the prediction cache,
+in-process (no HTTP).
+
+Requests are drawn from a pool of distinct transactions with Zipf-skewed
+popularity (`--zipf`), so a share of them repeat the way retries and replays
+do; `--distinct` sets the pool size. The plain model and the cache (and,
+with --cache-db, the cache with its SQLite tier behind an empty memory
+tier) go through `serve.Scorer.score_one`, interleaved in blocks like
+bench_shadow.py.
+
+    python benchmarks/bench_pred_cache.py --model models/xgb_model.joblib --requests 100000 [--cache-db /dev/shm/bench-cache.db]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from features import FEATURE_COLUMNS
+from inference import load_model, MODEL_PATH
+from loadgen import make_transactions
+from pred_cache import CachedModel
+from serve import Scorer
+
+
+def run(scorer: Scorer, transactions: list[dict]) -> np.ndarray:
+    latencies = np.empty(len(transactions))
+    for i, tx in enumerate(transactions):
+        start = time.perf_counter()
+        scorer.score_one(tx)
+        latencies[i] = time.perf_counter() - start
+    return latencies * 1e3
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the prediction cache.")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--requests", type=int, default=100_000, help="Requests per configuration")
+    parser.add_argument("--block", type=int, default=2_000, help="Requests per interleaved block")
+    parser.add_argument("--distinct", type=int, default=20_000, help="Distinct transactions in the pool")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Popularity skew of the pool")
+    parser.add_argument("--cache-size", type=int, default=10_000)
+    parser.add_argument("--cache-db", type=Path, default=None, help="Also measure the SQLite tier at this path")
+    args = parser.parse_args()
+
+    model = load_model(args.model, watch=False)
+    pool = [dict(zip(FEATURE_COLUMNS, map(float, row))) for row in make_transactions(args.distinct)]
+    rng = np.random.default_rng(0)
+    picks = (rng.zipf(args.zipf, args.requests) - 1) % args.distinct
+    transactions = [pool[i] for i in picks]
+
+    models = {"no cache": model, "cache": CachedModel(model, max_entries=args.cache_size)}
+    if args.cache_db is not None:
+        args.cache_db.unlink(missing_ok=True)
+        # A worker whose memory tier holds nothing: every hit comes from the shared tier
+        models["shared tier"] = CachedModel(model, max_entries=1, shared_path=args.cache_db,
+                                            shared_max_entries=args.distinct)
+    scorers = {name: Scorer(m) for name, m in models.items()}
+    run(scorers["no cache"], transactions[:args.block])  # warm up
+    latencies = {name: [] for name in models}
+    for start in range(0, args.requests, args.block):
+        block = transactions[start:start + args.block]
+        for name, scorer in scorers.items():
+            latencies[name].append(run(scorer, block))
+
+    ms = {name: np.concatenate(values) for name, values in latencies.items()}
+    base = ms["no cache"]
+    print(f"{args.requests:,} single-row requests over {args.distinct:,} distinct transactions (zipf {args.zipf})")
+    print(f"{'':<13}{'mean ms':>9}{'p50 ms':>9}{'p99 ms':>9}{'hit rate':>10}{'saved ms':>11}")
+    for name, values in ms.items():
+        p50, p99 = np.percentile(values, [50, 99])
+        stats = models[name].stats() if isinstance(models[name], CachedModel) else None
+        hit_rate = f"{stats['hit_rate']:.1%}" if stats else "-"
+        saved = f"{stats['saved_ms']:,.0f}" if stats else "-"
+        print(f"{name:<13}{values.mean():>9.4f}{p50:>9.4f}{p99:>9.4f}{hit_rate:>10}{saved:>11}")
+    for name, m in models.items():
+        if isinstance(m, CachedModel):
+            s = m.stats()
+            print(f"{name}: lookup {1e3 * s['lookup_ms_per_row']:.1f} us/row, miss {1e3 * s['miss_ms_per_row']:.1f} us/row, "
+                  f"{s['evictions']:,} evictions; wall-clock saved {base.sum() - ms[name].sum():,.0f} ms")
@@ -0,0 +1,71 @@
+"""
+Eager vs lazy/streaming preprocessing on a synthetic PaySim-shaped file.
+
+Each path runs in a fresh process so peak RSS is measured per path:
+
+    python benchmarks/bench_preprocess.py --rows 6000000
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+import synthetic
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(mode: str, raw_path: str, out_path: str, queue) -> None:
+    from data_preprocess import load_raw_data, scan_raw_data, preprocess_data, save_preprocessed_data
+
+    start = time.perf_counter()
+    if mode == "eager":
+        df = preprocess_data(load_raw_data(raw_path))
+    else:
+        df = preprocess_data(scan_raw_data(raw_path))
+    save_preprocessed_data(df, out_path)
+    queue.put((time.perf_counter() - start, _peak_rss_mb()))
+
+
+def measure(mode: str, raw_path: str, out_path: str) -> tuple[float, float]:
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(mode, raw_path, out_path, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark eager vs streaming preprocessing.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--raw", type=str, default=None, help="Existing raw CSV (skips generation)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = args.raw or str(synthetic.write_csv(Path(tmp) / "raw.csv", args.rows))
+        size_mb = os.path.getsize(raw) / 2**20
+        print(f"Input: {raw} ({size_mb:.0f} MiB)")
+
+        runs = [
+            ("eager → csv", "eager", Path(tmp) / "eager.csv"),
+            ("lazy  → sink_csv", "lazy", Path(tmp) / "lazy.csv"),
+            ("lazy  → sink_parquet", "lazy", Path(tmp) / "lazy.parquet"),
+        ]
+        print(f"{'path':<22}{'seconds':>10}{'peak RSS MiB':>15}")
+        for label, mode, out in runs:
+            elapsed, rss = measure(mode, raw, str(out))
+            print(f"{label:<22}{elapsed:>10.2f}{rss:>15.0f}")
@@ -0,0 +1,106 @@
+"""
+Native drift report (raw reference and reference profile) vs the Evidently
+DataDriftPreset report, on synthetic scored data.
+
+Each path runs in a fresh process so peak RSS is measured per path:
+
+    python benchmarks/bench_report.py --rows 1000000
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+sys.path.insert(0, str(ROOT_DIR))
+
+import synthetic
+from bench_preprocess import _peak_rss_mb
+
+
+def _scored_csv(path: Path, rows: int, seed: int, amount_scale: float) -> None:
+    import numpy as np
+    import polars as pl
+    from features import FEATURE_COLUMNS, transform
+
+    df = synthetic.generate(rows, seed=seed).filter(pl.col("type").is_in(["TRANSFER", "CASH_OUT"]))
+    df = transform(df.with_columns(pl.col("amount") * amount_scale)).select(FEATURE_COLUMNS)
+    proba = np.random.default_rng(seed).beta(0.5, 20, df.height)
+    df.with_columns(pl.Series("prediction", (proba > 0.5).astype(np.int64)),
+                    pl.Series("fraud_proba", proba)).write_csv(path)
+
+
+def _prepare(rows: int, tmp: str, queue) -> None:
+    from incident.drift import build_profile, save_profile
+    import pandas as pd
+
+    ref, prod = Path(tmp) / "reference.csv", Path(tmp) / "production.csv"
+    _scored_csv(ref, rows, seed=0, amount_scale=1.0)
+    _scored_csv(prod, rows, seed=1, amount_scale=1.3)
+    save_profile(build_profile(pd.read_csv(ref)), str(Path(tmp) / "profile.json"))
+    queue.put(None)
+
+
+def _run(mode: str, tmp: str, queue) -> None:
+    start = time.perf_counter()
+    tmp = Path(tmp)
+    import pandas as pd
+
+    if mode == "evidently":
+        try:
+            from evidently.report import Report
+            from evidently.metric_preset import DataDriftPreset
+        except ImportError:
+            queue.put(None)
+            return
+        report = Report(metrics=[DataDriftPreset()])
+        report.run(reference_data=pd.read_csv(tmp / "reference.csv"), current_data=pd.read_csv(tmp / "production.csv"))
+        report.save_html(str(tmp / "evidently.html"))
+        size = (tmp / "evidently.html").stat().st_size
+    else:
+        sys.path.insert(0, str(ROOT_DIR / "monitoring"))
+        import report as native
+        from incident.drift import DriftEngine, load_profile
+
+        prod = native.read_production(tmp / "production.csv")
+        if mode == "native-profile":
+            engine = DriftEngine.from_profile(load_profile(tmp / "profile.json"))
+        else:
+            engine = DriftEngine(native.read_production(tmp / "reference.csv"))
+        out = native.render_html(native.native_report(prod, engine))
+        (tmp / "native.html").write_text(out)
+        size = len(out)
+    queue.put((time.perf_counter() - start, _peak_rss_mb(), size))
+
+
+def _in_process(target, *args):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark native vs Evidently drift reports.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Raw rows per side before the type filter")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _in_process(_prepare, args.rows, tmp)
+        print(f"{'path':<28}{'seconds':>10}{'peak RSS MiB':>15}{'output KiB':>12}")
+        for label, mode in [("native, reference.csv", "native-raw"), ("native, reference profile", "native-profile"),
+                            ("evidently DataDriftPreset", "evidently")]:
+            result = _in_process(_run, mode, tmp)
+            if result is None:
+                print(f"{label:<28}{'(evidently not installed)':>37}")
+                continue
+            elapsed, rss, size = result
+            print(f"{label:<28}{elapsed:>10.2f}{rss:>15.0f}{size / 1024:>12.0f}")
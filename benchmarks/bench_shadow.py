@@ -0,0 +1,90 @@
+"""
+Latency cost of shadow scoring on the request path, in-process (no HTTP).
+
+Single transactions go through `serve.Scorer.score_one`, as a /score request
+would, back to back (a saturated service: shadow work can only run by
+taking time from requests). The plain model, a `ShadowModel` and a canary
+split are interleaved in short blocks so drift in machine load hits all of
+them alike, and the plain model runs twice: overheads are against both
+runs pooled, and the gap between the two is the noise floor. The shadow
+queue is drained between blocks, so no background work spills into
+another configuration's block.
+
+    python benchmarks/bench_shadow.py --model models/xgb_model.joblib [--shadow-model other.joblib] --requests 100000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from features import FEATURE_COLUMNS
+from inference import load_model, MODEL_PATH
+from loadgen import make_transactions
+from serve import Scorer
+from shadow import ShadowModel
+
+
+def run(scorer: Scorer, transactions: list[dict]) -> np.ndarray:
+    latencies = np.empty(len(transactions))
+    for i, tx in enumerate(transactions):
+        start = time.perf_counter()
+        scorer.score_one(tx)
+        latencies[i] = time.perf_counter() - start
+    return latencies * 1e3
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark shadow/canary scoring overhead.")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--shadow-model", type=Path, default=None, help="Candidate (default: a second copy of --model)")
+    parser.add_argument("--requests", type=int, default=100_000, help="Requests per configuration")
+    parser.add_argument("--block", type=int, default=2_000, help="Requests per interleaved block")
+    parser.add_argument("--canary-percent", type=float, default=10.0)
+    args = parser.parse_args()
+
+    primary = load_model(args.model, watch=False)
+    candidate = load_model(args.shadow_model or args.model, watch=False)
+    X = make_transactions(args.block)
+    transactions = [dict(zip(FEATURE_COLUMNS, map(float, row))) for row in X]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models = {
+            "primary only": primary,
+            "primary again": primary,  # A/A: the run-to-run noise floor
+            "shadow": ShadowModel(primary, candidate, log_path=Path(tmp) / "shadow.csv"),
+            f"canary {args.canary_percent:g}%": ShadowModel(primary, candidate, args.canary_percent,
+                                                            log_path=Path(tmp) / "canary.csv"),
+        }
+        scorers = {name: Scorer(model) for name, model in models.items()}
+        run(scorers["primary only"], transactions)  # warm up
+        latencies = {name: [] for name in models}
+        for _ in range(max(1, args.requests // args.block)):
+            for name, scorer in scorers.items():
+                latencies[name].append(run(scorer, transactions))
+                if isinstance(models[name], ShadowModel):
+                    models[name].flush()
+        stats = {}
+        for name, model in models.items():
+            if isinstance(model, ShadowModel):
+                model.close()
+                stats[name] = model.stats()
+
+    ms = {name: np.concatenate(values) for name, values in latencies.items()}
+    base = np.percentile(np.concatenate([ms["primary only"], ms["primary again"]]), [50, 99])
+    print(f"{len(ms['primary only']):,} single-row requests per configuration, interleaved in blocks of {args.block:,}")
+    print(f"{'':<16}{'p50 ms':>9}{'p99 ms':>9}{'p99 overhead':>14}")
+    for name, values in ms.items():
+        p50, p99 = np.percentile(values, [50, 99])
+        print(f"{name:<16}{p50:>9.4f}{p99:>9.4f}{(p99 - base[1]) / base[1]:>+13.1%}")
+    for name, s in stats.items():
+        print(f"{name}: {s['rows']:,} rows compared in {s['compare_batches']} batches "
+              f"({s['compare_us_per_row']:.1f} us/row), dropped {s['dropped_rows']:,}, "
+              f"disagreement {s['disagreement_rate']:.4%}, request-path overhead p99 {s['overhead']['p99_ms']} ms")
@@ -0,0 +1,49 @@
+"""
+Load time of the processed dataset: CSV re-parse vs columnar dataset scan.
+
+    python benchmarks/bench_storage.py --rows 6000000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import polars as pl
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+import synthetic
+from data_preprocess import scan_raw_data, preprocess_data
+from utils.storage import write_dataset, load_dataset
+
+FEATURES = ["step", "type", "amount", "oldbalanceOrg", "newbalanceOrig", "oldbalanceDest", "newbalanceDest"]
+
+
+def timed(label: str, fn) -> None:
+    start = time.perf_counter()
+    out = fn()
+    print(f"{label:<38}{time.perf_counter() - start:>8.3f}s  rows={out.height:,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark processed-dataset load paths.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        raw = synthetic.write_csv(tmp / "raw.csv", args.rows)
+        clean = preprocess_data(scan_raw_data(raw))
+        clean.sink_csv(tmp / "clean.csv")
+        write_dataset(clean, tmp / "parquet", fmt="parquet")
+        write_dataset(clean, tmp / "ipc", fmt="ipc")
+
+        timed("csv: pl.read_csv", lambda: pl.read_csv(tmp / "clean.csv"))
+        timed("parquet: all columns", lambda: load_dataset(tmp / "parquet"))
+        timed("parquet: 7 columns", lambda: load_dataset(tmp / "parquet", columns=FEATURES))
+        timed("parquet: 7 columns, last 3 days", lambda: load_dataset(tmp / "parquet", columns=FEATURES, days=[28, 29, 30]))
+        timed("ipc (mmap): all columns", lambda: load_dataset(tmp / "ipc"))
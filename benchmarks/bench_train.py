@@ -0,0 +1,86 @@
+"""
+Wall-clock and peak RSS of the training paths on a synthetic dataset:
+in-memory (pandas + train_test_split), streamed QuantileDMatrix, external
+memory, and a warm start on the newest days.
+
+Each path runs in a fresh process so peak RSS is measured per path:
+
+    python benchmarks/bench_train.py --rows 6000000
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+import synthetic
+from bench_preprocess import _peak_rss_mb
+
+
+def _run(mode: str, data: str, registry_root: str, queue) -> None:
+    import train
+    from registry import ModelRegistry
+
+    start = time.perf_counter()
+    if mode == "full":
+        model, metrics = train.train_model(*train.load_data(Path(data)))
+    elif mode == "stream":
+        model, metrics = train.train_streaming(Path(data))
+    elif mode == "external":
+        model, metrics = train.train_streaming(Path(data), external_memory=True)
+    else:
+        model, metrics = train.warm_start(Path(data), ModelRegistry(registry_root), n_days=3)
+    elapsed = time.perf_counter() - start
+    if mode == "stream":
+        ModelRegistry(registry_root).register(model, metrics)
+    queue.put((elapsed, _peak_rss_mb(), metrics["auprc"]))
+
+
+def _prepare(rows: int, tmp: str, queue) -> None:
+    from data_preprocess import scan_raw_data, preprocess_data
+    from utils.storage import write_dataset
+
+    raw = synthetic.write_csv(Path(tmp) / "raw.csv", rows)
+    queue.put(str(write_dataset(preprocess_data(scan_raw_data(raw)), Path(tmp) / "dataset")))
+
+
+def _in_process(target, *args):
+    # Spawned children start small; ru_maxrss survives exec, so the parent is kept lean too
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def measure(mode: str, data: str, registry_root: str) -> tuple[float, float, float]:
+    return _in_process(_run, mode, data, registry_root)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark in-memory vs out-of-core training.")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Raw rows to generate")
+    parser.add_argument("--data", type=str, default=None, help="Existing processed dataset (skips generation)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data = args.data or _in_process(_prepare, args.rows, tmp)
+
+        runs = [
+            ("in-memory (pandas)", "full"),
+            ("stream QuantileDMatrix", "stream"),
+            ("stream external memory", "external"),
+            ("warm start, last 3 days", "warm"),  # continues the "stream" model
+        ]
+        print(f"{'path':<26}{'seconds':>10}{'peak RSS MiB':>15}{'AUPRC':>9}")
+        for label, mode in runs:
+            elapsed, rss, auprc = measure(mode, data, str(Path(tmp) / "registry"))
+            print(f"{label:<26}{elapsed:>10.2f}{rss:>15.0f}{auprc:>9.4f}")
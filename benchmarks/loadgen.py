@@ -0,0 +1,125 @@
+"""
+Load generator for src/serve.py.
+
+Drives the single-transaction endpoint from concurrent keep-alive clients,
+then the batch endpoint, and prints client-side throughput and latency next
+to the server-reported model time:
+
+    python src/serve.py &
+    python benchmarks/loadgen.py --requests 20000 --concurrency 8
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from inference import columns_needed
+
+
+def make_transactions(n: int, seed: int = 0) -> np.ndarray:
+    """Random feature rows in `columns_needed` order."""
+    rng = np.random.default_rng(seed)
+    X = np.empty((n, len(columns_needed)), dtype=np.float64)
+    step = rng.integers(1, 744, n)
+    amount = np.round(rng.lognormal(11, 1.4, n), 2)
+    old_orig = np.round(rng.lognormal(10.5, 2, n), 2)
+    new_orig = np.maximum(old_orig - amount, 0)
+    old_dest = np.round(rng.lognormal(12, 2, n), 2)
+    new_dest = old_dest + amount
+    X[:, 0] = step
+    X[:, 1] = rng.integers(0, 2, n)
+    X[:, 2] = amount
+    X[:, 3] = old_orig
+    X[:, 4] = new_orig
+    X[:, 5] = old_dest
+    X[:, 6] = new_dest
+    X[:, 7] = new_orig + amount - old_orig
+    X[:, 8] = old_dest + amount - new_dest
+    X[:, 9] = amount > 200_000
+    X[:, 10] = step % 24
+    X[:, 11] = step // 24
+    return X
+
+
+def _post(conn: http.client.HTTPConnection, path: str, body: bytes) -> dict:
+    conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    payload = resp.read()
+    if resp.status != 200:
+        raise RuntimeError(f"{path} -> {resp.status}: {payload[:200]!r}")
+    return json.loads(payload)
+
+
+def run_single(host: str, port: int, X: np.ndarray, concurrency: int) -> tuple[np.ndarray, float]:
+    bodies = [json.dumps(dict(zip(columns_needed, row.tolist()))).encode() for row in X]
+    latencies = np.zeros(len(bodies))
+
+    def worker(idx: range):
+        conn = http.client.HTTPConnection(host, port)
+        for i in idx:
+            start = time.perf_counter()
+            _post(conn, "/score", bodies[i])
+            latencies[i] = (time.perf_counter() - start) * 1e3
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(range(k, len(bodies), concurrency),))
+               for k in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, time.perf_counter() - start
+
+
+def run_batch(host: str, port: int, X: np.ndarray, batch_size: int, repeats: int) -> tuple[np.ndarray, float]:
+    body = json.dumps({"rows": X[:batch_size].tolist()}).encode()
+    conn = http.client.HTTPConnection(host, port)
+    latencies = np.zeros(repeats)
+    start = time.perf_counter()
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        _post(conn, "/score/batch", body)
+        latencies[i] = (time.perf_counter() - t0) * 1e3
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return latencies, elapsed
+
+
+def fetch_stats(host: str, port: int) -> dict:
+    conn = http.client.HTTPConnection(host, port)
+    conn.request("GET", "/stats")
+    return json.loads(conn.getresponse().read())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the scoring service on localhost.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--batch-repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    X = make_transactions(max(args.requests, args.batch_size))
+
+    lat, elapsed = run_single(args.host, args.port, X[:args.requests], args.concurrency)
+    p50, p99 = np.percentile(lat, [50, 99])
+    print(f"single: {args.requests / elapsed:,.0f} req/s  client p50={p50:.3f}ms p99={p99:.3f}ms")
+
+    lat, elapsed = run_batch(args.host, args.port, X, args.batch_size, args.batch_repeats)
+    p50, p99 = np.percentile(lat, [50, 99])
+    rate = args.batch_size * args.batch_repeats / elapsed
+    print(f"batch:  {rate:,.0f} tx/s  ({args.batch_size} rows/request) client p50={p50:.1f}ms p99={p99:.1f}ms")
+
+    print("server:", json.dumps(fetch_stats(args.host, args.port)["latency"], indent=2))
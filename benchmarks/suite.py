@@ -0,0 +1,294 @@
+"""
+End-to-end benchmark suite on synthetic PaySim data.
+
+Stages: synthetic generation, preprocessing, streaming training,
+evaluation, batch inference, single-row scoring latency, drift scoring and
+RCA attribution, and incident logging. Every stage runs in a freshly
+spawned process, so its peak RSS is its own. Wall time, throughput, latency
+percentiles and peak RSS are written to a JSON results file. With
+--baseline, each metric is compared against a stored run, and regressions
+beyond --tolerance are reported (exit code 1 with --fail-on-regression).
+
+    python benchmarks/suite.py --rows 1000000 --baseline benchmarks/baseline.json
+    python benchmarks/suite.py --rows 1000000 --save-baseline benchmarks/baseline.json
+    python benchmarks/suite.py --stages train drift --data-dir /tmp/bench   # reuse generated data
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+sys.path.insert(0, str(ROOT_DIR))
+
+from bench_preprocess import _peak_rss_mb
+
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+STAGES = ["generate", "preprocess", "train", "eval", "batch_inference", "predict_single", "drift", "incidents"]
+# Production traffic for inference/drift: the tail of the log drifts
+PRODUCTION_DRIFT = {"amount_scale": 1.5, "dest_zero_rate": 0.3, "null_rate": 0.02}
+
+# Metric name suffix -> whether larger is better
+HIGHER_IS_BETTER = {"_per_s": True, "auprc": True, "seconds": False, "_mb": False, "_ms": False}
+
+
+def _percentiles(samples_s: list) -> dict:
+    p50, p95, p99 = np.percentile(np.asarray(samples_s) * 1e3, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 4), "p95_ms": round(float(p95), 4), "p99_ms": round(float(p99), 4)}
+
+
+def _paths(work: Path) -> dict:
+    return {"raw": work / "raw.csv", "production_raw": work / "production_raw.csv", "dataset": work / "dataset",
+            "model": work / "model.joblib", "split": work / "split.npz", "scored": work / "production.csv",
+            "incidents": work / "incidents.db"}
+
+
+# ---------------- stages (each runs in its own process) ---------------- #
+def stage_generate(work: Path, rows: int) -> dict:
+    import synthetic
+
+    p = _paths(work)
+    synthetic.write_csv(p["raw"], rows, seed=0)
+    synthetic.write_csv(p["production_raw"], rows, seed=1, drift=PRODUCTION_DRIFT, drift_start=0.5)
+    return {"rows": 2 * rows, "bytes": p["raw"].stat().st_size + p["production_raw"].stat().st_size}
+
+
+def stage_preprocess(work: Path, rows: int) -> dict:
+    import polars as pl
+    from data_preprocess import preprocess_data, scan_raw_data
+    from utils.storage import scan_dataset, write_dataset
+
+    p = _paths(work)
+    write_dataset(preprocess_data(scan_raw_data(p["raw"])), p["dataset"])
+    return {"rows": rows, "rows_out": scan_dataset(p["dataset"]).select(pl.len()).collect().item()}
+
+
+def stage_train(work: Path, rows: int) -> dict:
+    import train
+
+    p = _paths(work)
+    model, metrics = train.train_streaming(p["dataset"], num_boost_round=100)
+    train.save_model(model, p["model"])
+    train.save_split(train.holdout_indices(p["dataset"], metrics["days"]), p["dataset"], "stream", path=p["split"])
+    return {"rows": metrics["n_train"], "auprc": round(metrics["auprc"], 4)}
+
+
+def stage_eval(work: Path, rows: int) -> dict:
+    import joblib
+    import eval as evaluation
+
+    p = _paths(work)
+    holdout = evaluation.load_holdout(p["dataset"], p["split"])
+    report, curve = evaluation.evaluate_model(joblib.load(p["model"]), holdout, n_boot=1000)
+    return {"rows": report["rows"], "auprc": round(report["auprc"], 4), "thresholds": len(curve)}
+
+
+def stage_batch_inference(work: Path, rows: int) -> dict:
+    import joblib
+    from inference import run_batch
+
+    p = _paths(work)
+    n = run_batch(joblib.load(p["model"]), p["production_raw"], p["scored"], workers=os.cpu_count() or 4,
+                  resume=False)
+    return {"rows": n}
+
+
+def stage_predict_single(work: Path, rows: int, n_requests: int = 20_000) -> dict:
+    import joblib
+    import polars as pl
+    from serve import Scorer
+
+    p = _paths(work)
+    txs = pl.read_csv(p["production_raw"], n_rows=n_requests).to_dicts()
+    scorer = Scorer(joblib.load(p["model"]))
+    for tx in txs[:500]:
+        scorer.score_one(tx)
+    latencies = []
+    for tx in txs:
+        start = time.perf_counter()
+        scorer.score_one(tx)
+        latencies.append(time.perf_counter() - start)
+    return {"rows": len(txs), **_percentiles(latencies)}
+
+
+def stage_drift(work: Path, rows: int, ref_rows: int = 200_000, attribution_rows: int = 50_000) -> dict:
+    import joblib
+    import pandas as pd
+    from features import FEATURE_COLUMNS
+    from incident.drift import DriftEngine, build_profile
+    from incident.rca import attribute_predictions
+    from utils.storage import scan_dataset, stratified_sample
+
+    p = _paths(work)
+    model = joblib.load(p["model"])
+    prod = pd.read_csv(p["scored"], engine="pyarrow")
+    ref = stratified_sample(scan_dataset(p["dataset"], columns=FEATURE_COLUMNS + ["isFraud"]), ref_rows,
+                            by=["isFraud"]).collect().to_pandas()[FEATURE_COLUMNS]
+
+    start = time.perf_counter()
+    engine = DriftEngine.from_profile(build_profile(ref))
+    scores = engine.compare(prod[FEATURE_COLUMNS])
+    drift_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    shift, _ = attribute_predictions(model, prod[FEATURE_COLUMNS], ref, max_rows=attribution_rows)
+    rca_s = time.perf_counter() - start
+    return {"rows": len(prod), "drift_seconds": round(drift_s, 3), "drift_rows_per_s": round(len(prod) / drift_s),
+            "rca_seconds": round(rca_s, 3), "rca_rows_per_s": round(2 * attribution_rows / rca_s),
+            "drifted_features": int((scores["psi"] > 0.2).sum()), "top_attribution": shift.index[0]}
+
+
+def stage_incidents(work: Path, rows: int, writes: int = 2_000, events: int = 200_000) -> dict:
+    from incident.alerts import AlertAggregator
+    from incident.store import IncidentStore
+
+    p = _paths(work)
+    p["incidents"].unlink(missing_ok=True)
+    store = IncidentStore(p["incidents"])
+    latencies = []
+    for i in range(writes):
+        start = time.perf_counter()
+        store.append({"incident_type": "Benchmark", "severity": "P4", "details": {"i": i}})
+        latencies.append(time.perf_counter() - start)
+
+    rng = np.random.default_rng(0)
+    keys, scores = rng.integers(50, size=events), rng.uniform(0.2, 0.6, events)
+    with contextlib.redirect_stdout(io.StringIO()):
+        agg = AlertAggregator(store, resume=False)
+        start = time.perf_counter()
+        for k, s in zip(keys.tolist(), scores.tolist()):
+            agg.fire("Data Drift", {"drift_score": s}, (f"f{k}",))
+        agg.close()
+        elapsed = time.perf_counter() - start
+    append = _percentiles(latencies)
+    return {"rows": writes, "append_p50_ms": append["p50_ms"], "append_p99_ms": append["p99_ms"],
+            "alert_events_per_s": round(events / elapsed)}
+
+
+# ---------------- runner ---------------- #
+def _child(stage: str, work: str, rows: int, queue) -> None:
+    try:
+        start = time.perf_counter()
+        # Stage logs go to the log file, not the results table
+        with contextlib.redirect_stdout(io.StringIO()):
+            metrics = globals()[f"stage_{stage}"](Path(work), rows)
+        seconds = time.perf_counter() - start
+        queue.put({"seconds": round(seconds, 3), "rows_per_s": round(metrics.get("rows", 0) / seconds),
+                   **metrics, "peak_rss_mb": round(_peak_rss_mb(), 1)})
+    except Exception as exc:  # reported in the results, the suite carries on
+        queue.put({"error": f"{type(exc).__name__}: {exc}"})
+
+
+def run_stage(stage: str, work: Path, rows: int) -> dict:
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(stage, str(work), rows, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _better(metric: str) -> bool | None:
+    for suffix, higher in HIGHER_IS_BETTER.items():
+        if metric.endswith(suffix):
+            return higher
+    return None
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Rows of (stage, metric, baseline, current, relative change, regressed) for comparable metrics."""
+    rows = []
+    for stage, metrics in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage, {})
+        for metric, value in metrics.items():
+            higher = _better(metric)
+            old = base.get(metric)
+            if higher is None or not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or old == 0:
+                continue
+            change = (value - old) / abs(old)
+            regressed = change < -tolerance if higher else change > tolerance
+            rows.append((stage, metric, old, value, change, regressed))
+    return rows
+
+
+def print_results(results: dict) -> None:
+    print(f"\n{'stage':<17}{'seconds':>9}{'rows/s':>13}{'peak RSS MiB':>14}  other")
+    for stage, m in results["stages"].items():
+        if "error" in m:
+            print(f"{stage:<17}  FAILED: {m['error']}")
+            continue
+        other = ", ".join(f"{k}={v}" for k, v in m.items() if k not in ("seconds", "rows_per_s", "peak_rss_mb", "rows"))
+        print(f"{stage:<17}{m['seconds']:>9.2f}{m['rows_per_s']:>13,}{m['peak_rss_mb']:>14.0f}  {other}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end benchmark suite.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic raw rows (1M - 100M)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--data-dir", type=Path, default=None,
+                        help="Keep generated data here (and reuse it when running a subset of stages)")
+    parser.add_argument("--out", type=Path, default=None, help="Results JSON (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare against this results JSON")
+    parser.add_argument("--save-baseline", type=Path, default=None, help="Also write the results here")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Relative change that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        work = args.data_dir or Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="breeboost-bench-")))
+        work.mkdir(parents=True, exist_ok=True)
+        results = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+                "rows": args.rows, "commit": _git_commit(), "python": platform.python_version(),
+                "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            },
+            "stages": {},
+        }
+        for stage in [s for s in STAGES if s in args.stages]:
+            print(f"▶ {stage} ...", flush=True)
+            results["stages"][stage] = run_stage(stage, work, args.rows)
+
+    print_results(results)
+    out = args.out or RESULTS_DIR / f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    for path in filter(None, [out, args.save_baseline]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"\n✅ Results saved to: {out}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("meta", {}).get("rows") != args.rows:
+            print(f"⚠️ Baseline was measured at {baseline.get('meta', {}).get('rows'):,} rows, this run at {args.rows:,}")
+        rows = compare(results, baseline, args.tolerance)
+        regressions = [r for r in rows if r[5]]
+        print(f"\nvs baseline {args.baseline} (commit {baseline.get('meta', {}).get('commit')}), "
+              f"tolerance {args.tolerance:.0%}:")
+        for stage, metric, old, new, change, regressed in rows:
+            flag = "  ❌ REGRESSION" if regressed else ""
+            print(f"  {stage:<17}{metric:<22}{old:>12,.4g} -> {new:<12,.4g}{change:+8.1%}{flag}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
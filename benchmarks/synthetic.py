@@ -0,0 +1,138 @@
+"""
+Synthetic PaySim-shaped transaction generator.
+
+Produces the raw log schema (step, type, amount, nameOrig, balances, nameDest,
+isFraud, isFlaggedFraud) so the pipeline can be exercised without the Kaggle file.
+
+Drift can be injected into the tail of the log: rows from `drift_start`
+(a fraction of the log) on take the overrides in `drift`:
+
+ - amount_scale: multiply transaction amounts;
+ - fraud_rate: a different fraud rate;
+ - type_share: a different transaction type mix (same order as TYPES);
+ - dest_zero_rate: share of destination balances reported as 0 / 0;
+ - null_rate: share of rows with missing origin balances.
+
+    python benchmarks/synthetic.py --rows 100000000 --drift-start 0.8 --drift-amount-scale 1.5
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+TYPES = ["CASH_OUT", "PAYMENT", "CASH_IN", "TRANSFER", "DEBIT"]
+# Approximate share of each type in the real PaySim log
+TYPE_SHARE = [0.352, 0.338, 0.220, 0.084, 0.006]
+N_STEPS = 743
+DRIFT_KEYS = {"amount_scale", "fraud_rate", "type_share", "dest_zero_rate", "null_rate"}
+
+
+def _account_ids(prefix: str, ids: np.ndarray) -> pl.Series:
+    return prefix + pl.Series(ids).cast(pl.Utf8).str.zfill(9)
+
+
+def generate(n_rows: int, fraud_rate: float = 0.0013, seed: int = 0, start: int = 0, total: int | None = None,
+             drift: dict | None = None, drift_start: float = 0.5) -> pl.DataFrame:
+    """
+    Generate `n_rows` PaySim-style transactions.
+
+    `start`/`total` place the rows inside a larger log so `step` stays
+    monotonic across chunks (and drift starts at the same row).
+    """
+    rng = np.random.default_rng(seed)
+    total = total or n_rows
+    drift = drift or {}
+    unknown = set(drift) - DRIFT_KEYS
+    if unknown:
+        raise ValueError(f"Unknown drift settings {sorted(unknown)}; expected {sorted(DRIFT_KEYS)}")
+    drifted = np.arange(start, start + n_rows) >= int(drift_start * total) if drift else np.zeros(n_rows, bool)
+
+    type_idx = rng.choice(len(TYPES), size=n_rows, p=TYPE_SHARE)
+    if "type_share" in drift and drifted.any():
+        type_idx[drifted] = rng.choice(len(TYPES), size=int(drifted.sum()), p=drift["type_share"])
+    tx_type = np.asarray(TYPES)[type_idx]
+    step = 1 + (np.arange(start, start + n_rows, dtype=np.int64) * N_STEPS) // total
+    amount = np.round(rng.lognormal(mean=11.0, sigma=1.4, size=n_rows), 2)
+    if "amount_scale" in drift:
+        amount = np.where(drifted, np.round(amount * drift["amount_scale"], 2), amount)
+
+    # Fraud only occurs on TRANSFER / CASH_OUT, as in PaySim
+    eligible = (tx_type == "TRANSFER") | (tx_type == "CASH_OUT")
+    # Scaled so the rate holds over all rows of each segment (before / after drift_start)
+    share = [max(eligible[drifted == d].mean(), 1e-9) if (drifted == d).any() else 1.0 for d in (False, True)]
+    p_fraud = np.where(drifted, drift.get("fraud_rate", fraud_rate) / share[1], fraud_rate / share[0])
+    is_fraud = eligible & (rng.random(n_rows) < p_fraud)
+
+    old_orig = np.round(rng.lognormal(mean=10.5, sigma=2.0, size=n_rows), 2)
+    old_orig[rng.random(n_rows) < 0.3] = 0.0
+    # Fraudsters empty the origin account
+    amount = np.where(is_fraud, np.maximum(old_orig, amount), amount)
+    new_orig = np.where(is_fraud, 0.0, np.maximum(old_orig - amount, 0.0))
+
+    old_dest = np.round(rng.lognormal(mean=12.0, sigma=2.0, size=n_rows), 2)
+    old_dest[rng.random(n_rows) < 0.4] = 0.0
+    new_dest = np.where(is_fraud & (rng.random(n_rows) < 0.5), old_dest, old_dest + amount)
+    new_dest[(old_dest == 0.0) & (rng.random(n_rows) < 0.5)] = 0.0
+    if "dest_zero_rate" in drift:
+        zero = drifted & (rng.random(n_rows) < drift["dest_zero_rate"])
+        old_dest[zero] = 0.0
+        new_dest[zero] = 0.0
+
+    orig_ids = rng.integers(0, max(n_rows // 2, 1), size=n_rows)
+    dest_ids = rng.integers(0, max(n_rows // 4, 1), size=n_rows)
+
+    df = pl.DataFrame({
+        "step": step,
+        "type": tx_type,
+        "amount": amount,
+        "nameOrig": _account_ids("C", orig_ids),
+        "oldbalanceOrg": old_orig,
+        "newbalanceOrig": new_orig,
+        "nameDest": _account_ids("M", dest_ids),
+        "oldbalanceDest": old_dest,
+        "newbalanceDest": new_dest,
+        "isFraud": is_fraud.astype(np.int64),
+        "isFlaggedFraud": (is_fraud & (amount > 200_000)).astype(np.int64),
+    })
+    if drift.get("null_rate"):
+        missing = pl.Series(drifted & (rng.random(n_rows) < drift["null_rate"]))
+        df = df.with_columns(pl.when(missing).then(None).otherwise(pl.col(c)).alias(c)
+                             for c in ("oldbalanceOrg", "newbalanceOrig"))
+    return df
+
+
+def write_csv(path, n_rows: int, fraud_rate: float = 0.0013, seed: int = 0, chunk_rows: int = 1_000_000,
+              drift: dict | None = None, drift_start: float = 0.5) -> Path:
+    """Write a synthetic raw log to `path` in chunks so memory stays bounded."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        for i, start in enumerate(range(0, n_rows, chunk_rows)):
+            chunk = generate(min(chunk_rows, n_rows - start), fraud_rate=fraud_rate, seed=seed + i,
+                             start=start, total=n_rows, drift=drift, drift_start=drift_start)
+            chunk.write_csv(f, include_header=(i == 0))
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic PaySim raw log.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--fraud-rate", type=float, default=0.0013)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=str, default="data/raw/synthetic_paysim.csv")
+    parser.add_argument("--drift-start", type=float, default=0.5, help="Fraction of the log where drift begins")
+    parser.add_argument("--drift-amount-scale", type=float, default=None)
+    parser.add_argument("--drift-fraud-rate", type=float, default=None)
+    parser.add_argument("--drift-type-share", type=float, nargs=len(TYPES), default=None, metavar="P",
+                        help=f"Type mix after drift_start, in order {' '.join(TYPES)}")
+    parser.add_argument("--drift-dest-zero-rate", type=float, default=None)
+    parser.add_argument("--drift-null-rate", type=float, default=None)
+    args = parser.parse_args()
+
+    drift = {key: getattr(args, f"drift_{key}") for key in sorted(DRIFT_KEYS)
+             if getattr(args, f"drift_{key}") is not None}
+    out = write_csv(args.out, args.rows, fraud_rate=args.fraud_rate, seed=args.seed, drift=drift,
+                    drift_start=args.drift_start)
+    print(f"✅ Wrote {args.rows:,} synthetic transactions to {out}" + (f" (drift from {args.drift_start:.0%}: {drift})" if drift else ""))
@@ -0,0 +1,139 @@
+"""
+Offline aggregates for the dashboard.
+
+The dashboard used to load the whole processed dataset into pandas per
+server process, correlate every column and draw boxplots over millions of
+points. This step does that work once, in lazy Polars scans of the
+partitioned dataset, and writes a small JSON artifact that the dashboard
+renders from:
+
+ - correlation of every numeric feature with the target;
+ - per-class box statistics per feature (quartiles, median, mean, whiskers
+   at the most extreme values within 1.5 IQR, outlier count), the same
+   numbers matplotlib's boxplot would compute from the rows;
+ - a small stratified preview sample.
+
+    python dashboard/aggregates.py [--data data/processed/paysim_cleaned]
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import polars as pl
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from utils.logger import logger
+from utils.storage import PROCESSED_DIR, dataset_fingerprint, read_manifest, scan_dataset, stratified_sample
+
+AGGREGATES_PATH = ROOT_DIR / "dashboard" / "aggregates.json"
+TARGETS = ["isFraud", "fraud"]
+PREVIEW_ROWS = 100
+AGGREGATES_VERSION = 1
+
+
+def _target(schema: dict) -> str:
+    for name in TARGETS:
+        if name in schema:
+            return name
+    raise KeyError(f"No fraud target column ({' or '.join(TARGETS)}) in dataset schema")
+
+
+def correlations(lf: pl.LazyFrame, features: list[str], target: str) -> dict:
+    """Pearson correlation of each feature with the target, in one pass."""
+    row = lf.select([pl.corr(pl.col(f).cast(pl.Float64), pl.col(target).cast(pl.Float64)).alias(f)
+                     for f in features]).collect(engine="streaming").row(0, named=True)
+    return {f: (None if v is None or v != v else float(v)) for f, v in row.items()}
+
+
+def box_stats(lf: pl.LazyFrame, features: list[str], target: str) -> dict:
+    """{feature: {class: stats}} with the fields matplotlib's `Axes.bxp` takes."""
+    exprs = [pl.len().alias("__n")]
+    for f in features:
+        col = pl.col(f).cast(pl.Float64)
+        exprs += [col.quantile(0.25, "linear").alias(f"{f}__q1"), col.median().alias(f"{f}__med"),
+                  col.quantile(0.75, "linear").alias(f"{f}__q3"), col.mean().alias(f"{f}__mean")]
+    quartiles = lf.group_by(target).agg(exprs).collect(engine="streaming")
+
+    # Second pass: whiskers are the most extreme points inside the 1.5 IQR fences
+    fences = quartiles.select(
+        pl.col(target),
+        *[(pl.col(f"{f}__q1") - 1.5 * (pl.col(f"{f}__q3") - pl.col(f"{f}__q1"))).alias(f"{f}__lo") for f in features],
+        *[(pl.col(f"{f}__q3") + 1.5 * (pl.col(f"{f}__q3") - pl.col(f"{f}__q1"))).alias(f"{f}__hi") for f in features],
+    )
+    exprs = []
+    for f in features:
+        col = pl.col(f).cast(pl.Float64)
+        inside = col.is_between(pl.col(f"{f}__lo"), pl.col(f"{f}__hi"))
+        exprs += [col.filter(inside).min().alias(f"{f}__whislo"), col.filter(inside).max().alias(f"{f}__whishi"),
+                  (~inside & col.is_not_null()).sum().alias(f"{f}__outliers")]
+    whiskers = lf.join(fences.lazy(), on=target).group_by(target).agg(exprs).collect(engine="streaming")
+    stats = quartiles.join(whiskers, on=target)
+
+    out = {f: {} for f in features}
+    for row in stats.sort(target).iter_rows(named=True):
+        label = str(row[target])
+        for f in features:
+            out[f][label] = {
+                "count": int(row["__n"]),
+                "q1": row[f"{f}__q1"], "med": row[f"{f}__med"], "q3": row[f"{f}__q3"], "mean": row[f"{f}__mean"],
+                "whislo": row[f"{f}__whislo"], "whishi": row[f"{f}__whishi"],
+                "outliers": int(row[f"{f}__outliers"]),
+            }
+    return out
+
+
+def build_aggregates(path: Path = PROCESSED_DIR, preview_rows: int = PREVIEW_ROWS, seed: int = 0) -> dict:
+    schema = read_manifest(path)["schema"]
+    target = _target(schema)
+    features = [c for c in schema if c != target]
+    lf = scan_dataset(path)
+
+    logger.info(f"Aggregating {path} for the dashboard ({len(features)} features, target {target})")
+    class_counts = lf.group_by(target).len().collect(engine="streaming").sort(target)
+    preview = stratified_sample(lf, preview_rows, by=[target], seed=seed).collect().head(preview_rows)
+    return {
+        "aggregates_version": AGGREGATES_VERSION,
+        "created_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "source": {"data": str(path), "fingerprint": dataset_fingerprint(path)},
+        "target": target,
+        "rows": int(class_counts["len"].sum()),
+        "class_counts": {str(k): int(v) for k, v in class_counts.iter_rows()},
+        "correlations": correlations(lf, features, target),
+        "box_stats": box_stats(lf, features, target),
+        "preview": {"columns": preview.columns, "rows": [list(r) for r in preview.iter_rows()]},
+    }
+
+
+def save_aggregates(aggregates: dict, path: Path = AGGREGATES_PATH) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(aggregates), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def load_aggregates(path: Path = AGGREGATES_PATH) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        aggregates = json.load(f)
+    if aggregates.get("aggregates_version") != AGGREGATES_VERSION:
+        raise ValueError(f"Unsupported dashboard aggregates version {aggregates.get('aggregates_version')} in {path}")
+    return aggregates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the dashboard's dataset aggregates.")
+    parser.add_argument("--data", type=Path, default=PROCESSED_DIR)
+    parser.add_argument("--out", type=Path, default=AGGREGATES_PATH)
+    parser.add_argument("--preview-rows", type=int, default=PREVIEW_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    out = save_aggregates(build_aggregates(args.data, args.preview_rows, args.seed), args.out)
+    print(f"✅ Dashboard aggregates saved to: {out} ({out.stat().st_size / 1024:.1f} KiB)")
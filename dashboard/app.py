@@ -13,72 +13,91 @@ SRC_DIR = ROOT_DIR / "src"
 sys.path.insert(0, str(SRC_DIR))
 
 from inference import load_model, predict  # Assumes src/inference.py exists
+from pred_cache import CachedModel
+from features import TYPE_CODES
+from aggregates import AGGREGATES_PATH, load_aggregates
 
-# Load model
-model = load_model()
 
-st.set_page_config(page_title="BreeBoost Fraud Predictor", layout="centered")
-st.title("🚨 BreeBoost – Real-Time Fraud Detection")
+# One model per server process, shared by every session and rerun (a HotModel
+# when the registry has a current version, so promotions are picked up). Re-runs
+# re-submit the same form, so predictions are cached per model version.
+@st.cache_resource
+def get_model():
+    return CachedModel(load_model(), max_entries=10_000)
 
-# ... (imports and setup remain unchanged)
 
-# ---------------- Load and Preprocess Data ---------------- #
+# Dataset statistics are precomputed by dashboard/aggregates.py; the mtime in
+# the cache key picks up a rebuilt artifact without restarting the server
 @st.cache_data
-def load_data():
-    path = ROOT_DIR / "data" / "processed" / "paysim_cleaned.csv"
-    df = pd.read_csv(path)
-    if "isFraud" in df.columns:
-        target = "isFraud"
-    elif "fraud" in df.columns:
-        target = "fraud"
-    else:
-        st.error("No fraud target column found.")
-        st.stop()
-    return df, target
+def get_aggregates(path: str, mtime_ns: int) -> dict:
+    return load_aggregates(path)
 
-df, target_col = load_data()
 
-# ---------------- Correlation Analysis ---------------- #
-st.subheader("📊 Feature Correlation with Fraud")
-st.markdown("""
+st.set_page_config(page_title="BreeBoost Fraud Predictor", layout="centered")
+st.title("🚨 BreeBoost – Real-Time Fraud Detection")
+
+model = get_model()
+
+# ---------------- Load Precomputed Aggregates ---------------- #
+if AGGREGATES_PATH.exists():
+    agg = get_aggregates(str(AGGREGATES_PATH), AGGREGATES_PATH.stat().st_mtime_ns)
+    target_col = agg["target"]
+    st.caption(f"Dataset statistics over {agg['rows']:,} rows, computed {agg['created_at']}.")
+else:
+    agg = None
+    st.warning("Dataset aggregates not found. Build them with `python dashboard/aggregates.py`.")
+
+if agg is not None:
+    # ---------------- Correlation Analysis ---------------- #
+    st.subheader("📊 Feature Correlation with Fraud")
+    st.markdown("""
 Understanding how each numerical feature correlates with fraud helps identify what characteristics are most predictive. 
 A positive correlation means the feature tends to increase with fraud, while a negative one suggests the opposite.
 """)
 
-numeric_cols = df.select_dtypes(include="number")
-corr_matrix = numeric_cols.corr()
-fraud_corr = corr_matrix[[target_col]].drop(target_col, axis=0).sort_values(by=target_col, ascending=False)
+    fraud_corr = (
+        pd.Series(agg["correlations"], name=target_col, dtype=float).dropna()
+        .sort_values(ascending=False).to_frame()
+    )
 
-fig, ax = plt.subplots(figsize=(4, len(fraud_corr) * 0.4))
-sns.heatmap(fraud_corr, annot=True, cmap="coolwarm", ax=ax, cbar=True)
-st.pyplot(fig, clear_figure=False)
+    fig, ax = plt.subplots(figsize=(4, len(fraud_corr) * 0.4))
+    sns.heatmap(fraud_corr, annot=True, cmap="coolwarm", ax=ax, cbar=True)
+    st.pyplot(fig, clear_figure=False)
+    plt.close(fig)
 
-# ---------------- Top Features Boxplots ---------------- #
-st.subheader("📦 Top Feature Distributions")
-st.markdown("""
+    # ---------------- Top Features Boxplots ---------------- #
+    st.subheader("📦 Top Feature Distributions")
+    st.markdown("""
 Below are the top 3 features most correlated with fraud, visualized by how their values differ between fraudulent and non-fraudulent transactions. 
 Boxplots highlight the distribution and range of values for each class.
 """)
 
-top_features = fraud_corr.abs().sort_values(by=target_col, ascending=False).head(3).index.tolist()
-cols = st.columns(len(top_features))
-
-for col, feature in zip(cols, top_features):
-    with col:
-        st.markdown(f"**{feature}**")
-        fig, ax = plt.subplots(figsize=(3, 2))
-        sns.boxplot(data=df, x=target_col, y=feature, ax=ax, palette="Set2")
-        ax.set_xlabel("")
-        ax.set_ylabel("")
-        st.pyplot(fig, clear_figure=False)
-
-# ---------------- Data Snapshot ---------------- #
-st.subheader("🧾 Snapshot of First 100 Rows")
-st.markdown("""
+    top_features = fraud_corr[target_col].abs().sort_values(ascending=False).head(3).index.tolist()
+    cols = st.columns(len(top_features))
+    palette = sns.color_palette("Set2")
+
+    for col, feature in zip(cols, top_features):
+        with col:
+            st.markdown(f"**{feature}**")
+            per_class = agg["box_stats"][feature]
+            fig, ax = plt.subplots(figsize=(3, 2))
+            # Boxes drawn from precomputed quartiles/whiskers; outliers are counted, not plotted
+            boxes = ax.bxp([{**per_class[c], "label": c} for c in per_class], showfliers=False, patch_artist=True)
+            for patch, color in zip(boxes["boxes"], palette):
+                patch.set_facecolor(color)
+            ax.set_xlabel("")
+            ax.set_ylabel("")
+            st.pyplot(fig, clear_figure=False)
+            plt.close(fig)
+            st.caption(" · ".join(f"{c}: {s['outliers']:,} outliers" for c, s in per_class.items()))
+
+    # ---------------- Data Snapshot ---------------- #
+    st.subheader("🧾 Dataset Sample")
+    st.markdown("""
 A preview of the dataset used to train and evaluate the fraud detection model.
-This table includes the first 100 rows of processed transaction data.
+This table is a sample of processed transaction data, stratified by class.
 """)
-st.dataframe(df.head(100), use_container_width=True)
+    st.dataframe(pd.DataFrame(agg["preview"]["rows"], columns=agg["preview"]["columns"]), use_container_width=True)
 
 # ---------------- Fraud Prediction Form ---------------- #
 st.markdown("---")
@@ -91,29 +110,25 @@ This allows you to understand how different values influence the prediction.
 with st.form("fraud_form"):
     col1, col2, col3 = st.columns(3)
     with col1:
-        step = st.number_input("Step", min_value=0, value=1)
+        step = st.number_input("Step (hours since start)", min_value=0, value=1)
         oldbalanceOrg = st.number_input("Old Balance (Origin)", value=5000.0)
         oldbalanceDest = st.number_input("Old Balance (Dest)", value=0.0)
 
     with col2:
-        type_ = st.selectbox("Type", options=[0, 1])  # 0: PAYMENT, 1: TRANSFER (example)
+        type_ = st.selectbox("Type", options=list(TYPE_CODES))
         newbalanceOrig = st.number_input("New Balance (Origin)", value=4000.0)
         newbalanceDest = st.number_input("New Balance (Dest)", value=0.0)
 
     with col3:
         amount = st.number_input("Amount", min_value=0.0, value=1000.0)
-        hour = st.slider("Hour of Day", 0, 23, 10)
-        day = st.slider("Day of Month", 1, 31, 15)
-
-    # Derived features
-    errorBalanceOrig = oldbalanceOrg - newbalanceOrig - amount
-    errorBalanceDest = newbalanceDest - oldbalanceDest - amount
-    is_large_transaction = int(amount > 100000)
+        st.caption(f"Hour of day: {step % 24} · Day: {step // 24}")
 
     submitted = st.form_submit_button("🚀 Predict Fraud")
 
 if submitted:
-    input_df = pd.DataFrame([{
+    # Derived features (errors, large-transaction flag, hour/day, balance
+    # sentinels) come from the same `features` module used in training
+    transaction = {
         "step": step,
         "type": type_,
         "amount": amount,
@@ -121,14 +136,9 @@ if submitted:
         "newbalanceOrig": newbalanceOrig,
         "oldbalanceDest": oldbalanceDest,
         "newbalanceDest": newbalanceDest,
-        "errorBalanceOrig": errorBalanceOrig,
-        "errorBalanceDest": errorBalanceDest,
-        "is_large_transaction": is_large_transaction,
-        "hour": hour,
-        "day": day
-    }])
-
-    prediction, fraud_proba = predict(model, input_df)
+    }
+
+    prediction, fraud_proba = predict(model, transaction)
 
     st.markdown("### 🧠 Prediction Result")
     is_fraud = prediction[0] == 1 if hasattr(prediction, '__getitem__') else prediction > 0.5
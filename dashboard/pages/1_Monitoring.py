@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from monitoring.live import LiveMonitor
+
+
+# One incremental monitor per server process: every session's refresh only
+# reads production rows and incidents that arrived since the previous one
+@st.cache_resource
+def get_monitor() -> LiveMonitor:
+    return LiveMonitor()
+
+
+st.set_page_config(page_title="BreeBoost Monitoring", layout="wide")
+st.title("📡 Production Monitoring")
+st.markdown("""
+Scored records from `monitoring/production.csv` and incidents from the incident store, refreshed in place.
+Each refresh reads only what was appended since the last one.
+""")
+
+with st.sidebar:
+    refresh_seconds = st.number_input("Refresh every (seconds)", min_value=1, max_value=600, value=10)
+    paused = st.toggle("Pause auto-refresh", value=False)
+    history = st.slider("Score distribution over last N minutes", min_value=1, max_value=120, value=15)
+
+
+@st.fragment(run_every=None if paused else refresh_seconds)
+def live_view():
+    monitor = get_monitor()
+    added = monitor.refresh()
+    rates = monitor.fraud_rate()
+    drift = monitor.feature_drift()
+    incidents = monitor.incidents()
+
+    # ---------------- Headline Metrics ---------------- #
+    last = rates.iloc[-1] if len(rates) else pd.Series({"rows": 0, "fraud_rate": 0.0, "mean_proba": 0.0})
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Rows since start", f"{monitor.rows:,}", delta=f"+{added['rows']:,}" if added["rows"] else None)
+    c2.metric("Fraud rate (last minute)", f"{last['fraud_rate']:.2%}")
+    c3.metric("Drifted features", f"{len(drift['drifted_features'])}/{len(drift['features'])}")
+    c4.metric("Open incidents", f"{len(incidents)}", delta=f"+{added['incidents']}" if added["incidents"] else None,
+              delta_color="inverse")
+
+    # ---------------- Rolling Fraud Rate ---------------- #
+    left, right = st.columns(2)
+    with left:
+        st.subheader("📈 Rolling fraud rate")
+        if len(rates):
+            st.line_chart(rates[["fraud_rate", "mean_proba"]])
+        else:
+            st.info("No production rows yet.")
+    with right:
+        st.subheader("🎯 Score distribution")
+        st.bar_chart(monitor.score_histogram(last_buckets=history))
+
+    # ---------------- Per-feature Drift ---------------- #
+    st.subheader("🌊 Feature drift (current window vs reference)")
+    scores = pd.DataFrame(drift["features"]).T.sort_values("psi", ascending=False)
+    scores["drifted"] = scores.index.isin(drift["drifted_features"])
+    st.dataframe(scores, use_container_width=True)
+    st.caption(f"{drift['rows']:,} rows since {drift['window_start']}; drift score {drift['drift_score']:.2f}")
+
+    # ---------------- Open Incidents ---------------- #
+    st.subheader("🧯 Open incidents")
+    if len(incidents):
+        st.dataframe(incidents, use_container_width=True, hide_index=True)
+    else:
+        st.success("No open incidents.")
+
+
+live_view()
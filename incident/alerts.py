@@ -0,0 +1,162 @@
+"""
+Alert aggregation between detection and incident/logger.write_incident.
+
+Detectors call `AlertAggregator.fire` every time a threshold is crossed.
+Alerts are fingerprinted by type and feature set; the first firing opens an
+incident, and repeats within `window_seconds` of the previous firing are
+rolled into it (count, first/last seen, peak metric) instead of logging a
+new one. A sustained drift therefore stays a single open incident until it
+has been quiet for a full window.
+
+Severity comes from incident.severity.decide_severity on each event; when a
+repeat maps to a more severe level (the metric worsened) the incident is
+escalated in place. New and escalated incidents are written immediately;
+plain repeats only touch in-memory counters, which are flushed to the store
+in one transaction every `flush_interval` seconds and on `close()`.
+
+Open incidents from the last window are reloaded from the store on start,
+so short-lived callers (e.g. one `alert_manager` run per cron tick) still
+deduplicate against earlier runs.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from incident.logger import write_incident
+from incident.severity import decide_severity
+from incident.store import DB_PATH, IncidentStore, get_store
+
+DEFAULT_WINDOW_SECONDS = 3600.0
+METRICS = ("drift_score", "missing_pct")
+
+
+def fingerprint(incident_type: str, features: Iterable[str] = ()) -> str:
+    key = incident_type + "\x1f" + "\x1f".join(sorted(features))
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _rank(severity: str) -> int:
+    # P1 is the most severe; unknown labels rank below P4
+    return int(severity[1:]) if severity[:1] == "P" and severity[1:].isdigit() else 99
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class _OpenAlert:
+    __slots__ = ("incident_id", "severity", "details", "last_seen", "dirty")
+
+    def __init__(self, incident_id: int, severity: str, details: Dict[str, Any], last_seen: float):
+        self.incident_id = incident_id
+        self.severity = severity
+        self.details = details
+        self.last_seen = last_seen
+        self.dirty = False
+
+
+class AlertAggregator:
+    def __init__(self, store: Optional[IncidentStore] = None, window_seconds: float = DEFAULT_WINDOW_SECONDS,
+                 flush_interval: float = 5.0, clock: Callable[[], float] = time.time, resume: bool = True):
+        self.store = store if store is not None else get_store(DB_PATH)
+        self.window_seconds = window_seconds
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.open: Dict[tuple, _OpenAlert] = {}
+        self.stats = {"events": 0, "opened": 0, "suppressed": 0, "escalated": 0}
+        self._last_flush = clock()
+        if resume:
+            self._resume()
+
+    def _resume(self) -> None:
+        # Opened any time ago, but only kept if it fired within the window
+        for incident in self.store.query(status="open"):
+            details = incident["details"]
+            if "fingerprint" not in details or "last_seen" not in details:
+                continue
+            last_seen = datetime.fromisoformat(details["last_seen"].replace("Z", "+00:00")).timestamp()
+            if self.clock() - last_seen <= self.window_seconds:
+                key = (incident["incident_type"], tuple(sorted(details.get("features", []))))
+                self.open[key] = _OpenAlert(incident["id"], incident["severity"], details, last_seen)
+
+    def fire(self, incident_type: str, event: Dict[str, Any], features: Iterable[str] = (),
+             notes: str = "", now: Optional[float] = None, severity: Optional[str] = None) -> str:
+        """
+        Record one raw alert. `event` holds the metric (drift_score or
+        missing_pct) plus any context; `severity` overrides the one derived
+        from it, for alerts that carry no metric. Returns "opened",
+        "suppressed" or "escalated".
+        """
+        now = self.clock() if now is None else now
+        self.stats["events"] += 1
+        key = (incident_type, tuple(sorted(features)))
+        severity = severity or decide_severity(event)
+        alert = self.open.get(key)
+
+        if alert is None or now - alert.last_seen > self.window_seconds:
+            details = {
+                **event,
+                "fingerprint": fingerprint(incident_type, key[1]),
+                "features": list(key[1]),
+                "count": 1,
+                "first_seen": _iso(now),
+                "last_seen": _iso(now),
+                "peak": {m: event[m] for m in METRICS if event.get(m) is not None},
+            }
+            incident_id = write_incident(incident_type, severity, details, notes=notes, store=self.store)
+            self.open[key] = _OpenAlert(incident_id, severity, details, now)
+            self.stats["opened"] += 1
+            self._maybe_flush(now)
+            return "opened"
+
+        details = alert.details
+        details["count"] += 1
+        alert.last_seen = now
+        alert.dirty = True
+        for m in METRICS:
+            value = event.get(m)
+            if value is not None and value > details["peak"].get(m, float("-inf")):
+                details["peak"][m] = value
+
+        if _rank(severity) < _rank(alert.severity):
+            details["last_seen"] = _iso(now)
+            details["escalated_from"] = alert.severity
+            alert.severity, alert.dirty = severity, False
+            self.store.update_many([(alert.incident_id, {"severity": severity, "details": details})])
+            print(f"[INCIDENT ESCALATED] #{alert.incident_id} | {incident_type} | "
+                  f"{details['escalated_from']} -> {severity} (x{details['count']})")
+            self.stats["escalated"] += 1
+            self._maybe_flush(now)
+            return "escalated"
+
+        self.stats["suppressed"] += 1
+        self._maybe_flush(now)
+        return "suppressed"
+
+    def _maybe_flush(self, now: float) -> None:
+        if now - self._last_flush >= self.flush_interval:
+            self.flush(now)
+
+    def flush(self, now: Optional[float] = None) -> int:
+        """Write pending counters of repeated alerts; returns the incidents updated."""
+        self._last_flush = self.clock() if now is None else now
+        updates = []
+        for alert in self.open.values():
+            if alert.dirty:
+                alert.details["last_seen"] = _iso(alert.last_seen)
+                alert.dirty = False
+                updates.append((alert.incident_id, {"details": alert.details}))
+        if updates:
+            self.store.update_many(updates)
+        return len(updates)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "AlertAggregator":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
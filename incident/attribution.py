@@ -0,0 +1,158 @@
+"""
+Prediction attribution for RCA: which features moved fraud_proba.
+
+XGBoost TreeSHAP contributions (`pred_contribs=True`) are additive in
+log-odds: for every row, the bias plus the per-feature contributions sum
+to the margin. So the difference in mean margin between a reference and a
+production window splits exactly into one term per feature:
+
+    mean_margin(prod) - mean_margin(ref) = sum_f mean_contrib_f(prod) - mean_contrib_f(ref)
+
+Features are ranked by the size of their term. A feature that drifted but
+does not move predictions scores ~0, unlike a distribution-shift ranking.
+
+Windows are scored in chunks whose size is derived from a memory budget,
+optionally on a seeded uniform sample. Per window only running sums are
+kept (`ContributionSummary`), and those merge by addition and serialize
+into the reference profile. The reference side can therefore be computed
+once, when the profile is built.
+"""
+
+import hashlib
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MEMORY_MB = 256
+DEFAULT_MAX_ROWS = 200_000
+
+
+class ContributionSummary:
+    """Running sums of per-row contributions (features + bias) over a window."""
+
+    def __init__(self, features: List[str], n: int = 0, total: Optional[np.ndarray] = None,
+                 total_abs: Optional[np.ndarray] = None):
+        self.features = list(features)
+        width = len(self.features) + 1
+        self.n = n
+        self.total = np.zeros(width) if total is None else np.asarray(total, dtype=float)
+        self.total_abs = np.zeros(width) if total_abs is None else np.asarray(total_abs, dtype=float)
+
+    def add(self, contribs: np.ndarray) -> "ContributionSummary":
+        self.n += len(contribs)
+        self.total += contribs.sum(axis=0, dtype=np.float64)
+        self.total_abs += np.abs(contribs).sum(axis=0, dtype=np.float64)
+        return self
+
+    def merge(self, other: "ContributionSummary") -> "ContributionSummary":
+        if other.features != self.features:
+            raise ValueError("Contribution summaries cover different features")
+        self.n += other.n
+        self.total += other.total
+        self.total_abs += other.total_abs
+        return self
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.total / max(self.n, 1)
+
+    @property
+    def mean_abs(self) -> np.ndarray:
+        return self.total_abs / max(self.n, 1)
+
+    def to_dict(self, **metadata) -> dict:
+        return {"features": self.features, "n": self.n, "total": self.total.tolist(),
+                "total_abs": self.total_abs.tolist(), **metadata}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ContributionSummary":
+        return cls(d["features"], d["n"], d["total"], d["total_abs"])
+
+
+def as_booster(model):
+    """The xgboost Booster behind a HotModel / XGBClassifier / Booster."""
+    model = getattr(model, "model", model)  # registry.HotModel
+    if hasattr(model, "get_booster"):
+        return model.get_booster()
+    if hasattr(model, "predict") and hasattr(model, "save_raw"):
+        return model
+    raise TypeError(f"Attribution needs an xgboost model, got {type(model).__name__}")
+
+
+def model_version(model) -> str:
+    """Content hash of the booster, the same id the model registry gives a version."""
+    return hashlib.sha256(bytes(as_booster(model).save_raw("ubj"))).hexdigest()[:16]
+
+
+def chunk_rows_for(n_features: int, memory_mb: float = DEFAULT_MEMORY_MB) -> int:
+    # Per row: the float32 input copy inside the DMatrix plus the (features + 1) float32
+    # contributions, with 2x headroom for xgboost's working buffers
+    per_row = (2 * n_features + 1) * 4 * 2
+    return max(1_000, int(memory_mb * 2**20 // per_row))
+
+
+def summarize_contributions(model, X, features: Optional[List[str]] = None, memory_mb: float = DEFAULT_MEMORY_MB,
+                            max_rows: Optional[int] = DEFAULT_MAX_ROWS, seed: int = 0,
+                            approx: bool = False) -> ContributionSummary:
+    """
+    Contribution sums for the rows of `X` (a DataFrame with the model's
+    feature columns, or a matrix in model order), scored in memory-bounded
+    chunks. Windows larger than `max_rows` are uniformly sampled.
+
+    Exact TreeSHAP costs roughly 70us per row per core for the 100-tree
+    model. `approx=True` uses xgboost's path-based (Saabas) contributions
+    instead: about 15x faster and still additive, but less faithful when
+    features interact.
+    """
+    import xgboost as xgb
+
+    booster = as_booster(model)
+    features = features or booster.feature_names
+    if isinstance(X, pd.DataFrame):
+        features = features or list(X.columns)
+        X = X[features]
+    elif features is None:
+        features = [f"f{i}" for i in range(X.shape[1])]
+
+    rows = np.arange(len(X))
+    if max_rows is not None and len(X) > max_rows:
+        rows = np.sort(np.random.default_rng(seed).choice(len(X), max_rows, replace=False))
+
+    # Only one chunk is ever converted to float32 and scored at a time
+    summary = ContributionSummary(features)
+    step = chunk_rows_for(len(features), memory_mb)
+    for start in range(0, len(rows), step):
+        idx = rows[start:start + step]
+        chunk = X.iloc[idx] if isinstance(X, pd.DataFrame) else X[idx]
+        dm = xgb.DMatrix(np.asarray(chunk, dtype=np.float32), feature_names=list(features))
+        summary.add(booster.predict(dm, pred_contribs=True, approx_contribs=approx, validate_features=False))
+    return summary
+
+
+def contribution_shift(reference: ContributionSummary, production: ContributionSummary) -> pd.DataFrame:
+    """
+    Per-feature change in mean contribution (log-odds), largest impact first.
+    `share` is each feature's part of the total absolute shift.
+    """
+    if reference.features != production.features:
+        raise ValueError("Reference and production summaries cover different features")
+    ref, prod = reference.mean[:-1], production.mean[:-1]
+    shift = prod - ref
+    total = np.abs(shift).sum()
+    out = pd.DataFrame({
+        "shift": shift,
+        "abs_shift": np.abs(shift),
+        "share": np.abs(shift) / total if total > 0 else 0.0,
+        "ref_mean": ref,
+        "prod_mean": prod,
+        "ref_mean_abs": reference.mean_abs[:-1],
+        "prod_mean_abs": production.mean_abs[:-1],
+    }, index=pd.Index(reference.features, name="feature"))
+    return out.sort_values("abs_shift", ascending=False, kind="stable")
+
+
+def margin_shift(reference: ContributionSummary, production: ContributionSummary) -> Dict[str, float]:
+    """Mean margin (log-odds) of each window; their difference is the sum of `shift`."""
+    ref, prod = float(reference.mean.sum()), float(production.mean.sum())
+    return {"ref_mean_margin": ref, "prod_mean_margin": prod, "margin_shift": prod - ref}
@@ -0,0 +1,318 @@
+"""
+Vectorized drift engine.
+Provides:
+ - DriftEngine(reference_df): sorts every numeric reference column once and
+   caches it together with its ECDF points and quantile bins
+ - DriftEngine.compare(production_df): KS, PSI and Jensen-Shannon for all
+   columns; per-column work (sort + searchsorted) runs in a thread pool and
+   PSI/JS are computed for all columns at once on the stacked bin frequencies
+ - build_profile / save_profile / load_profile: compact, versioned reference
+   profile (quantiles, fixed-edge histograms, category frequencies, null
+   rates) and DriftEngine.from_profile to score against it without the rows
+ - engine_for(path): engine for a reference CSV or profile JSON, cached until
+   the file changes
+
+KS matches scipy.stats.ks_2samp's statistic exactly (ties included); non-numeric columns get
+the total variation distance between category frequencies instead.
+
+Dependencies: pandas, numpy
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BINS = 10
+DEFAULT_QUANTILES = 201  # 0.5% resolution for profile-based KS
+PSI_THRESHOLD = 0.2  # a feature counts as drifted above this PSI
+MAX_CATEGORIES = 32  # numeric columns with at most this many values also get category frequencies
+PROFILE_VERSION = 1
+EPS = 1e-6  # floor for empty bins in PSI/JS
+METRICS = ("ks", "psi", "js")
+
+
+def ecdf_points(sorted_values: np.ndarray) -> tuple:
+    """Distinct values of a sorted sample and its ECDF at each of them."""
+    last = np.append(sorted_values[1:] != sorted_values[:-1], True)
+    return sorted_values[last], (np.flatnonzero(last) + 1) / len(sorted_values)
+
+
+def ks_statistic(ref_sorted: np.ndarray, prod_sorted: np.ndarray, ref_points: Optional[tuple] = None) -> float:
+    """Two-sample KS statistic of two sorted, NaN-free samples."""
+    if len(ref_sorted) < 2 or len(prod_sorted) < 2:
+        return 0.0
+    return ks_from_points(ref_points if ref_points is not None else ecdf_points(ref_sorted), prod_sorted)
+
+
+def ks_from_points(ref_points: tuple, prod_sorted: np.ndarray) -> float:
+    """
+    KS statistic against a reference ECDF given as (distinct values u_k, F(u_k)).
+
+    The reference ECDF is constant between the u_k, so the production ECDF
+    only has to be read just at and just before each u_k: two binary
+    searches of the (cached) reference points into production, instead of
+    evaluating both ECDFs on the pooled sample.
+    """
+    if len(prod_sorted) == 0:
+        return 0.0
+    u, cdf_ref = ref_points
+    n = len(prod_sorted)
+    at = np.searchsorted(prod_sorted, u, side="right") / n
+    before = np.searchsorted(prod_sorted, u, side="left") / n
+    prev_ref = np.concatenate([[0.0], cdf_ref[:-1]])
+    return float(max(np.max(cdf_ref - at), np.max(before - prev_ref)))
+
+
+def bin_frequencies(sorted_values: np.ndarray, edges: np.ndarray, n_bins: int) -> np.ndarray:
+    """Share of a sorted sample in each bin (right-closed inner edges), zero-padded to `n_bins`."""
+    out = np.zeros(n_bins)
+    if len(sorted_values) == 0:
+        return out
+    cuts = np.searchsorted(sorted_values, edges, side="right")
+    counts = np.diff(np.concatenate([[0], cuts, [len(sorted_values)]]))
+    out[:len(counts)] = counts / len(sorted_values)
+    return out
+
+
+def psi(ref_freq: np.ndarray, prod_freq: np.ndarray) -> np.ndarray:
+    """Population stability index along the last axis."""
+    p = np.clip(prod_freq, EPS, None)
+    q = np.clip(ref_freq, EPS, None)
+    return np.sum((p - q) * np.log(p / q), axis=-1)
+
+
+def js_divergence(ref_freq: np.ndarray, prod_freq: np.ndarray) -> np.ndarray:
+    """Jensen-Shannon divergence (base 2, in [0, 1]) along the last axis."""
+    p = np.clip(prod_freq, EPS, None)
+    q = np.clip(ref_freq, EPS, None)
+    p = p / p.sum(axis=-1, keepdims=True)
+    q = q / q.sum(axis=-1, keepdims=True)
+    m = 0.5 * (p + q)
+    return 0.5 * np.sum(p * np.log2(p / m), axis=-1) + 0.5 * np.sum(q * np.log2(q / m), axis=-1)
+
+
+def _as_float(series: pd.Series) -> Optional[np.ndarray]:
+    try:
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+    except (TypeError, ValueError):
+        return None
+    return values[~np.isnan(values)]
+
+
+def _categorical_scores(ref_freq: pd.Series, prod: pd.Series) -> tuple:
+    # Total variation distance stands in for KS on categories
+    prod_freq = prod.fillna("##MISSING##").value_counts(normalize=True)
+    ref_freq, prod_freq = ref_freq.align(prod_freq, fill_value=0.0)
+    q, p = ref_freq.to_numpy(), prod_freq.to_numpy()
+    return float(np.abs(q - p).sum() / 2.0), float(psi(q, p)), float(js_divergence(q, p))
+
+
+def category_frequencies(series: pd.Series) -> pd.Series:
+    return series.fillna("##MISSING##").value_counts(normalize=True)
+
+
+class DriftEngine:
+    def __init__(self, reference: Optional[pd.DataFrame] = None, bins: int = DEFAULT_BINS,
+                 max_workers: Optional[int] = None, exclude: tuple = ("label",)):
+        self.bins = bins
+        self.max_workers = max_workers or min(32, os.cpu_count() or 1)
+        self.numeric: List[str] = []
+        self.sorted: Dict[str, np.ndarray] = {}  # exact reference; only when built from raw rows
+        self.points: Dict[str, tuple] = {}
+        self.edges: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, pd.Series] = {}
+        self.ref_freq = np.empty((0, bins))
+        self._row: Dict[str, int] = {}
+        if reference is not None:
+            self._fit(reference, [c for c in reference.columns if c not in exclude])
+
+    def _fit(self, reference: pd.DataFrame, columns: List[str]) -> None:
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            for col, values in zip(columns, pool.map(lambda c: _as_float(reference[c]), columns)):
+                if values is None:
+                    self.categories[col] = category_frequencies(reference[col])
+                    continue
+                values.sort()
+                self.sorted[col] = values
+                if len(values):
+                    self.points[col] = ecdf_points(values)
+                    inner = np.quantile(values, np.linspace(0, 1, self.bins + 1)[1:-1])
+                    self.edges[col] = np.unique(inner)
+                else:
+                    self.edges[col] = np.empty(0)
+        self._set_numeric(list(self.sorted), [
+            bin_frequencies(self.sorted[c], self.edges[c], self.bins) for c in self.sorted])
+
+    def _set_numeric(self, names: List[str], freqs: List[np.ndarray]) -> None:
+        self.numeric = names
+        self.ref_freq = np.vstack(freqs) if names else np.empty((0, self.bins))
+        self._row = {c: i for i, c in enumerate(names)}
+
+    @property
+    def columns(self) -> List[str]:
+        return self.numeric + list(self.categories)
+
+    # ---------------- reference profile ---------------- #
+    def to_profile(self, n_quantiles: int = DEFAULT_QUANTILES) -> Dict[str, dict]:
+        """Per-feature reference statistics, JSON-serializable (see `build_profile`)."""
+        levels = np.linspace(0, 1, n_quantiles)
+        features = {}
+        for col in self.numeric:
+            values = self.sorted[col]
+            entry = {"kind": "numeric", "count": int(len(values))}
+            if len(values):
+                entry.update(
+                    mean=float(values.mean()), std=float(values.std()),
+                    min=float(values[0]), max=float(values[-1]),
+                    quantiles=np.quantile(values, levels).tolist(),
+                    edges=self.edges[col].tolist(),
+                    frequencies=self.ref_freq[self._row[col]].tolist(),
+                )
+                distinct = self.points[col][0]
+                if len(distinct) <= MAX_CATEGORIES:
+                    freq = np.diff(np.concatenate([[0.0], self.points[col][1]]))
+                    entry["categories"] = {_key(v): float(f) for v, f in zip(distinct, freq)}
+            features[col] = entry
+        for col, freq in self.categories.items():
+            features[col] = {"kind": "categorical", "categories": {str(k): float(v) for k, v in freq.items()}}
+        return features
+
+    @classmethod
+    def from_profile(cls, profile: dict, max_workers: Optional[int] = None) -> "DriftEngine":
+        """
+        Engine backed by a saved profile instead of raw rows. PSI/JS use the
+        stored bins exactly; KS uses the stored quantiles as the reference
+        ECDF, so it is accurate to about 1 / len(quantiles).
+        """
+        engine = cls(bins=profile["bins"], max_workers=max_workers)
+        levels = np.asarray(profile["quantile_levels"])
+        names, freqs = [], []
+        for col, entry in profile["features"].items():
+            if entry["kind"] == "categorical":
+                engine.categories[col] = pd.Series(entry["categories"], dtype=float)
+                continue
+            names.append(col)
+            if "quantiles" not in entry:
+                engine.edges[col] = np.empty(0)
+                freqs.append(np.zeros(engine.bins))
+                continue
+            q = np.asarray(entry["quantiles"])
+            last = np.append(q[1:] != q[:-1], True)
+            engine.points[col] = (q[last], levels[last])
+            engine.edges[col] = np.asarray(entry["edges"])
+            freqs.append(np.asarray(entry["frequencies"]))
+        engine._set_numeric(names, freqs)
+        return engine
+
+    # ---------------- comparison ---------------- #
+    def _score_numeric(self, prod: pd.DataFrame, col: str):
+        values = _as_float(prod[col])
+        if values is None or col not in self.points:
+            return col, 0.0, np.zeros(self.bins)
+        values.sort()
+        if col in self.sorted:
+            ks = ks_statistic(self.sorted[col], values, self.points[col])
+        else:
+            ks = ks_from_points(self.points[col], values) if len(values) >= 2 else 0.0
+        return col, ks, bin_frequencies(values, self.edges[col], self.bins)
+
+    def compare(self, production: pd.DataFrame) -> pd.DataFrame:
+        """Per-column ks/psi/js (index: feature), for columns present in both frames."""
+        numeric = [c for c in self.numeric if c in production.columns]
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            results = list(pool.map(lambda c: self._score_numeric(production, c), numeric))
+
+        frames = []
+        if results:
+            names = [r[0] for r in results]
+            ref_freq = self.ref_freq[[self._row[c] for c in names]]
+            prod_freq = np.vstack([r[2] for r in results])
+            # Columns with no values on either side have nothing to compare
+            empty = (prod_freq.sum(axis=1) == 0) | (ref_freq.sum(axis=1) == 0)
+            frames.append(pd.DataFrame({
+                "ks": [r[1] for r in results],
+                "psi": np.where(empty, 0.0, psi(ref_freq, prod_freq)),
+                "js": np.where(empty, 0.0, js_divergence(ref_freq, prod_freq)),
+            }, index=names))
+
+        categorical = [c for c in self.categories if c in production.columns]
+        if categorical:
+            scores = [_categorical_scores(self.categories[c], production[c]) for c in categorical]
+            frames.append(pd.DataFrame(scores, columns=list(METRICS), index=categorical))
+
+        out = pd.concat(frames) if frames else pd.DataFrame(columns=list(METRICS), dtype=float)
+        out.index.name = "feature"
+        return out
+
+    def drift_score(self, production: pd.DataFrame, metric: str = "psi", threshold: float = PSI_THRESHOLD) -> float:
+        """Share of compared features whose `metric` exceeds `threshold`."""
+        scores = self.compare(production)[metric]
+        return float((scores > threshold).mean()) if len(scores) else 0.0
+
+    def top_n(self, production: pd.DataFrame, n: int = 10, metric: str = "ks") -> List[tuple]:
+        scores = self.compare(production)[metric].sort_values(ascending=False, kind="stable")
+        return [(f, float(s)) for f, s in scores.head(n).items()]
+
+
+def _key(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def build_profile(reference: pd.DataFrame, bins: int = 20, n_quantiles: int = DEFAULT_QUANTILES,
+                  exclude: tuple = ("label",), **metadata) -> dict:
+    """
+    Compact, versioned reference profile: per-feature quantiles, fixed bin
+    edges with reference frequencies, category frequencies and null rates.
+    `metadata` (source, sampling, model version, ...) is stored alongside.
+    """
+    engine = DriftEngine(reference, bins=bins, exclude=exclude)
+    features = engine.to_profile(n_quantiles)
+    for col, entry in features.items():
+        entry["null_rate"] = float(reference[col].isna().mean()) if len(reference) else 0.0
+    body = {
+        "profile_version": PROFILE_VERSION,
+        "rows": int(len(reference)),
+        "bins": bins,
+        "quantile_levels": np.linspace(0, 1, n_quantiles).tolist(),
+        "features": features,
+        **metadata,
+    }
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return {"profile_id": digest, "created_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+            **body}
+
+
+def save_profile(profile: dict, path: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profile, f, default=str)
+    os.replace(tmp, path)
+    return path
+
+
+def load_profile(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    if profile.get("profile_version") != PROFILE_VERSION:
+        raise ValueError(f"Unsupported reference profile version {profile.get('profile_version')} in {path}")
+    return profile
+
+
+@lru_cache(maxsize=8)
+def _cached_engine(path: str, mtime_ns: int, bins: int) -> DriftEngine:
+    if path.endswith(".json"):
+        return DriftEngine.from_profile(load_profile(path))
+    return DriftEngine(pd.read_csv(path), bins=bins)
+
+
+def engine_for(path: str, bins: int = DEFAULT_BINS) -> DriftEngine:
+    """Engine for a reference CSV or profile JSON; reused until the file is modified."""
+    return _cached_engine(str(path), os.stat(path).st_mtime_ns, bins)
@@ -1,49 +1,47 @@
 """
-Simple incident logger: append JSON lines to incident/incident_log.jsonl
-"""
+Simple incident logger on top of the incident store (incident/incidents.db).
 
-import json
-import os
-from datetime import datetime
-from typing import Dict, Any
+The old JSON-lines log (incident/incident_log.jsonl) is read-only history;
+import it with `python incident/store.py migrate`.
+"""
 
-LOG_PATH = os.path.join("incident", "incident_log.jsonl")
-os.makedirs("incident", exist_ok=True)
+import sys
+from pathlib import Path
+from typing import Dict, Any, Optional
 
+from incident.store import DB_PATH, IncidentStore, get_store, utc_now_iso
 
-def _utc_now_iso() -> str:
-    return datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from utils.instrument import span
 
 
-def write_incident(incident_type: str, severity: str, details: Dict[str, Any], status: str = "open", notes: str = "") -> None:
+@span("write_incident")
+def write_incident(incident_type: str, severity: str, details: Dict[str, Any], status: str = "open", notes: str = "",
+                   store: Optional[IncidentStore] = None) -> int:
     """
-    Append an incident as a JSON line.
+    Store an incident and return its id.
 
     incident_type: short name (e.g., "Data Drift", "Missing Feature")
     severity: one of P1,P2,P3,P4
     details: arbitrary dict with metrics (drift_score, features, etc.)
     status: open | resolved | mitigated
     notes: free text
+    store: defaults to incident/incidents.db
     """
     entry = {
-        "timestamp": _utc_now_iso(),
+        "timestamp": utc_now_iso(),
         "incident_type": incident_type,
         "severity": severity,
         "details": details,
         "status": status,
         "notes": notes,
     }
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry) + "\n")
+    incident_id = (store if store is not None else get_store(DB_PATH)).append(entry)
     # Also print to console for the on-call/CI visibility
     print(f"[INCIDENT LOGGED] {entry['timestamp']} | {incident_type} | {severity}")
+    return incident_id
 
 
 def read_incidents(limit: int = 100):
     """Read last `limit` incidents (most recent last)."""
-    if not os.path.exists(LOG_PATH):
-        return []
-    with open(LOG_PATH, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    lines = [json.loads(l.strip()) for l in lines if l.strip()]
-    return lines[-limit:]
+    return get_store(DB_PATH).tail(limit)
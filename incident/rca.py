@@ -3,23 +3,38 @@ Simple RCA utilities.
 Provides:
  - top_n_drifted_features(reference_df, production_df)
  - basic missing value summary
+ - attribute_predictions: rank features by how much they moved predictions
+   (TreeSHAP contribution shift, see incident/attribution.py)
  - CLI to run common modes
 
-Dependencies: pandas, numpy, scipy (for KS)
+Drift scores come from incident.drift.DriftEngine (KS, PSI or JS). When
+monitoring/reference_profile.json exists (utils/extract_ref.py --profile)
+the reference is taken from it and only production rows are read.
+
+Dependencies: pandas, numpy (xgboost for --mode attribution)
 """
 
 import argparse
 import json
 import os
-from typing import List, Tuple
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from scipy.stats import ks_2samp
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from incident.attribution import (DEFAULT_MAX_ROWS, DEFAULT_MEMORY_MB, ContributionSummary, contribution_shift,
+                                  margin_shift, model_version, summarize_contributions)
+from incident.drift import DriftEngine, category_frequencies, ks_statistic, load_profile, _categorical_scores
+from utils.instrument import span
 
 # default paths (relative)
 REF_PATH = os.path.join("monitoring", "reference.csv")
 PROD_PATH = os.path.join("monitoring", "production.csv")
+PROFILE_PATH = os.path.join("monitoring", "reference_profile.json")
 REPORTS_DIR = os.path.join("monitoring", "reports")
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
@@ -31,38 +46,25 @@ def load_data(ref_path=REF_PATH, prod_path=PROD_PATH) -> Tuple[pd.DataFrame, pd.
 
 
 def compute_ks_per_feature(ref: pd.Series, prod: pd.Series) -> float:
-    # For categorical with many unique values, fallback to PSI style; but here we use KS if numeric
+    # KS for numeric columns; total variation distance for anything that isn't
     try:
-        ref_clean = ref.dropna().astype(float)
-        prod_clean = prod.dropna().astype(float)
-        if len(ref_clean) < 2 or len(prod_clean) < 2:
-            return 0.0
-        stat, pvalue = ks_2samp(ref_clean, prod_clean)
-        # return statistic as a measure of distribution difference (0..1)
-        return float(stat)
-    except Exception:
-        # For non-numeric use a simple proportion difference metric
-        ref_counts = ref.fillna("##MISSING##").value_counts(normalize=True)
-        prod_counts = prod.fillna("##MISSING##").value_counts(normalize=True)
-        all_keys = set(ref_counts.index).union(set(prod_counts.index))
-        diff = sum(abs(ref_counts.get(k, 0.0) - prod_counts.get(k, 0.0)) for k in all_keys) / 2.0
-        return float(diff)
-
-
-def top_n_drifted_features(ref: pd.DataFrame, prod: pd.DataFrame, n: int = 10) -> List[Tuple[str, float]]:
+        ref_clean = np.sort(ref.dropna().to_numpy(dtype=float))
+        prod_clean = np.sort(prod.dropna().to_numpy(dtype=float))
+    except (TypeError, ValueError):
+        return _categorical_scores(category_frequencies(ref), prod)[0]
+    return ks_statistic(ref_clean, prod_clean)
+
+
+@span("top_n_drifted_features")
+def top_n_drifted_features(ref: Optional[pd.DataFrame], prod: pd.DataFrame, n: int = 10, metric: str = "ks",
+                           engine: Optional[DriftEngine] = None) -> List[Tuple[str, float]]:
     """
-    Return top-n features with highest KS/difference score.
+    Return top-n features with highest KS/difference score (or PSI/JS via
+    `metric`). Pass a prebuilt `engine` (e.g. from a reference profile) to
+    skip the reference rows entirely.
     """
-    features = [c for c in ref.columns if c in prod.columns and c != "label"]
-    scores = {}
-    for f in features:
-        try:
-            score = compute_ks_per_feature(ref[f], prod[f])
-            scores[f] = score
-        except Exception:
-            scores[f] = 0.0
-    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-    return ranked[:n]
+    engine = engine or DriftEngine(ref)
+    return engine.top_n(prod, n=n, metric=metric)
 
 
 def missing_value_summary(prod: pd.DataFrame) -> pd.DataFrame:
@@ -70,11 +72,41 @@ def missing_value_summary(prod: pd.DataFrame) -> pd.DataFrame:
     return s.reset_index().rename(columns={"index": "feature", 0: "missing_pct"})
 
 
-def write_simple_report(top_drift, missing_df, out_path=None):
+def attribute_predictions(model, prod: pd.DataFrame, ref: Optional[pd.DataFrame] = None,
+                          reference_summary: Optional[ContributionSummary] = None,
+                          memory_mb: float = DEFAULT_MEMORY_MB, max_rows: Optional[int] = DEFAULT_MAX_ROWS,
+                          seed: int = 0, approx: bool = False) -> Tuple[pd.DataFrame, dict]:
+    """
+    Per-feature shift in mean TreeSHAP contribution between the reference
+    (rows, or a summary precomputed for this model) and production windows,
+    ranked by impact on predictions, plus the overall margin shift.
+    """
+    if reference_summary is None:
+        reference_summary = summarize_contributions(model, ref, memory_mb=memory_mb, max_rows=max_rows, seed=seed,
+                                                    approx=approx)
+    production = summarize_contributions(model, prod, features=reference_summary.features,
+                                         memory_mb=memory_mb, max_rows=max_rows, seed=seed, approx=approx)
+    return contribution_shift(reference_summary, production), {
+        **margin_shift(reference_summary, production), "ref_rows": reference_summary.n, "prod_rows": production.n}
+
+
+def _attribution_records(shift: pd.DataFrame, n: int, drift: Optional[pd.Series] = None) -> List[dict]:
+    records = []
+    for f, row in shift.head(n).iterrows():
+        rec = {"feature": f, **{k: round(float(v), 6) for k, v in row.items() if k != "abs_shift"}}
+        if drift is not None and f in drift.index:
+            rec["drift"] = round(float(drift[f]), 6)
+        records.append(rec)
+    return records
+
+
+def write_simple_report(top_drift, missing_df, out_path=None, attribution=None):
     out = {
         "top_drifted_features": [{"feature": f, "score": float(s)} for f, s in top_drift],
         "missing_summary": missing_df.to_dict(orient="records"),
     }
+    if attribution is not None:
+        out["attribution"] = attribution
     if out_path:
         with open(out_path, "w", encoding="utf-8") as f:
             json.dump(out, f, indent=2)
@@ -85,14 +117,33 @@ def write_simple_report(top_drift, missing_df, out_path=None):
 
 def cli():
     parser = argparse.ArgumentParser(description="Run quick RCA on reference vs production data.")
-    parser.add_argument("--mode", choices=["top_drift", "missing_values", "summary"], default="summary")
+    parser.add_argument("--mode", choices=["top_drift", "missing_values", "summary", "attribution"], default="summary")
     parser.add_argument("--n", type=int, default=10, help="Top-n features for drift")
     parser.add_argument("--out", type=str, default=None, help="Write JSON summary to file")
+    parser.add_argument("--metric", choices=["ks", "psi", "js"], default="ks", help="Drift score to rank by")
+    parser.add_argument("--profile", type=str, default=PROFILE_PATH,
+                        help="Reference profile JSON; falls back to reference.csv when missing")
+    parser.add_argument("--model", type=str, default=None,
+                        help="Model for --mode attribution (default: the registry's current version)")
+    parser.add_argument("--memory-mb", type=float, default=DEFAULT_MEMORY_MB, help="Scoring chunk budget (attribution)")
+    parser.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS, help="Rows sampled per window (attribution)")
+    parser.add_argument("--approx-contribs", action="store_true",
+                        help="Faster path-based contributions instead of exact TreeSHAP (attribution)")
     args = parser.parse_args()
 
-    ref, prod = load_data()
+    prod = pd.read_csv(PROD_PATH)
+    if args.mode == "attribution":
+        run_attribution(args, prod)
+        return
+    if args.mode == "missing_values":
+        ref, engine = None, None
+    elif os.path.exists(args.profile):
+        ref, engine = None, DriftEngine.from_profile(load_profile(args.profile))
+    else:
+        ref = pd.read_csv(REF_PATH)
+        engine = DriftEngine(ref)  # reference sorted once
     if args.mode == "top_drift":
-        top = top_n_drifted_features(ref, prod, n=args.n)
+        top = top_n_drifted_features(ref, prod, n=args.n, metric=args.metric, engine=engine)
         for f, s in top:
             print(f"{f}\t{float(s):.4f}")
         if args.out:
@@ -103,10 +154,41 @@ def cli():
         if args.out:
             write_simple_report([], missing, out_path=args.out)
     else:
-        top = top_n_drifted_features(ref, prod, n=args.n)
+        top = top_n_drifted_features(ref, prod, n=args.n, metric=args.metric, engine=engine)
         missing = missing_value_summary(prod)
         write_simple_report(top, missing, out_path=args.out)
 
 
+def run_attribution(args, prod: pd.DataFrame) -> None:
+    from inference import load_model
+
+    model = load_model(Path(args.model) if args.model else None, watch=False)
+    version = model_version(model)
+    profile = load_profile(args.profile) if os.path.exists(args.profile) else None
+
+    # The reference side comes from the profile when it was summarized with this same model
+    contribs = (profile or {}).get("contributions")
+    if contribs is not None and contribs.get("model_version") == version and not args.approx_contribs:
+        ref, summary, engine = None, ContributionSummary.from_dict(contribs), DriftEngine.from_profile(profile)
+    else:
+        if contribs is not None and contribs.get("model_version") != version:
+            print(f"⚠️ Profile contributions are for model {contribs.get('model_version')}, not {version}; "
+                  f"using {REF_PATH}")
+        ref, summary = pd.read_csv(REF_PATH), None
+        engine = DriftEngine.from_profile(profile) if profile else DriftEngine(ref)
+
+    shift, margin = attribute_predictions(model, prod, ref, summary, args.memory_mb, args.max_rows,
+                                          approx=args.approx_contribs)
+    drift = engine.compare(prod)[args.metric]
+    records = _attribution_records(shift, args.n, drift)
+    print(f"Mean margin {margin['ref_mean_margin']:.4f} -> {margin['prod_mean_margin']:.4f} "
+          f"({margin['margin_shift']:+.4f} log-odds, model {version})")
+    for r in records:
+        print(f"{r['feature']}\tshift={r['shift']:+.4f}\tshare={r['share']:.1%}\t{args.metric}={r.get('drift', 0):.4f}")
+    top = [(f, float(s)) for f, s in drift.sort_values(ascending=False, kind="stable").head(args.n).items()]
+    write_simple_report(top, missing_value_summary(prod), out_path=args.out,
+                        attribution={"model_version": version, **margin, "features": records})
+
+
 if __name__ == "__main__":
     cli()
\ No newline at end of file
@@ -0,0 +1,336 @@
+"""
+Incident store: one SQLite database (WAL mode) for every incident source.
+
+WAL lets any number of processes append while readers keep reading, and the
+busy timeout serializes concurrent writers instead of failing. Incidents are
+indexed by time, severity, type and status, so the dashboard tail is
+`ORDER BY id DESC LIMIT n` and filtered queries never scan the history.
+Batched writes (`append_many`, `batch()`) commit many incidents in one
+transaction.
+
+Timestamps are stored as UTC ISO-8601 strings ("2025-11-22T08:00:00Z"),
+which sort chronologically, so time-range queries use the index.
+
+The older logs (incident/incident_log.jsonl and the alert_manager CSV,
+incidents/log.csv) are imported with `migrate`. Imports are idempotent:
+each migrated row keeps a `source` key and is inserted at most once.
+
+    python incident/store.py migrate
+    python incident/store.py tail --limit 20
+    python incident/store.py query --severity P1 P2 --since 2025-11-01
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+DB_PATH = os.path.join("incident", "incidents.db")
+JSONL_LOG = os.path.join("incident", "incident_log.jsonl")
+CSV_LOG = os.path.join("incidents", "log.csv")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS incidents (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    incident_type TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'open',
+    notes TEXT NOT NULL DEFAULT '',
+    details TEXT NOT NULL DEFAULT '{}',
+    source TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS ix_incidents_time ON incidents (timestamp);
+CREATE INDEX IF NOT EXISTS ix_incidents_severity ON incidents (severity, timestamp);
+CREATE INDEX IF NOT EXISTS ix_incidents_type ON incidents (incident_type, timestamp);
+CREATE INDEX IF NOT EXISTS ix_incidents_status ON incidents (status, timestamp);
+"""
+
+COLUMNS = ("id", "timestamp", "incident_type", "severity", "status", "notes", "details")
+
+
+def utc_now_iso() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def normalize_timestamp(value: Any) -> str:
+    """Any ISO string / datetime -> UTC "YYYY-MM-DDTHH:MM:SSZ" (naive values are local time)."""
+    if value is None:
+        return utc_now_iso()
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class IncidentStore:
+    def __init__(self, path: str = DB_PATH, timeout: float = 30.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    # ---------------- connections ---------------- #
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread and process; a forked child opens its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers wait on busy_timeout
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---------------- writes ---------------- #
+    @staticmethod
+    def _row(incident: Dict[str, Any]) -> tuple:
+        return (
+            normalize_timestamp(incident.get("timestamp")),
+            incident["incident_type"],
+            incident["severity"],
+            incident.get("status") or "open",
+            incident.get("notes") or "",
+            json.dumps(incident.get("details") or {}, default=str),
+            incident.get("source"),
+        )
+
+    def append(self, incident: Dict[str, Any]) -> Optional[int]:
+        """Store one incident; returns its id (None while buffered inside `batch()`)."""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            buffer.append(self._row(incident))
+            return None
+        with self._write() as conn:
+            return conn.execute(
+                "INSERT OR IGNORE INTO incidents (timestamp, incident_type, severity, status, notes, details, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", self._row(incident)
+            ).lastrowid
+
+    def append_many(self, incidents: Iterable[Dict[str, Any]]) -> int:
+        """Store many incidents in one transaction; returns how many were new."""
+        return self._insert([self._row(i) for i in incidents])
+
+    def _insert(self, rows: List[tuple]) -> int:
+        if not rows:
+            return 0
+        with self._write() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO incidents (timestamp, incident_type, severity, status, notes, details, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            return conn.total_changes - before
+
+    @contextmanager
+    def batch(self):
+        """
+        Buffer this thread's `append` calls inside the block and commit them
+        together on a normal exit; if the block raises, they are discarded.
+        """
+        outer = getattr(self._local, "buffer", None) is not None
+        if outer:
+            yield self
+            return
+        self._local.buffer = []
+        try:
+            yield self
+        except BaseException:
+            self._local.buffer = None
+            raise
+        rows, self._local.buffer = self._local.buffer, None
+        self._insert(rows)
+
+    def update_status(self, incident_id: int, status: str, notes: Optional[str] = None) -> bool:
+        with self._write() as conn:
+            if notes is None:
+                cur = conn.execute("UPDATE incidents SET status = ? WHERE id = ?", (status, incident_id))
+            else:
+                cur = conn.execute("UPDATE incidents SET status = ?, notes = ? WHERE id = ?",
+                                   (status, notes, incident_id))
+            return cur.rowcount > 0
+
+    def update_many(self, updates: Iterable[tuple]) -> None:
+        """Apply (incident_id, fields) pairs in one transaction; fields are severity/status/notes/details."""
+        with self._write() as conn:
+            for incident_id, fields in updates:
+                fields = {k: json.dumps(v, default=str) if k == "details" else v for k, v in fields.items()}
+                unknown = set(fields) - {"severity", "status", "notes", "details"}
+                if unknown:
+                    raise ValueError(f"Cannot update incident fields {sorted(unknown)}")
+                conn.execute(f"UPDATE incidents SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                             (*fields.values(), incident_id))
+
+    # ---------------- reads ---------------- #
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+        incident = {k: row[k] for k in COLUMNS}
+        incident["details"] = json.loads(incident["details"])
+        return incident
+
+    def tail(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Last `limit` incidents, most recent last."""
+        rows = self._conn().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM incidents ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._decode(r) for r in reversed(rows)]
+
+    def query(self, since: Any = None, until: Any = None, severity: Optional[Iterable[str]] = None,
+              incident_type: Optional[Iterable[str]] = None, status: Optional[Iterable[str]] = None,
+              after_id: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Incidents in [since, until) matching every given filter, oldest first.
+        Filters take a single value or a list of values; `after_id` returns
+        only incidents stored after that id (for incremental polling).
+        """
+        where, params = [], []
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(normalize_timestamp(since))
+        if until is not None:
+            where.append("timestamp < ?")
+            params.append(normalize_timestamp(until))
+        for column, values in (("severity", severity), ("incident_type", incident_type), ("status", status)):
+            if values is None:
+                continue
+            values = [values] if isinstance(values, str) else list(values)
+            where.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if after_id is not None:
+            where.append("id > ?")
+            params.append(after_id)
+
+        sql = f"SELECT {', '.join(COLUMNS)} FROM incidents"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._decode(r) for r in self._conn().execute(sql, params)]
+
+    def counts(self, by: str = "severity", since: Any = None) -> Dict[str, int]:
+        """Incident counts grouped by severity, incident_type or status."""
+        if by not in ("severity", "incident_type", "status"):
+            raise ValueError(f"Cannot group incidents by {by!r}")
+        sql, params = f"SELECT {by}, COUNT(*) FROM incidents", []
+        if since is not None:
+            sql += " WHERE timestamp >= ?"
+            params.append(normalize_timestamp(since))
+        return dict(self._conn().execute(sql + f" GROUP BY {by}", params).fetchall())
+
+    def last_id(self) -> int:
+        """Id of the newest incident (0 for an empty store), a starting point for `query(after_id=...)`."""
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM incidents").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM incidents").fetchone()[0]
+
+    # ---------------- migration ---------------- #
+    def migrate_jsonl(self, path: str = JSONL_LOG) -> int:
+        """Import incident_log.jsonl (incident/logger's old format); returns rows added."""
+        if not os.path.exists(path):
+            return 0
+        rows = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    key = "jsonl:" + hashlib.sha1(line.encode()).hexdigest()
+                    rows.append(self._row({**json.loads(line), "source": key}))
+        return self._insert(rows)
+
+    def migrate_csv(self, path: str = CSV_LOG) -> int:
+        """Import alert_manager's CSV log (local-time timestamps); returns rows added."""
+        if not os.path.exists(path):
+            return 0
+        rows = []
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                key = "csv:" + hashlib.sha1(json.dumps(record, sort_keys=True).encode()).hexdigest()
+                rows.append(self._row({
+                    "timestamp": record["timestamp"],
+                    "incident_type": record["alert_type"],
+                    "severity": record["severity"],
+                    "status": (record.get("status") or "open").lower(),
+                    "notes": record.get("notes", ""),
+                    "details": {"root_cause": record.get("root_cause", "")},
+                    "source": key,
+                }))
+        return self._insert(rows)
+
+    def migrate(self, jsonl_path: str = JSONL_LOG, csv_path: str = CSV_LOG) -> Dict[str, int]:
+        return {"jsonl": self.migrate_jsonl(jsonl_path), "csv": self.migrate_csv(csv_path)}
+
+
+_STORES: Dict[str, IncidentStore] = {}
+
+
+def get_store(path: str = DB_PATH) -> IncidentStore:
+    """Process-wide store for `path` (schema created once, connections reused)."""
+    store = _STORES.get(path)
+    if store is None:
+        store = _STORES[path] = IncidentStore(path)
+    return store
+
+
+def _print(incidents: List[Dict[str, Any]]) -> None:
+    for i in incidents:
+        print(f"#{i['id']:<6} {i['timestamp']}  {i['severity']:<6} {i['status']:<9} {i['incident_type']}  "
+              f"{json.dumps(i['details'])}" + (f"  ({i['notes']})" if i["notes"] else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incident store.")
+    parser.add_argument("--db", default=DB_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    mig = sub.add_parser("migrate", help="Import the JSONL and CSV incident logs")
+    mig.add_argument("--jsonl", default=JSONL_LOG)
+    mig.add_argument("--csv", default=CSV_LOG)
+    tail = sub.add_parser("tail", help="Most recent incidents")
+    tail.add_argument("--limit", type=int, default=20)
+    query = sub.add_parser("query", help="Filter incidents")
+    query.add_argument("--since")
+    query.add_argument("--until")
+    query.add_argument("--severity", nargs="+")
+    query.add_argument("--type", nargs="+", dest="incident_type")
+    query.add_argument("--status", nargs="+")
+    query.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    store = IncidentStore(args.db)
+    if args.cmd == "migrate":
+        added = store.migrate(args.jsonl, args.csv)
+        print(f"✅ Migrated {added['jsonl']} JSONL and {added['csv']} CSV incidents into {args.db} ({len(store)} total)")
+    elif args.cmd == "tail":
+        _print(store.tail(args.limit))
+    else:
+        _print(store.query(args.since, args.until, args.severity, args.incident_type, args.status, limit=args.limit))
@@ -0,0 +1,136 @@
+"""
+Incremental state behind the dashboard's live monitoring page.
+
+`LiveMonitor.refresh()` reads only what arrived since the previous call:
+new complete lines of production.csv (by byte offset, via CsvTail) and new
+rows of the incident store (by id, starting from the newest at construction).
+It folds them into fixed-size state:
+
+ - per time bucket: rows, predicted frauds, probability sum and a
+   fraud_proba histogram, keeping the last `history_buckets` buckets;
+ - a StreamMonitor for per-feature drift (PSI/JS/KS/null rate) against the
+   reference profile;
+ - the open incidents (an indexed query on status, independent of history).
+
+A refresh therefore costs O(new rows + open incidents), whatever the size
+of the production file or the incident history. One instance is shared by
+every dashboard session (st.cache_resource), so refreshes are serialized
+with a lock.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+from incident.drift import engine_for
+from incident.store import DB_PATH, IncidentStore
+from monitoring.stream import PROD_PATH, PROFILE_PATH, REF_PATH, CsvTail, StreamMonitor, WindowSketch
+
+SCORE_BINS = 50
+
+
+class LiveMonitor:
+    def __init__(self, production_path: Path = PROD_PATH, reference_path: Optional[Path] = None,
+                 store: Optional[IncidentStore] = None, bucket_seconds: float = 60.0, history_buckets: int = 120,
+                 drift_window_seconds: float = 300.0, backfill_bytes: int = 8 << 20,
+                 clock: Callable[[], float] = time.time):
+        if reference_path is None:
+            reference_path = PROFILE_PATH if PROFILE_PATH.exists() else REF_PATH
+        self.clock = clock
+        self.bucket_seconds = bucket_seconds
+        self.history_buckets = history_buckets
+        self.tail = CsvTail(production_path, backfill_bytes=backfill_bytes)
+        self.drift = StreamMonitor.from_engine(engine_for(str(reference_path)), window_seconds=drift_window_seconds,
+                                               sliding_windows=1)
+        self.store = store if store is not None else IncidentStore(BASE_DIR / DB_PATH)
+        self.buckets: "OrderedDict[float, dict]" = OrderedDict()
+        self.score_edges = np.linspace(0.0, 1.0, SCORE_BINS + 1)
+        self.rows = 0
+        self.last_incident_id = self.store.last_id()  # only incidents from now on count as new, like CsvTail's backfill
+        self.new_incidents = 0
+        self.open_incidents: list = []
+        self.refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    # ---------------- ingestion ---------------- #
+    def refresh(self) -> dict:
+        """Consume new production rows and incidents; returns what this refresh added."""
+        with self._lock:
+            now = self.clock()
+            rows = 0
+            batch = self.tail.read()
+            while batch is not None:
+                self._add_scores(batch, now)
+                self.drift.update(batch, now)
+                rows += len(batch)
+                batch = self.tail.read()
+            self.drift.advance(now)
+            self.rows += rows
+
+            new = self.store.query(after_id=self.last_incident_id)
+            if new:
+                self.last_incident_id = max(i["id"] for i in new)
+            self.new_incidents = len(new)
+            self.open_incidents = self.store.query(status="open")
+            self.refreshed_at = now
+            return {"rows": rows, "incidents": len(new)}
+
+    def _add_scores(self, batch: pd.DataFrame, now: float) -> None:
+        key = now - now % self.bucket_seconds
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = {"rows": 0, "frauds": 0, "proba_sum": 0.0,
+                                          "hist": np.zeros(SCORE_BINS, dtype=np.int64)}
+            while len(self.buckets) > self.history_buckets:
+                self.buckets.popitem(last=False)
+        bucket["rows"] += len(batch)
+        if "prediction" in batch.columns:
+            bucket["frauds"] += int((pd.to_numeric(batch["prediction"], errors="coerce") == 1).sum())
+        if "fraud_proba" in batch.columns:
+            proba = pd.to_numeric(batch["fraud_proba"], errors="coerce").dropna().to_numpy(dtype=float)
+            bucket["proba_sum"] += float(proba.sum())
+            bucket["hist"] += np.histogram(np.clip(proba, 0.0, 1.0), bins=self.score_edges)[0]
+
+    # ---------------- views ---------------- #
+    def fraud_rate(self) -> pd.DataFrame:
+        """Per time bucket: rows, predicted fraud rate and mean fraud_proba."""
+        index = pd.to_datetime(list(self.buckets), unit="s", utc=True)
+        rows = np.array([b["rows"] for b in self.buckets.values()], dtype=float)
+        frauds = np.array([b["frauds"] for b in self.buckets.values()], dtype=float)
+        proba = np.array([b["proba_sum"] for b in self.buckets.values()], dtype=float)
+        safe = np.maximum(rows, 1)
+        return pd.DataFrame({"rows": rows, "fraud_rate": frauds / safe, "mean_proba": proba / safe},
+                            index=pd.Index(index, name="time"))
+
+    def score_histogram(self, last_buckets: Optional[int] = None) -> pd.Series:
+        """fraud_proba counts over the last `last_buckets` buckets (all retained ones by default)."""
+        buckets = list(self.buckets.values())[-last_buckets:] if last_buckets else self.buckets.values()
+        counts = sum((b["hist"] for b in buckets), np.zeros(SCORE_BINS, dtype=np.int64))
+        labels = [f"{lo:.2f}" for lo in self.score_edges[:-1]]
+        return pd.Series(counts, index=pd.Index(labels, name="fraud_proba"), name="rows")
+
+    def feature_drift(self) -> dict:
+        """Drift of the current (partial) window merged with the last closed one."""
+        monitor = self.drift
+        sketch = WindowSketch(len(monitor.features), monitor.n_bins, self.refreshed_at or self.clock())
+        for closed in monitor.closed:
+            sketch.merge(closed)
+        if monitor.current is not None:
+            sketch.merge(monitor.current)
+        return monitor.score(sketch)
+
+    def incidents(self) -> pd.DataFrame:
+        columns = ["id", "timestamp", "severity", "incident_type", "status", "notes"]
+        if not self.open_incidents:
+            return pd.DataFrame(columns=columns + ["count"])
+        df = pd.DataFrame(self.open_incidents)
+        df["count"] = [d.get("count", 1) for d in df["details"]]
+        return df[columns + ["count"]].sort_values(["severity", "timestamp"], ascending=[True, False])
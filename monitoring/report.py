@@ -1,29 +1,161 @@
+"""
+Drift report for production vs reference data.
+
+The default (native) report reuses incident.drift: production is scored
+against the reference profile (or reference.csv when there is no profile)
+and summarized as JSON in the schema alert_manager reads
+(metrics.data_drift.drift_score, metrics.data_quality.missing_values), with
+an optional small static HTML table. The full Evidently report only runs on
+demand: with --evidently, or automatically when the drift score crosses
+--evidently-threshold.
+
+    python monitoring/report.py [--html] [--evidently-threshold 0.5]
+"""
+
+import argparse
+import html
+import json
+import sys
 import pandas as pd
-from evidently.report import Report
-from evidently.metric_preset import DataDriftPreset
-from datetime import datetime
+from datetime import datetime, timezone
 import os
 from pathlib import Path
 
 # Define paths relative to this script location or project root
 BASE_DIR = Path(__file__).resolve().parent.parent  # adjust if needed
+sys.path.insert(0, str(BASE_DIR))
+from incident.drift import DriftEngine, PSI_THRESHOLD, load_profile
 
 REF_PATH = BASE_DIR / "monitoring" / "reference.csv"
+PROFILE_PATH = BASE_DIR / "monitoring" / "reference_profile.json"
 PROD_PATH = BASE_DIR / "monitoring" / "production.csv"
 REPORT_DIR = BASE_DIR / "monitoring" / "reports"
+LATEST_REPORT = REPORT_DIR / "latest_report.json"
+
+
+def read_production(path: Path = PROD_PATH) -> pd.DataFrame:
+    try:
+        return pd.read_csv(path, engine="pyarrow")
+    except ImportError:
+        return pd.read_csv(path)
+
+
+def load_engine(profile_path: Path = PROFILE_PATH, ref_path: Path = REF_PATH) -> tuple:
+    """Drift engine plus a description of the reference it was built from."""
+    if os.path.exists(profile_path):
+        profile = load_profile(profile_path)
+        return DriftEngine.from_profile(profile), {"profile_id": profile["profile_id"], "rows": profile["rows"]}
+    ref = pd.read_csv(ref_path)
+    return DriftEngine(ref), {"path": str(ref_path), "rows": len(ref)}
+
+
+def native_report(prod: pd.DataFrame, engine: DriftEngine, reference: dict | None = None,
+                  metric: str = "psi", threshold: float = PSI_THRESHOLD) -> dict:
+    scores = engine.compare(prod)
+    drifted = scores.index[scores[metric] > threshold].tolist()
+    missing = prod.isna().mean()
+    return {
+        "generated_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "reference": reference or {},
+        "production_rows": len(prod),
+        "metrics": {
+            "data_drift": {
+                "drift_score": round(len(drifted) / len(scores), 4) if len(scores) else 0.0,
+                "metric": metric,
+                "threshold": threshold,
+                "n_features": len(scores),
+                "drifted_features": drifted,
+            },
+            "data_quality": {
+                "missing_values": round(float(prod.isna().to_numpy().mean()) if prod.size else 0.0, 6),
+                "missing_by_feature": {f: round(float(v), 6) for f, v in missing.items() if v > 0},
+            },
+        },
+        "features": {
+            f: {**{k: round(float(v), 6) for k, v in row.items()}, "missing": round(float(missing.get(f, 0.0)), 6),
+                "drifted": f in drifted}
+            for f, row in scores.iterrows()
+        },
+    }
+
+
+def render_html(report: dict) -> str:
+    """A small static page: summary line plus one table row per feature."""
+    drift = report["metrics"]["data_drift"]
+    rows = "\n".join(
+        f"<tr class=\"{'drift' if s['drifted'] else ''}\"><td>{html.escape(str(f))}</td>"
+        f"<td>{s['ks']:.4f}</td><td>{s['psi']:.4f}</td><td>{s['js']:.4f}</td><td>{s['missing']:.2%}</td></tr>"
+        for f, s in sorted(report["features"].items(), key=lambda kv: kv[1][drift["metric"]], reverse=True)
+    )
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Drift report {report['generated_at']}</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse}}
+td,th{{padding:4px 10px;border-bottom:1px solid #ddd;text-align:right}}td:first-child{{text-align:left}}
+tr.drift{{background:#fde2e2}}</style></head><body>
+<h2>Data drift: {drift['drift_score']:.0%} of {drift['n_features']} features drifted</h2>
+<p>{report['production_rows']:,} production rows; drifted = {drift['metric'].upper()} &gt; {drift['threshold']};
+missing values {report['metrics']['data_quality']['missing_values']:.2%}. Generated {report['generated_at']}.</p>
+<table><tr><th>feature</th><th>KS</th><th>PSI</th><th>JS</th><th>missing</th></tr>
+{rows}
+</table></body></html>
+"""
+
+
+def evidently_report(prod: pd.DataFrame, ref_path: Path = REF_PATH) -> Path:
+    # Evidently needs the reference rows (a profile is not enough) and is slow to import; only load it when asked for
+    if not os.path.exists(ref_path):
+        raise FileNotFoundError(f"no reference rows at {ref_path}")
+    from evidently.report import Report
+    from evidently.metric_preset import DataDriftPreset
+
+    ref = pd.read_csv(ref_path)
+    report = Report(metrics=[DataDriftPreset()])
+    report.run(reference_data=ref, current_data=prod)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = REPORT_DIR / f"data_drift_{timestamp}.html"
+    report.save_html(str(report_path))
+    return report_path
+
+
+def write_report(report: dict, html_page: bool = False) -> Path:
+    """Write the JSON (timestamped and as latest_report.json) and optionally the HTML page."""
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = REPORT_DIR / f"data_drift_{timestamp}.json"
+    body = json.dumps(report, indent=2)
+    report_path.write_text(body, encoding="utf-8")
+    tmp = LATEST_REPORT.with_name(LATEST_REPORT.name + ".tmp")
+    tmp.write_text(body, encoding="utf-8")
+    os.replace(tmp, LATEST_REPORT)
+    if html_page:
+        report_path.with_suffix(".html").write_text(render_html(report), encoding="utf-8")
+    return report_path
 
-# Load data
-ref = pd.read_csv(REF_PATH)
-prod = pd.read_csv(PROD_PATH)
 
-# Create and run drift report
-report = Report(metrics=[DataDriftPreset()])
-report.run(reference_data=ref, current_data=prod)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drift report for production vs reference data.")
+    parser.add_argument("--profile", type=Path, default=PROFILE_PATH)
+    parser.add_argument("--production", type=Path, default=PROD_PATH)
+    parser.add_argument("--html", action="store_true", help="Also write a small static HTML summary")
+    parser.add_argument("--evidently", action="store_true", help="Always run the full Evidently report")
+    parser.add_argument("--evidently-threshold", type=float, default=None,
+                        help="Run the Evidently report when the drift score exceeds this")
+    args = parser.parse_args()
 
-# Save report
-REPORT_DIR.mkdir(parents=True, exist_ok=True)
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-report_path = REPORT_DIR / f"data_drift_{timestamp}.html"
-report.save_html(str(report_path))
+    # Load data
+    prod = read_production(args.production)
+    engine, reference = load_engine(args.profile)
+    report = native_report(prod, engine, reference)
+    report_path = write_report(report, html_page=args.html)
+    drift_score = report["metrics"]["data_drift"]["drift_score"]
+    print(f"✅ Report generated and saved to: {report_path} (drift_score={drift_score:.2f})")
 
-print(f"✅ Report generated and saved to: {report_path}")
+    threshold = args.evidently_threshold
+    if args.evidently or (threshold is not None and drift_score > threshold):
+        try:
+            print(f"✅ Evidently report saved to: {evidently_report(prod)}")
+        except ImportError:
+            print("⚠️ Evidently is not installed; skipped the full report")
+        except FileNotFoundError as e:
+            print(f"⚠️ Skipped the Evidently report: {e}")
@@ -0,0 +1,273 @@
+"""
+Incremental drift monitor over scored records.
+
+Instead of re-reading reference.csv and production.csv for every report,
+records are consumed as they are produced (tailing production.csv, or any
+caller pushing record batches into `StreamMonitor.update`) and summarized
+per feature into fixed-edge histograms plus null/row counts. Bin edges are
+reference quantiles, fixed once from the reference, so a window's histogram
+is directly comparable to it. This is a fixed-edge histogram, not a
+mergeable quantile sketch (t-digest, KLL): it cannot answer arbitrary
+quantiles of a window, and its resolution is the reference's bins.
+Sketches merge by addition, which makes memory constant:
+
+ - tumbling windows of `window_seconds` are scored as they close;
+ - the sliding window is the sum of the last `sliding_windows` tumbling
+   ones, so it costs one (features x bins) array per retained window.
+
+Per window the monitor reports PSI, Jensen-Shannon, a binned KS (the max
+CDF gap at the bin edges, a lower bound of the exact KS) and the null rate
+per feature, plus the share of features whose PSI crosses `psi_threshold`.
+As in `DriftEngine.compare`, a feature with no values in the window or in
+the reference scores 0 and is left out of that share.
+
+    python monitoring/stream.py --window-seconds 60 --sliding 15
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+from incident.drift import DriftEngine, PSI_THRESHOLD, engine_for, psi, js_divergence
+
+REF_PATH = BASE_DIR / "monitoring" / "reference.csv"
+PROFILE_PATH = BASE_DIR / "monitoring" / "reference_profile.json"
+PROD_PATH = BASE_DIR / "monitoring" / "production.csv"
+OUT_PATH = BASE_DIR / "monitoring" / "reports" / "stream_drift.jsonl"
+
+DEFAULT_BINS = 20
+
+
+class WindowSketch:
+    """Histogram counts (features x bins) and null counts for one window."""
+
+    def __init__(self, n_features: int, n_bins: int, start: float):
+        self.counts = np.zeros((n_features, n_bins), dtype=np.int64)
+        self.nulls = np.zeros(n_features, dtype=np.int64)
+        self.rows = 0
+        self.start = start
+        self.end = start
+
+    def merge(self, other: "WindowSketch") -> "WindowSketch":
+        self.counts += other.counts
+        self.nulls += other.nulls
+        self.rows += other.rows
+        self.start = min(self.start, other.start)
+        self.end = max(self.end, other.end)
+        return self
+
+
+class StreamMonitor:
+    def __init__(self, features: list, edges: list, ref_freq: np.ndarray, window_seconds: float = 60.0,
+                 sliding_windows: int = 15, psi_threshold: float = PSI_THRESHOLD,
+                 clock: Callable[[], float] = time.time, on_window: Optional[Callable[[dict], None]] = None):
+        self.features = list(features)
+        self.edges = edges
+        self.ref_freq = ref_freq
+        self.ref_cdf = np.cumsum(ref_freq, axis=1)
+        self.ref_has_data = ref_freq.sum(axis=1) > 0
+        self.n_bins = ref_freq.shape[1]
+        self.window_seconds = window_seconds
+        self.psi_threshold = psi_threshold
+        self.clock = clock
+        self.on_window = on_window
+        self.closed = deque(maxlen=sliding_windows)
+        self.current = None
+
+    @classmethod
+    def from_reference(cls, reference: pd.DataFrame, bins: int = DEFAULT_BINS, **kwargs) -> "StreamMonitor":
+        return cls.from_engine(DriftEngine(reference, bins=bins), **kwargs)
+
+    @classmethod
+    def from_engine(cls, engine: DriftEngine, **kwargs) -> "StreamMonitor":
+        features = engine.numeric
+        return cls(features, [engine.edges[f] for f in features], engine.ref_freq, **kwargs)
+
+    # ---------------- ingestion ---------------- #
+    def update(self, batch: pd.DataFrame, now: Optional[float] = None) -> list:
+        """Add a record batch; returns the reports of any windows this closed."""
+        now = self.clock() if now is None else now
+        reports = self.advance(now)
+        if self.current is None:
+            self.current = WindowSketch(len(self.features), self.n_bins, now)
+        sketch = self.current
+        for i, f in enumerate(self.features):
+            if f not in batch.columns:
+                continue
+            values = pd.to_numeric(batch[f], errors="coerce").to_numpy(dtype=float)
+            missing = np.isnan(values)
+            sketch.nulls[i] += int(missing.sum())
+            # Bin k holds (edge[k-1], edge[k]], the same convention as the reference frequencies
+            idx = np.searchsorted(self.edges[i], values[~missing], side="left")
+            sketch.counts[i] += np.bincount(idx, minlength=self.n_bins)
+        sketch.rows += len(batch)
+        sketch.end = now
+        return reports
+
+    def advance(self, now: Optional[float] = None) -> list:
+        """Close the current window if its time is up (call periodically when idle)."""
+        now = self.clock() if now is None else now
+        if self.current is None or now - self.current.start < self.window_seconds:
+            return []
+        return [self.close()]
+
+    def close(self) -> Optional[dict]:
+        """Close the current window now and emit its report."""
+        if self.current is None:
+            return None
+        closed, self.current = self.current, None
+        self.closed.append(closed)
+        sliding = WindowSketch(len(self.features), self.n_bins, closed.start)
+        for sketch in self.closed:
+            sliding.merge(sketch)
+
+        report = {"tumbling": self.score(closed), "sliding": {**self.score(sliding), "windows": len(self.closed)}}
+        if self.on_window is not None:
+            self.on_window(report)
+        return report
+
+    # ---------------- scoring ---------------- #
+    def score(self, sketch: WindowSketch) -> dict:
+        totals = sketch.counts.sum(axis=1)
+        # Columns with no values on either side have nothing to compare
+        has_data = (totals > 0) & self.ref_has_data
+        freq = sketch.counts / np.maximum(totals, 1)[:, None]
+
+        psi_scores = np.where(has_data, psi(self.ref_freq, freq), 0.0)
+        js_scores = np.where(has_data, js_divergence(self.ref_freq, freq), 0.0)
+        ks_scores = np.where(has_data, np.abs(np.cumsum(freq, axis=1) - self.ref_cdf).max(axis=1), 0.0)
+        null_rate = sketch.nulls / max(sketch.rows, 1)
+
+        drifted = [f for f, s, ok in zip(self.features, psi_scores, has_data) if ok and s > self.psi_threshold]
+        scored = int(has_data.sum())
+        return {
+            "window_start": _iso(sketch.start),
+            "window_end": _iso(sketch.end),
+            "rows": int(sketch.rows),
+            "drift_score": round(len(drifted) / scored, 4) if scored else 0.0,
+            "drifted_features": drifted,
+            "features": {
+                f: {"ks": round(float(k), 4), "psi": round(float(p), 4), "js": round(float(j), 4),
+                    "null_rate": round(float(n), 4)}
+                for f, k, p, j, n in zip(self.features, ks_scores, psi_scores, js_scores, null_rate)
+            },
+        }
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(microsecond=0).isoformat()
+
+
+class CsvTail:
+    """
+    Read rows appended to a CSV since the last call, by byte offset.
+
+    Only complete lines are consumed; a partially written last line is left
+    for the next call. If the file shrinks (rewritten), reading restarts.
+    With `backfill_bytes`, the first read also returns the complete lines in
+    (about) the last `backfill_bytes` of the existing file.
+    """
+
+    def __init__(self, path: Path, from_start: bool = False, max_bytes: int = 64 << 20,
+                 backfill_bytes: int = 0):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.header = b""
+        self.offset = 0
+        if self.path.exists():
+            self._read_header()
+            if not from_start:
+                self.offset = self._line_start(max(self.offset, self.path.stat().st_size - backfill_bytes))
+
+    def _line_start(self, offset: int) -> int:
+        """First line boundary at or after `offset`."""
+        if offset <= len(self.header):
+            return len(self.header)
+        with open(self.path, "rb") as f:
+            f.seek(offset - 1)
+            while True:
+                block = f.read(1 << 16)
+                if not block:
+                    return f.tell()
+                newline = block.find(b"\n")
+                if newline >= 0:
+                    return f.tell() - len(block) + newline + 1
+
+    def _read_header(self) -> None:
+        with open(self.path, "rb") as f:
+            self.header = f.readline()
+        self.offset = len(self.header)
+
+    def read(self) -> Optional[pd.DataFrame]:
+        if not self.path.exists():
+            return None
+        size = self.path.stat().st_size
+        if not self.header or size < self.offset:
+            self._read_header()
+        if size <= self.offset:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(min(size - self.offset, self.max_bytes))
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return None
+        self.offset += end
+        return pd.read_csv(io.BytesIO(self.header + chunk[:end]))
+
+
+def _write_report(out_path: Path, report: dict) -> None:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(report) + "\n")
+    t = report["tumbling"]
+    s = report["sliding"]
+    print(f"[{t['window_end']}] rows={t['rows']:,} drift_score={t['drift_score']:.2f} "
+          f"sliding({s['windows']})={s['drift_score']:.2f} drifted={t['drifted_features']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming drift monitor over production.csv.")
+    parser.add_argument("--reference", type=Path, default=PROFILE_PATH if PROFILE_PATH.exists() else REF_PATH,
+                        help="Reference profile JSON (preferred) or reference CSV")
+    parser.add_argument("--production", type=Path, default=PROD_PATH)
+    parser.add_argument("--out", type=Path, default=OUT_PATH, help="Append window reports (JSONL) here")
+    parser.add_argument("--window-seconds", type=float, default=60.0)
+    parser.add_argument("--sliding", type=int, default=15, help="Tumbling windows per sliding window")
+    parser.add_argument("--bins", type=int, default=DEFAULT_BINS, help="Histogram bins (CSV reference only)")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between reads of the production file")
+    parser.add_argument("--from-start", action="store_true", help="Also consume rows already in the file")
+    parser.add_argument("--once", action="store_true", help="Consume what is there, emit one window and exit")
+    args = parser.parse_args()
+
+    monitor = StreamMonitor.from_engine(
+        engine_for(args.reference, bins=args.bins), window_seconds=args.window_seconds,
+        sliding_windows=args.sliding, on_window=lambda r: _write_report(args.out, r),
+    )
+    tail = CsvTail(args.production, from_start=args.from_start or args.once)
+    print(f"👀 Watching {args.production} ({len(monitor.features)} features, "
+          f"{args.window_seconds:g}s windows, sliding over {args.sliding})")
+    try:
+        while True:
+            batch = tail.read()
+            while batch is not None:
+                monitor.update(batch)
+                batch = tail.read()
+            if args.once:
+                monitor.close()
+                break
+            monitor.advance()
+            time.sleep(args.poll)
+    except KeyboardInterrupt:
+        monitor.close()
@@ -1,54 +1,100 @@
 import json
-import csv
 import os
-from datetime import datetime
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
 
-INCIDENT_LOG = "incidents/log.csv"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from incident.alerts import AlertAggregator
+from incident.store import DB_PATH, get_store
+
+REPORT_PATH = "monitoring/reports/latest_report.json"  # written by monitoring/report.py
+PROFILE_PATH = "monitoring/reference_profile.json"
+PRODUCTION_PATH = "monitoring/production.csv"
 
 def log_incident(alert_type, severity, notes=""):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    row = [timestamp, alert_type, severity, "PENDING", "OPEN", notes]
+    # Same store as incident/logger.py; the old incidents/log.csv is imported by `incident/store.py migrate`
+    get_store(DB_PATH).append({
+        "timestamp": datetime.now(timezone.utc),  # UTC, like the aggregator and the store
+        "incident_type": alert_type,
+        "severity": severity,
+        "status": "open",
+        "notes": notes,
+        "details": {"root_cause": "PENDING"},
+    })
 
-    os.makedirs("incidents", exist_ok=True)
+    print(f"[ALERT] Incident logged: {alert_type} | Severity: {severity}")
 
-    write_header = not os.path.exists(INCIDENT_LOG)
 
-    with open(INCIDENT_LOG, "a", newline="") as f:
-        writer = csv.writer(f)
-        if write_header:
-            writer.writerow(["timestamp","alert_type","severity","root_cause","status","notes"])
-        writer.writerow(row)
+_aggregator = None
 
-    print(f"[ALERT] Incident logged: {alert_type} | Severity: {severity}")
 
+def get_aggregator():
+    """Process-wide alert aggregator; repeats of an open alert update it instead of logging again."""
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = AlertAggregator()
+    return _aggregator
 
-def check_drift(report_path="reports/latest_report.json", threshold=0.20):
-    if not os.path.exists(report_path):
-        log_incident("Missing Report", "HIGH", "latest_report.json not found")
-        return
 
-    with open(report_path, "r") as f:
-        report = json.load(f)
+def profile_drift(profile_path=PROFILE_PATH, production_path=PRODUCTION_PATH):
+    """(share of drifted features, drifted feature names), production rows vs the reference profile."""
+    import pandas as pd
+    from incident.drift import PSI_THRESHOLD, engine_for
+
+    scores = engine_for(profile_path).compare(pd.read_csv(production_path))["psi"]
+    drifted = scores.index[scores > PSI_THRESHOLD].tolist()
+    return (len(drifted) / len(scores) if len(scores) else 0.0), drifted
+
+
+def profile_drift_score(profile_path=PROFILE_PATH, production_path=PRODUCTION_PATH):
+    """Share of drifted features, production rows vs the reference profile (no reference rows read)."""
+    return profile_drift(profile_path, production_path)[0]
+
+
+def check_drift(report_path=REPORT_PATH, threshold=0.20, profile_path=PROFILE_PATH,
+                production_path=PRODUCTION_PATH, aggregator=None):
+    if profile_path and os.path.exists(profile_path) and os.path.exists(production_path):
+        drift_score, features = profile_drift(profile_path, production_path)
+    elif not os.path.exists(report_path):
+        # Through the aggregator too: a report missing on every cron tick stays one open incident
+        action = (aggregator or get_aggregator()).fire("Missing Report", {"report_path": str(report_path)},
+                                                       notes="latest_report.json not found", severity="HIGH")
+        print(f"Missing-report alert {action}: {report_path}")
+        return
+    else:
+        with open(report_path, "r") as f:
+            report = json.load(f)
 
-    drift_score = report.get("metrics", {}).get("data_drift", {}).get("drift_score", 0)
+        drift = report.get("metrics", {}).get("data_drift", {})
+        drift_score, features = drift.get("drift_score", 0), drift.get("drifted_features", [])
 
     if drift_score > threshold:
-        log_incident("Data Drift", "HIGH", f"drift_score={drift_score}")
+        action = (aggregator or get_aggregator()).fire("Data Drift", {"drift_score": drift_score}, features,
+                                                       notes=f"drift_score={drift_score}")
+        print(f"Drift alert {action}: drift_score={drift_score:.2f} features={features}")
     else:
         print("No drift alert triggered.")
 
 
-def check_missing_features(report_path="reports/latest_report.json"):
+def check_missing_features(report_path=REPORT_PATH, aggregator=None):
     with open(report_path, "r") as f:
         report = json.load(f)
 
-    missing = report.get("metrics", {}).get("data_quality", {}).get("missing_values", 0)
+    quality = report.get("metrics", {}).get("data_quality", {})
+    missing = quality.get("missing_values", 0)
 
     if missing > 0.05:
-        log_incident("Missing Features", "MEDIUM", f"{missing*100}% missing values")
+        action = (aggregator or get_aggregator()).fire(
+            "Missing Features", {"missing_pct": missing}, quality.get("missing_by_feature", {}).keys(),
+            notes=f"{missing*100}% missing values")
+        print(f"Missing-values alert {action}: {missing:.1%}")
 
 
 if __name__ == "__main__":
     print("Running alert checks...")
-    check_drift()
-    check_missing_features()
+    try:
+        check_drift()
+        check_missing_features()
+    finally:
+        get_aggregator().close()
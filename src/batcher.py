@@ -0,0 +1,196 @@
+"""
+Asyncio micro-batcher for single-transaction scoring.
+
+Concurrent callers `await batcher.submit(row)`; rows queued within the wait
+deadline are stacked into one matrix and scored with a single model call,
+and each caller's future gets its own (label, probability) back.
+
+The wait is adaptive: when requests arrive further apart than `max_wait_ms`
+(low load) there is nothing to coalesce, so a lone request is dispatched
+immediately instead of paying the deadline.
+
+`stop()` fails every row still queued or being scored with a RuntimeError,
+so no caller is left waiting on a batcher that is gone.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+from inference import score_array, columns_needed
+
+# Batch sizes are bucketed by powers of two for the histogram
+_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+
+
+class MicroBatcher:
+    def __init__(self, score_fn: Callable[[np.ndarray], tuple[np.ndarray, np.ndarray]],
+                 max_batch_size: int = 256, max_wait_ms: float = 2.0,
+                 n_features: int = len(columns_needed), latency_window: int = 10_000):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1e3
+        self.n_features = n_features
+
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._stopped = False
+        # Scoring runs off the event loop so callers can keep enqueuing (and
+        # the next batch keeps filling) while a batch is in the model
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="microbatch")
+
+        self._gap_ewma = None
+        self._last_arrival = None
+
+        self.batches = 0
+        self.rows = 0
+        self.histogram = {b: 0 for b in _BUCKETS}
+        self._wait_ms = np.zeros(latency_window)
+        self._model_ms = np.zeros(latency_window)
+        self._n_wait = 0
+        self._n_model = 0
+
+    @classmethod
+    def for_model(cls, model, **kwargs) -> "MicroBatcher":
+        return cls(lambda X: score_array(model, X), **kwargs)
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._task is not None:
+            self._task.cancel()  # fails the batch being collected or scored
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._queue is not None:
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            self._fail(pending)
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _fail(batch: list, error: Exception | None = None) -> None:
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error or RuntimeError("MicroBatcher stopped"))
+
+    async def submit(self, row) -> tuple[int, float]:
+        """Queue one feature row (in `columns_needed` order); resolves to (label, proba)."""
+        if self._stopped:
+            raise RuntimeError("MicroBatcher stopped")
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._last_arrival is not None:
+            gap = now - self._last_arrival
+            self._gap_ewma = gap if self._gap_ewma is None else 0.9 * self._gap_ewma + 0.1 * gap
+        self._last_arrival = now
+
+        future = loop.create_future()
+        self._queue.put_nowait((row, now, future))
+        return await future
+
+    def _should_wait(self) -> bool:
+        return self._gap_ewma is not None and self._gap_ewma < self.max_wait
+
+    async def _collect(self, batch: list) -> list:
+        """Fill `batch` in place, so rows taken off the queue are never lost to a cancel."""
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = batch[0][1] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0 or not self._should_wait():
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = []
+                await self._collect(batch)
+                dispatched = loop.time()
+
+                X = np.empty((len(batch), self.n_features), dtype=np.float32)
+                for i, (row, _, _) in enumerate(batch):
+                    X[i] = row
+
+                start = time.perf_counter()
+                try:
+                    pred, proba = await loop.run_in_executor(self._executor, self.score_fn, X)
+                except Exception as e:
+                    self._fail(batch, e)
+                    continue
+                self._record(batch, dispatched, (time.perf_counter() - start) * 1e3)
+
+                for i, (_, _, future) in enumerate(batch):
+                    if not future.done():
+                        future.set_result((int(pred[i]), float(proba[i])))
+        except asyncio.CancelledError:
+            self._fail(batch)
+            raise
+
+    def _record(self, batch: list, dispatched: float, model_ms: float) -> None:
+        n = len(batch)
+        self.batches += 1
+        self.rows += n
+        bucket = next((b for b in _BUCKETS if n <= b), _BUCKETS[-1])
+        self.histogram[bucket] += 1
+
+        size = len(self._wait_ms)
+        for _, enqueued, _ in batch:
+            self._wait_ms[self._n_wait % size] = (dispatched - enqueued) * 1e3
+            self._n_wait += 1
+        self._model_ms[self._n_model % size] = model_ms
+        self._n_model += 1
+
+    def stats(self) -> dict:
+        """Queue depth, batch-size histogram and the latency added by batching."""
+        def pct(values, n):
+            window = values[:min(n, len(values))]
+            if len(window) == 0:
+                return {"p50_ms": None, "p99_ms": None}
+            p50, p99 = np.percentile(window, [50, 99])
+            return {"p50_ms": round(float(p50), 4), "p99_ms": round(float(p99), 4)}
+
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": round(self.rows / self.batches, 2) if self.batches else None,
+            "batch_size_histogram": {f"<={b}": c for b, c in self.histogram.items() if c},
+            "added_latency": pct(self._wait_ms, self._n_wait),
+            "model_latency": pct(self._model_ms, self._n_model),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1e3,
+        }
+
+
+def start_in_thread(batcher: MicroBatcher) -> asyncio.AbstractEventLoop:
+    """
+    Run `batcher` on its own event loop in a daemon thread, for use from
+    synchronous (threaded) servers via `asyncio.run_coroutine_threadsafe`.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="microbatch-loop", daemon=True).start()
+    asyncio.run_coroutine_threadsafe(batcher.start(), loop).result()
+    return loop
@@ -0,0 +1,173 @@
+"""
+Pickle-free, xgboost-free predictor for the trained fraud model.
+
+`compile_booster` flattens every tree of a binary:logistic booster into a
+handful of NumPy node arrays; `CompiledModel` stores them in an .npz file
+and evaluates all trees for a block of rows at once, level by level, so
+probability and label come out of a single traversal. Loading it needs only
+NumPy — no sklearn, no xgboost, no joblib.
+"""
+
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def _parse_float(value) -> float:
+    # xgboost >= 2 stores scalars as "[5E-1]"
+    return float(str(value).strip("[]"))
+
+
+class CompiledModel:
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 default_left: np.ndarray, value: np.ndarray, roots: np.ndarray, max_depth: int,
+                 base_margin: float, feature_names: list[str]):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.base_margin = float(base_margin)
+        self.feature_names = list(feature_names)
+        # children[2 * node + go_left]: one flat gather per level instead of two
+        self._children = np.stack([right, left], axis=1).ravel()
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    # ---------------- evaluation ---------------- #
+    def predict_margin(self, X: np.ndarray, block_rows: int = 1024) -> np.ndarray:
+        """Raw margin (log-odds) for each row of `X` (n, n_features)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), block_rows):
+            out[start:start + block_rows] = self._margin_block(X[start:start + block_rows])
+        return out
+
+    def _margin_block(self, X: np.ndarray) -> np.ndarray:
+        # (rows, trees) matrix of current node ids, advanced one level per step;
+        # leaves point to themselves, so every tree can take max_depth steps
+        n, n_features = X.shape
+        flat = X.ravel()
+        row_offset = (np.arange(n, dtype=np.int64) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            x = flat.take(row_offset + self.feature.take(node))
+            go_left = np.where(np.isnan(x), self.default_left.take(node), x < self.threshold.take(node))
+            node = self._children.take(2 * node + go_left)
+        return self.value.take(node).sum(axis=1, dtype=np.float32) + self.base_margin
+
+    def predict(self, X: np.ndarray, threshold: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+        """Label and fraud probability from one pass over the trees."""
+        proba = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        proba = proba.astype(np.float32)
+        return (proba > threshold).astype(np.int8), proba
+
+    # ---------------- persistence ---------------- #
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                format_version=np.int32(FORMAT_VERSION),
+                feature=self.feature,
+                threshold=self.threshold,
+                left=self.left,
+                right=self.right,
+                default_left=self.default_left,
+                value=self.value,
+                roots=self.roots,
+                max_depth=np.int32(self.max_depth),
+                base_margin=np.float64(self.base_margin),
+                feature_names=np.array(self.feature_names, dtype=str),
+            )
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "CompiledModel":
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported compiled model version {int(z['format_version'])} in {path}")
+            return cls(
+                feature=z["feature"],
+                threshold=z["threshold"],
+                left=z["left"],
+                right=z["right"],
+                default_left=z["default_left"],
+                value=z["value"],
+                roots=z["roots"],
+                max_depth=int(z["max_depth"]),
+                base_margin=float(z["base_margin"]),
+                feature_names=z["feature_names"].tolist(),
+            )
+
+
+def compile_booster(booster) -> CompiledModel:
+    """Flatten an `xgboost.Booster` (or XGBClassifier) trained with binary:logistic."""
+    if hasattr(booster, "get_booster"):
+        booster = booster.get_booster()
+    learner = json.loads(booster.save_raw("json"))["learner"]
+
+    objective = learner["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"Only binary:logistic boosters can be compiled, got {objective}")
+    gbm = learner["gradient_booster"]
+    if gbm["name"] != "gbtree":
+        raise ValueError(f"Only gbtree boosters can be compiled, got {gbm['name']}")
+
+    trees = gbm["model"]["trees"]
+    best_iteration = learner.get("attributes", {}).get("best_iteration")
+    if best_iteration is not None:
+        per_round = int(gbm["model"]["gbtree_model_param"].get("num_parallel_tree", 1))
+        trees = trees[:(int(best_iteration) + 1) * per_round]
+
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    max_depth, offset = 0, 0
+    for tree in trees:
+        lc = np.asarray(tree["left_children"], dtype=np.int64)
+        rc = np.asarray(tree["right_children"], dtype=np.int64)
+        cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+        n_nodes = len(lc)
+        ids = np.arange(n_nodes)
+        is_leaf = lc == -1
+
+        feature.append(np.where(is_leaf, 0, tree["split_indices"]).astype(np.int32))
+        threshold.append(np.where(is_leaf, 0.0, cond).astype(np.float32))
+        left.append((np.where(is_leaf, ids, lc) + offset).astype(np.int32))
+        right.append((np.where(is_leaf, ids, rc) + offset).astype(np.int32))
+        default_left.append(np.asarray(tree["default_left"], dtype=bool))
+        value.append(np.where(is_leaf, cond, 0.0).astype(np.float32))
+        roots.append(offset)
+
+        stack = [(0, 0)]
+        while stack:
+            i, depth = stack.pop()
+            max_depth = max(max_depth, depth)
+            if not is_leaf[i]:
+                stack += [(lc[i], depth + 1), (rc[i], depth + 1)]
+        offset += n_nodes
+
+    base_score = _parse_float(learner["learner_model_param"]["base_score"])
+    return CompiledModel(
+        feature=np.concatenate(feature),
+        threshold=np.concatenate(threshold),
+        left=np.concatenate(left),
+        right=np.concatenate(right),
+        default_left=np.concatenate(default_left),
+        value=np.concatenate(value),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        base_margin=math.log(base_score / (1.0 - base_score)),
+        feature_names=learner.get("feature_names") or [],
+    )
@@ -1,82 +1,144 @@
 import polars as pl
 from pathlib import Path
+import argparse
 import os
 import numpy as np
 
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from utils.logger import logger  
+from utils.logger import logger
+from utils.instrument import span
+from features import encode_type_expr, dest_sentinel_exprs, orig_sentinel_exprs, derived_exprs
+from feature_store import add_velocity_features
+from utils.storage import write_dataset, PROCESSED_DIR, PROCESSED_CSV
+
+RAW = "data/raw/PS_20174392719_1491204439457_log.csv"
+PROC = PROCESSED_DIR
+
+# Explicit dtypes for the raw PaySim log so scans skip type inference
+RAW_SCHEMA = {
+    "step": pl.Int64,
+    "type": pl.Utf8,
+    "amount": pl.Float64,
+    "nameOrig": pl.Utf8,
+    "oldbalanceOrg": pl.Float64,
+    "newbalanceOrig": pl.Float64,
+    "nameDest": pl.Utf8,
+    "oldbalanceDest": pl.Float64,
+    "newbalanceDest": pl.Float64,
+    "isFraud": pl.Int64,
+    "isFlaggedFraud": pl.Int64,
+}
 
-PROC = "data/processed/paysim_cleaned.csv"
 # Load the raw data
-def load_raw_data(path="data/raw/PS_20174392719_1491204439457_log.csv") -> pl.DataFrame:
+@span("load_raw_data", log=True)
+def load_raw_data(path=RAW) -> pl.DataFrame:
     logger.info(f"Loading raw data from {path}")
-    return pl.read_csv(path)
+    return pl.read_csv(path, schema_overrides=RAW_SCHEMA)
+
+# Lazily scan the raw data; nothing is read until the plan is collected or sunk
+def scan_raw_data(path=RAW) -> pl.LazyFrame:
+    logger.info(f"Scanning raw data from {path}")
+    return pl.scan_csv(path, schema_overrides=RAW_SCHEMA)
 
 # Preprocess the data for fraud detection
-def preprocess_data(df: pl.DataFrame, seed: int = 5) -> pl.DataFrame:
+def preprocess_data(df: pl.DataFrame | pl.LazyFrame, seed: int = 5,
+                    velocity: bool = False) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Build the cleaning/feature chain as a single lazy query.
+
+    A `pl.DataFrame` in gives a `pl.DataFrame` out; a `pl.LazyFrame` in gives
+    a `pl.LazyFrame` out so the caller can `collect()` or `sink_*()` it with
+    predicate and projection pushdown into the scan. Only the eager collect
+    is timed here (span `preprocess_data`); a lazy plan runs, and is timed,
+    when `save_preprocessed_data` sinks it.
+
+    With `velocity`, the per-account columns of `feature_store` are added
+    (over the filtered rows in log order, as the online store sees them)
+    before the account ids are dropped. They are stored for analysis only:
+    training selects `features.FEATURE_COLUMNS`, which doesn't include them.
+    """
     logger.info("Starting preprocessing")
     np.random.seed(seed)
 
-    df = df.filter(pl.col("type").is_in(["TRANSFER", "CASH_OUT"]))
+    eager = isinstance(df, pl.DataFrame)
+    lf = df.lazy()
+
+    lf = lf.filter(pl.col("type").is_in(["TRANSFER", "CASH_OUT"]))
     logger.info("Filtered only TRANSFER and CASH_OUT transactions")
 
-    df = df.drop(["nameOrig", "nameDest", "isFlaggedFraud"])
+    if velocity:
+        lf = add_velocity_features(lf)
+        logger.info("Added per-account velocity features")
+
+    lf = lf.drop(["nameOrig", "nameDest", "isFlaggedFraud"])
     logger.info("Dropped irrelevant columns")
 
-    df = df.with_columns([
-        pl.when(pl.col("type") == "TRANSFER").then(0)
-          .when(pl.col("type") == "CASH_OUT").then(1)
-          .alias("type")
-          .cast(pl.Int8)
-    ])
+    lf = lf.with_columns(encode_type_expr())
     logger.info("Encoded transaction type to binary")
 
-    condition_dest = (
-        (pl.col("oldbalanceDest") == 0) &
-        (pl.col("newbalanceDest") == 0) &
-        (pl.col("amount") != 0)
-    )
-    df = df.with_columns([
-        pl.when(condition_dest).then(-1).otherwise(pl.col("oldbalanceDest")).alias("oldbalanceDest"),
-        pl.when(condition_dest).then(-1).otherwise(pl.col("newbalanceDest")).alias("newbalanceDest")
-    ])
+    lf = lf.with_columns(dest_sentinel_exprs())
     logger.info("Handled suspicious destination balance zeros")
 
-    condition_orig = (
-        (pl.col("oldbalanceOrg") == 0) &
-        (pl.col("newbalanceOrig") == 0) &
-        (pl.col("amount") != 0)
-    )
-    df = df.with_columns([
-        pl.when(condition_orig).then(None).otherwise(pl.col("oldbalanceOrg")).alias("oldbalanceOrg"),
-        pl.when(condition_orig).then(None).otherwise(pl.col("newbalanceOrig")).alias("newbalanceOrig")
-    ])
+    lf = lf.with_columns(orig_sentinel_exprs())
     logger.info("Handled suspicious origin balance zeros")
 
-    df = df.with_columns([
-        (pl.col("newbalanceOrig") + pl.col("amount") - pl.col("oldbalanceOrg")).alias("errorBalanceOrig"),
-        (pl.col("oldbalanceDest") + pl.col("amount") - pl.col("newbalanceDest")).alias("errorBalanceDest"),
-        (pl.col("amount") > 200_000).cast(pl.Int8).alias("is_large_transaction"),
-        (pl.col("step") % 24).alias("hour"),
-        (pl.col("step") // 24).alias("day")
-    ])
+    lf = lf.with_columns(derived_exprs())
     logger.info("Created engineered features")
 
-    return df
+    if not eager:
+        return lf
+    with span("preprocess_data", log=True):
+        return lf.collect()
 
 # Save cleaned data
-def save_preprocessed_data(df: pl.DataFrame, out_path: Path = PROC):
+@span("save_preprocessed_data", log=True)
+def save_preprocessed_data(df: pl.DataFrame | pl.LazyFrame, out_path: Path = PROC, fmt: str = "parquet"):
+    """
+    Write the cleaned data.
+
+    By default this is the partitioned columnar dataset read by train/eval/
+    inference/dashboard (`fmt` is "parquet" or "ipc"). An `out_path` ending in
+    .csv or .parquet writes a single file instead. LazyFrames are streamed to
+    disk without materializing, so for them the `save_preprocessed_data` span
+    covers the scan and the preprocessing as well as the write.
+    """
     logger.info(f"Saving preprocessed data to {out_path}")
+    suffix = Path(out_path).suffix
+    if suffix not in (".csv", ".parquet"):
+        write_dataset(df, out_path, fmt=fmt)
+        logger.info("Data successfully saved")
+        return
+
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    df.write_csv(out_path)
+    if isinstance(df, pl.LazyFrame):
+        if suffix == ".parquet":
+            df.sink_parquet(out_path)
+        else:
+            df.sink_csv(out_path)
+    elif suffix == ".parquet":
+        df.write_parquet(out_path)
+    else:
+        df.write_csv(out_path)
     logger.info("Data successfully saved")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the raw PaySim log.")
+    parser.add_argument("--input", default=RAW)
+    parser.add_argument("--out", default=str(PROC))
+    parser.add_argument("--format", choices=["parquet", "ipc", "csv"], default="parquet")
+    parser.add_argument("--eager", action="store_true", help="Load the whole file into memory first (legacy path)")
+    parser.add_argument("--velocity", action="store_true",
+                        help="Add per-account velocity columns (not model inputs yet; window functions: not streamed)")
+    args = parser.parse_args()
+    if args.format == "csv" and args.out != str(PROC) and Path(args.out).suffix != ".csv":
+        parser.error("--format csv writes a single file: give --out a path ending in .csv (or leave it unset)")
+
     logger.info("🚀 Data preprocessing pipeline started")
-    df = load_raw_data()
-    df_clean = preprocess_data(df)
-    save_preprocessed_data(df_clean)
+    df = load_raw_data(args.input) if args.eager else scan_raw_data(args.input)
+    df_clean = preprocess_data(df, velocity=args.velocity)
+    out = PROCESSED_CSV if args.format == "csv" and args.out == str(PROC) else args.out
+    save_preprocessed_data(df_clean, out, fmt=args.format)
     logger.info("✅ Preprocessing complete. Cleaned data saved.")
-    print("✅ Preprocessing complete. Cleaned data saved to:", PROC)
+    print("✅ Preprocessing complete. Cleaned data saved to:", out)
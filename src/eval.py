@@ -1,43 +1,234 @@
-# eval.py
+"""
+Held-out evaluation in one scoring pass.
 
-import joblib
-import polars as pl
-from sklearn.metrics import classification_report, confusion_matrix, average_precision_score
-from sklearn.model_selection import train_test_split
+The held-out rows are the ones training cached in `models/split.npz`
+(`train.save_split`), read from the dataset by position, so nothing is
+re-split. They are scored once. Every threshold metric then comes from
+cumulative sums over the rows sorted by descending score: one O(n log n)
+sort gives TP/FP/FN/TN, precision, recall, F1 and misclassification cost
+at every distinct score.
+
+AUPRC (average precision, as sklearn defines it) gets a bootstrap
+confidence interval. Resamples are Poisson(1) row weights over the
+already sorted scores, collapsed to the score groups holding a fraud and
+drawn in vectorized blocks sized by a memory budget, optionally on
+several threads. Metrics are also broken down per
+`day` and per `type` slice.
+
+    python src/eval.py [--data data/processed/paysim_cleaned] [--n-boot 1000] [--cost-fn 10] [--out eval.json]
+"""
+
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import polars as pl
 from utils.logger import logger
+from utils.storage import scan_dataset, PROCESSED_DIR
+from features import FEATURE_COLUMNS, TYPE_CODES
+from inference import load_model, score_array
+from train import SPLIT_PATH, load_split
 
 # Paths
 BASE = Path(__file__).resolve().parent
-DATA_PATH = (BASE / ".." / "data" / "processed" / "paysim_cleaned.csv").resolve()
-MODEL_PATH = (BASE / ".." / "models" / "xgb_model.joblib").resolve()
+DATA_PATH = PROCESSED_DIR
+TARGET = "isFraud"
+SLICES = ["day", "type"]
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+def load_holdout(data_path: Path = DATA_PATH, split_path: Path = SPLIT_PATH) -> pl.DataFrame:
+    """The held-out rows cached by training: model features plus the target."""
+    test_index, meta = load_split(data_path, split_path)
+    logger.info(f"📥 Loading {len(test_index):,} held-out rows ({meta['mode']} split) from {data_path}")
+    return (
+        scan_dataset(data_path, columns=FEATURE_COLUMNS + [TARGET])
+        .with_row_index("row")
+        .filter(pl.col("row").is_in(pl.Series(test_index).implode()))
+        .drop("row")
+        .collect(engine="streaming")
+    )
+
+# ---------------- threshold curves ---------------- #
+def _sort_scores(y_true: np.ndarray, y_score: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Rows by descending score, and the last position of each run of tied scores."""
+    order = np.argsort(y_score, kind="mergesort")[::-1]
+    score = y_score[order]
+    ends = np.r_[np.flatnonzero(np.diff(score)), len(score) - 1]
+    return order, np.asarray(y_true)[order].astype(bool), score, ends
 
-def load_data():
-    logger.info("📥 Loading and splitting dataset...")
-    df = pl.read_csv(DATA_PATH)
+def threshold_curve(y_true: np.ndarray, y_score: np.ndarray, cost_fp: float = 1.0,
+                    cost_fn: float | np.ndarray = 10.0) -> pd.DataFrame:
+    """
+    Confusion counts, precision, recall, F1 and cost when flagging
+    `score >= threshold`, for every distinct score (descending). `cost_fn`
+    may be per row (e.g. the transaction amount).
+    """
+    order, y, score, ends = _sort_scores(y_true, np.asarray(y_score))
+    tp = np.cumsum(y)[ends]
+    fp = (ends + 1) - tp
+    positives, negatives = int(y.sum()), len(y) - int(y.sum())
+    fn, tn = positives - tp, negatives - fp
 
-    y = df["isFraud"].to_numpy()
-    X = df.drop("isFraud").to_pandas()
+    fn_cost = np.broadcast_to(np.asarray(cost_fn, dtype=float), y.shape)
+    if np.ndim(cost_fn):
+        fn_cost = fn_cost[order]
+    missed = (fn_cost * y).sum() - np.cumsum(fn_cost * y)[ends]
 
-    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    precision = tp / (tp + fp)
+    recall = tp / positives if positives else np.zeros(len(tp))
+    with np.errstate(invalid="ignore"):
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+    return pd.DataFrame({"threshold": score[ends], "tp": tp, "fp": fp, "fn": fn, "tn": tn, "precision": precision,
+                         "recall": recall, "f1": f1, "cost": cost_fp * fp + missed})
 
-def evaluate_model(model, X_test, y_test):
-    logger.info("🧪 Evaluating model performance...")
+def average_precision(curve: pd.DataFrame) -> float:
+    """Sum of precision weighted by the recall gained at each threshold (sklearn's AP)."""
+    recall = curve["recall"].to_numpy()
+    return float(np.sum(np.diff(recall, prepend=0.0) * curve["precision"].to_numpy()))
 
-    y_pred = model.predict(X_test)
-    y_proba = model.predict_proba(X_test)[:, 1]
+def metrics_at(y_true: np.ndarray, y_score: np.ndarray, threshold: float = 0.5) -> dict:
+    """Confusion counts at one threshold, flagging `score > threshold` like `inference.score_array`."""
+    y, flagged = np.asarray(y_true).astype(bool), np.asarray(y_score) > threshold
+    tp, fp = int((y & flagged).sum()), int((~y & flagged).sum())
+    fn, tn = int(y.sum()) - tp, int((~y).sum()) - fp
+    return {"threshold": threshold, "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+            "precision": tp / (tp + fp) if tp + fp else 0.0, "recall": tp / (tp + fn) if tp + fn else 0.0}
 
-    logger.info("📊 Confusion Matrix:")
-    print(confusion_matrix(y_test, y_pred))
+# ---------------- bootstrap ---------------- #
+def _bootstrap_block(pos: np.ndarray, neg: np.ndarray, n_boot: int, seed: np.random.SeedSequence) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    tp = np.cumsum(rng.poisson(pos, size=(n_boot, len(pos))), axis=1)
+    flagged = tp + np.cumsum(rng.poisson(neg, size=(n_boot, len(neg))), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = np.where(flagged > 0, tp / flagged, 0.0)
+        gained = np.diff(tp, axis=1, prepend=0) / tp[:, -1:]
+        return (gained * precision).sum(axis=1)  # NaN when a resample drew no positives
 
-    logger.info("🧾 Classification Report:")
-    print(classification_report(y_test, y_pred))
+def bootstrap_auprc(y_true: np.ndarray, y_score: np.ndarray, n_boot: int = 1000, alpha: float = 0.05,
+                    seed: int = 0, memory_mb: float = 256, workers: int = 1) -> dict:
+    """
+    Percentile bootstrap interval for average precision.
 
-    auprc = average_precision_score(y_test, y_proba)
+    Each resample gives every row a Poisson(1) weight. AP only moves at
+    score groups holding a positive, and a sum of m independent Poisson(1)
+    weights is one Poisson(m) draw. So a resample needs two draws per
+    positive group (its positives, and the negatives since the previous
+    one), not one per row: the cost scales with the fraud count.
+    """
+    _, y, _, ends = _sort_scores(y_true, np.asarray(y_score))
+    tp = np.cumsum(y)[ends]
+    fp = (ends + 1) - tp
+    has_pos = np.diff(tp, prepend=0) > 0
+    pos, neg = np.diff(tp[has_pos], prepend=0), np.diff(fp[has_pos], prepend=0)
+
+    # Per resample and positive group: two int64 draws, their cumsums and the float64 AP terms
+    block = max(1, min(n_boot, int(memory_mb * 2**20 // (48 * max(len(pos), 1)))))
+    sizes = [min(block, n_boot - start) for start in range(0, n_boot, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        samples = np.concatenate(list(pool.map(lambda a: _bootstrap_block(pos, neg, *a), zip(sizes, seeds))))
+    samples = samples[~np.isnan(samples)]
+    low, high = np.quantile(samples, [alpha / 2, 1 - alpha / 2]) if len(samples) else (np.nan, np.nan)
+    return {"low": float(low), "high": float(high), "std": float(samples.std()) if len(samples) else float("nan"),
+            "n_boot": int(n_boot), "confidence": 1 - alpha}
+
+# ---------------- slices ---------------- #
+def slice_metrics(holdout: pl.DataFrame, y_score: np.ndarray, by: str, threshold: float = 0.5) -> pd.DataFrame:
+    """Rows, fraud rate, AUPRC and precision/recall at `threshold` per value of `by`."""
+    keys = holdout[by].to_numpy()
+    y = holdout[TARGET].to_numpy()
+    rows = []
+    for key in np.unique(keys):
+        mask = keys == key
+        y_k, score_k = y[mask], y_score[mask]
+        at = metrics_at(y_k, score_k, threshold)
+        rows.append({
+            by: TYPE_NAMES.get(int(key), key) if by == "type" else int(key),
+            "rows": int(mask.sum()),
+            "frauds": int(y_k.sum()),
+            "auprc": average_precision(threshold_curve(y_k, score_k)) if y_k.any() else None,
+            "precision": at["precision"],
+            "recall": at["recall"],
+        })
+    return pd.DataFrame(rows).set_index(by)
+
+# ---------------- report ---------------- #
+def evaluate_model(model, holdout: pl.DataFrame, threshold: float = 0.5, cost_fp: float = 1.0,
+                   cost_fn: float | str = 10.0, n_boot: int = 1000, seed: int = 0, workers: int = 1) -> tuple[dict, pd.DataFrame]:
+    """
+    Score the held-out rows once and derive every metric from that pass;
+    returns the report and the full threshold curve. `cost_fn="amount"`
+    charges each missed fraud its transaction amount.
+    """
+    logger.info(f"🧪 Evaluating model on {len(holdout):,} held-out rows...")
+    X = holdout.select(FEATURE_COLUMNS).to_numpy().astype(np.float32, copy=False)
+    y = holdout[TARGET].to_numpy().astype(bool)
+    _, proba = score_array(model, X, threshold)
+
+    fn_cost = holdout["amount"].to_numpy() if cost_fn == "amount" else float(cost_fn)
+    curve = threshold_curve(y, proba, cost_fp=cost_fp, cost_fn=fn_cost)
+    auprc = average_precision(curve)
     logger.info(f"🔍 Average Precision Score (AUPRC): {auprc:.4f}")
 
+    best_f1, min_cost = curve.loc[curve["f1"].idxmax()], curve.loc[curve["cost"].idxmin()]
+    report = {
+        "rows": len(y),
+        "frauds": int(y.sum()),
+        "auprc": auprc,
+        "auprc_ci": bootstrap_auprc(y, proba, n_boot=n_boot, seed=seed, workers=workers) if n_boot else None,
+        "at_threshold": metrics_at(y, proba, threshold),
+        "best_f1": {k: float(v) for k, v in best_f1.items()},
+        "min_cost": {k: float(v) for k, v in min_cost.items()},
+        "costs": {"fp": cost_fp, "fn": cost_fn},
+        "slices": {by: slice_metrics(holdout, proba, by, threshold).reset_index().to_dict("records")
+                   for by in SLICES if by in holdout.columns},
+    }
+    return report, curve
+
+def print_report(report: dict) -> None:
+    ci = report["auprc_ci"]
+    ci_text = f" [{ci['low']:.4f}, {ci['high']:.4f}] ({ci['confidence']:.0%}, {ci['n_boot']} resamples)" if ci else ""
+    print(f"🔍 AUPRC = {report['auprc']:.4f}{ci_text} on {report['rows']:,} rows ({report['frauds']:,} frauds)")
+
+    at = report["at_threshold"]
+    print(f"\n📊 Confusion matrix at {at['threshold']}:")
+    print(f"   TN={at['tn']:,}  FP={at['fp']:,}\n   FN={at['fn']:,}  TP={at['tp']:,}")
+    print(f"   precision={at['precision']:.4f}  recall={at['recall']:.4f}")
+    for name in ["best_f1", "min_cost"]:
+        p = report[name]
+        print(f"🎯 {name}: threshold={p['threshold']:.4f}  precision={p['precision']:.4f}  "
+              f"recall={p['recall']:.4f}  f1={p['f1']:.4f}  cost={p['cost']:,.0f}")
+    for by, rows in report["slices"].items():
+        print(f"\n🧩 By {by}:")
+        print(pd.DataFrame(rows).set_index(by).to_string(float_format=lambda v: f"{v:.4f}"))
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the model on the held-out split cached by train.py.")
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--split", type=Path, default=SPLIT_PATH)
+    parser.add_argument("--model", type=Path, default=None, help="Model artifact (default: the registry's current)")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--cost-fp", type=float, default=1.0, help="Cost of reviewing a false alarm")
+    parser.add_argument("--cost-fn", default="10", help="Cost of a missed fraud: a number, or 'amount'")
+    parser.add_argument("--n-boot", type=int, default=1000, help="Bootstrap resamples for the AUPRC interval (0: off)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=None, help="Write the report as JSON")
+    parser.add_argument("--curve-out", type=Path, default=None, help="Write the full threshold curve as CSV")
+    args = parser.parse_args()
+
     logger.info("🚀 Starting evaluation script")
-    model = joblib.load(MODEL_PATH)
-    _, X_test, _, y_test = load_data()
-    evaluate_model(model, X_test, y_test)
+    model = load_model(args.model, watch=False)
+    cost_fn = args.cost_fn if args.cost_fn == "amount" else float(args.cost_fn)
+    report, curve = evaluate_model(model, load_holdout(args.data, args.split), args.threshold, args.cost_fp, cost_fn,
+                                   args.n_boot, args.seed, args.workers)
+    print_report(report)
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+        print(f"\n✅ Report saved to: {args.out}")
+    if args.curve_out:
+        curve.to_csv(args.curve_out, index=False)
+        print(f"✅ Threshold curve saved to: {args.curve_out}")
@@ -0,0 +1,299 @@
+"""
+Per-account velocity features: how busy the origin and destination accounts
+have been before the current transaction.
+
+For each entity (`nameOrig` as "orig", `nameDest` as "dest") and each window
+length `w` in WINDOWS (in steps, i.e. hours):
+
+ - {entity}_count_{w}: the account's earlier transactions in the sliding
+   window of the last `w` steps (steps step - w + 1 ... step)
+ - {entity}_amount_{w}: their summed amount
+ - {entity}_steps_since_last: steps since the account's previous
+   transaction (null/NaN for its first)
+
+Features are point-in-time: a transaction sees only the transactions before
+it in arrival order (frame order offline; earlier rows of the same step
+count), never itself or anything later. Steps are assumed non-decreasing,
+as in the PaySim log and a live stream.
+
+Two implementations agree on the same stream:
+
+ - `add_velocity_features`: polars expressions over the frame sorted by
+   account, for training data (`data_preprocess.py --velocity`);
+ - `FeatureStore`: an in-memory store for online scoring. Each entity table
+   keeps an account's transactions bucketed by step: the newest bucket
+   (step, count, amount) in flat arrays, one slot per account, and any
+   earlier buckets still inside the longest window in a side dict, which
+   only busy accounts have. A lookup sums the buckets inside each window;
+   an update expires buckets that have left all of them.
+   `FeatureStore.from_history` warm-starts it from a historical frame in
+   bulk.
+
+    python benchmarks/bench_feature_store.py --accounts 10000000
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import polars as pl
+
+WINDOWS = (1, 24, 168)  # an hour, a day and a week of steps
+ENTITIES = {"orig": "nameOrig", "dest": "nameDest"}
+
+
+def velocity_columns(windows=WINDOWS) -> list[str]:
+    columns = []
+    for entity in ENTITIES:
+        for w in windows:
+            columns += [f"{entity}_count_{w}", f"{entity}_amount_{w}"]
+        columns.append(f"{entity}_steps_since_last")
+    return columns
+
+
+VELOCITY_COLUMNS = velocity_columns()
+
+
+# ---------------- polars (bulk, training) ---------------- #
+def entity_stages(entity: str, windows=WINDOWS) -> list[list[pl.Expr]]:
+    """
+    One entity's velocity columns over a frame sorted by its account key,
+    then arrival order, as successive `with_columns` stages (later stages
+    read the "_"-prefixed helper columns of earlier ones; drop them after).
+
+    Groups are found from the previous row (a running window over sorted
+    data is far cheaper than `.over()` with one partition per account).
+    (group, step) is then sorted too, so each window's first row is a
+    binary search away, and amounts are prefix sums less the window's
+    start, equal to the online store's running sums up to float rounding.
+    """
+    key = ENTITIES[entity]
+    first = (pl.col(key) != pl.col(key).shift(1)).fill_null(True)
+    offset = pl.col("step") - pl.col("step").min()
+    helpers = [
+        first.alias("_first"),
+        # Sorted, and groups apart by more than any step offset
+        (first.cum_sum().cast(pl.Int64) * (offset.max() + 1) + offset).alias("_position"),
+        offset.alias("_offset"),
+        (pl.col("amount").cum_sum() - pl.col("amount")).alias("_before"),
+    ]
+    position, offset = pl.col("_position"), pl.col("_offset")
+    starts = [
+        position.search_sorted(position - offset + (offset - (w - 1)).clip(lower_bound=0), side="left")
+        .alias(f"_start_{w}")
+        for w in windows
+    ]
+    row, before = pl.int_range(pl.len(), dtype=pl.Int64), pl.col("_before")
+    outputs = []
+    for w in windows:
+        start = pl.col(f"_start_{w}")
+        outputs += [
+            (row - start).cast(pl.Int32).alias(f"{entity}_count_{w}"),
+            (before - before.gather(start)).alias(f"{entity}_amount_{w}"),
+        ]
+    outputs.append(pl.when("_first").then(None).otherwise(pl.col("step") - pl.col("step").shift(1))
+                   .cast(pl.Float64).alias(f"{entity}_steps_since_last"))
+    return [helpers, starts, outputs]
+
+
+def add_velocity_features(df: pl.DataFrame | pl.LazyFrame, windows=WINDOWS) -> pl.DataFrame | pl.LazyFrame:
+    """Point-in-time velocity columns for a frame in arrival order; rows keep their order."""
+    lf = df.lazy().with_row_index("_arrival")
+    for entity, key in ENTITIES.items():
+        lf = lf.sort(key, "_arrival")
+        for stage in entity_stages(entity, windows):
+            lf = lf.with_columns(stage)
+        lf = lf.drop("_first", "_position", "_offset", "_before", *[f"_start_{w}" for w in windows])
+    lf = lf.sort("_arrival").drop("_arrival")
+    return lf.collect() if isinstance(df, pl.DataFrame) else lf
+
+
+# ---------------- in-memory store (online) ---------------- #
+class EntityTable:
+    """Velocity state for one kind of account, one array slot per account."""
+
+    def __init__(self, windows=WINDOWS, capacity: int = 1 << 16):
+        self.windows = tuple(windows)
+        self.horizon = max(self.windows)
+        self.slots: dict[str, int] = {}
+        self.older: dict[int, list[tuple[int, int, float]]] = {}  # slot -> earlier (step, count, amount), oldest first
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        last = np.zeros(capacity, dtype=np.int64)
+        counts = np.zeros(capacity, dtype=np.int32)
+        sums = np.zeros(capacity, dtype=np.float64)
+        used = len(self.slots)
+        if used:
+            last[:used] = self.last[:used]
+            counts[:used] = self.counts[:used]
+            sums[:used] = self.sums[:used]
+        self.last, self.counts, self.sums = last, counts, sums
+        # Scalar reads and writes through memoryviews skip NumPy's per-item boxing
+        self._last, self._counts, self._sums = memoryview(last), memoryview(counts), memoryview(sums)
+        self.capacity = capacity
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _features(self, slot: int, step: int) -> list[float]:
+        last = self._last[slot]
+        out = []
+        earlier = self.older.get(slot)
+        if earlier is None:
+            count, amount = float(self._counts[slot]), self._sums[slot]
+            for w in self.windows:
+                out += [count, amount] if step - last < w else [0.0, 0.0]
+        else:
+            buckets = earlier + [(last, self._counts[slot], self._sums[slot])]
+            for w in self.windows:
+                count, amount = 0, 0.0
+                for s, c, a in buckets:
+                    if step - s < w:
+                        count += c
+                        amount += a
+                out += [float(count), amount]
+        out.append(float(step - last))
+        return out
+
+    def _record(self, slot: int, step: int, amount: float) -> None:
+        last = self._last[slot]
+        if step <= last:  # the same step (or a late arrival): into the newest bucket
+            self._counts[slot] += 1
+            self._sums[slot] += amount
+            return
+        if step - last < self.horizon:  # the newest bucket is still inside the longest window
+            earlier = self.older.setdefault(slot, [])
+            earlier.append((last, self._counts[slot], self._sums[slot]))
+            while step - earlier[0][0] >= self.horizon:
+                del earlier[0]
+        else:
+            self.older.pop(slot, None)
+        self._last[slot], self._counts[slot], self._sums[slot] = step, 1, amount
+
+    def _new_slot(self, account: str, step: int, amount: float) -> None:
+        slot = len(self.slots)
+        if slot == self.capacity:
+            self._allocate(2 * self.capacity)
+        self.slots[account] = slot
+        self._last[slot], self._counts[slot], self._sums[slot] = step, 1, amount
+
+    def lookup(self, account: str, step: int) -> list[float]:
+        """Features as of just before a transaction of `account` at `step`."""
+        slot = self.slots.get(account)
+        if slot is None:
+            return [0.0] * (2 * len(self.windows)) + [math.nan]
+        return self._features(slot, step)
+
+    def update(self, account: str, step: int, amount: float) -> None:
+        slot = self.slots.get(account)
+        if slot is None:
+            self._new_slot(account, step, amount)
+        else:
+            self._record(slot, step, amount)
+
+    def observe(self, account: str, step: int, amount: float) -> list[float]:
+        """`lookup` then `update` with one slot lookup."""
+        slot = self.slots.get(account)
+        if slot is None:
+            self._new_slot(account, step, amount)
+            return [0.0] * (2 * len(self.windows)) + [math.nan]
+        out = self._features(slot, step)
+        self._record(slot, step, amount)
+        return out
+
+    def load(self, newest: pl.DataFrame, earlier: pl.DataFrame, key: str) -> None:
+        """
+        Replace the table with per-account buckets (see `FeatureStore.from_history`):
+        `newest` has one row per account, `earlier` the older buckets sorted by account and step.
+        """
+        n = len(newest)
+        self.slots, self.older = {}, {}
+        self._allocate(max(n, 1))
+        self.slots = dict(zip(newest[key].to_list(), range(n)))
+        self.last[:n] = newest["step"].to_numpy()
+        self.counts[:n] = newest["count"].to_numpy()
+        self.sums[:n] = newest["amount"].to_numpy()
+        slots, older = self.slots, self.older
+        for account, *bucket in earlier.select(key, "step", "count", "amount").iter_rows():
+            older.setdefault(slots[account], []).append(tuple(bucket))
+
+
+class FeatureStore:
+    """
+    Online velocity features for origin and destination accounts.
+
+    `observe(tx)` is the scoring path: it returns the transaction's features
+    (as of before it) and then records it. Given a `key`, a retried or
+    replayed transaction among the last `replay_window` keys gets its first
+    answer back and is not recorded again. Thread-safe.
+    """
+
+    def __init__(self, windows=WINDOWS, capacity: int = 1 << 16, replay_window: int = 100_000):
+        self.windows = tuple(windows)
+        self.columns = velocity_columns(self.windows)
+        self.tables = {entity: EntityTable(self.windows, capacity) for entity in ENTITIES}
+        self.replay_window = replay_window
+        self.replays = 0
+        self._recent: OrderedDict = OrderedDict()  # key -> features, oldest first
+        self._lock = threading.Lock()
+
+    def lookup(self, tx: dict) -> dict[str, float]:
+        step = int(tx["step"])
+        with self._lock:
+            values = [v for entity, key in ENTITIES.items() for v in self.tables[entity].lookup(tx[key], step)]
+        return dict(zip(self.columns, values))
+
+    def update(self, tx: dict) -> None:
+        step, amount = int(tx["step"]), float(tx["amount"])
+        with self._lock:
+            for entity, key in ENTITIES.items():
+                self.tables[entity].update(tx[key], step, amount)
+
+    def observe(self, tx: dict, key=None) -> dict[str, float]:
+        step, amount = int(tx["step"]), float(tx["amount"])
+        values = []
+        with self._lock:
+            if key is not None:
+                seen = self._recent.get(key)
+                if seen is not None:
+                    self._recent.move_to_end(key)
+                    self.replays += 1
+                    return dict(seen)
+            for entity, account in ENTITIES.items():
+                values += self.tables[entity].observe(tx[account], step, amount)
+            features = dict(zip(self.columns, values))
+            if key is not None:
+                self._recent[key] = features
+                if len(self._recent) > self.replay_window:
+                    self._recent.popitem(last=False)
+        return dict(features)
+
+    def stats(self) -> dict:
+        out = {f"{entity}_accounts": len(table) for entity, table in self.tables.items()}
+        out["replays"] = self.replays
+        return out
+
+    @classmethod
+    def from_history(cls, df: pl.DataFrame | pl.LazyFrame, windows=WINDOWS) -> "FeatureStore":
+        """
+        A store holding the state left by the transactions in `df` (arrival
+        order): each account's per-step buckets back to the longest window
+        before its last transaction. No replay.
+        """
+        store = cls(windows)
+        horizon = max(store.windows)
+        lf = df.lazy().select("step", "amount", *ENTITIES.values())
+        for entity, key in ENTITIES.items():
+            buckets = (
+                lf.group_by(key, "step")
+                .agg(pl.len().cast(pl.Int32).alias("count"), pl.col("amount").sum())
+                .sort(key, "step")
+                .with_columns(newest=(pl.col(key) != pl.col(key).shift(-1)).fill_null(True))
+                .with_columns(last_step=pl.when("newest").then(pl.col("step")).backward_fill())
+                .filter(pl.col("last_step") - pl.col("step") < horizon)
+                .collect()
+            )
+            store.tables[entity].load(buckets.filter("newest"), buckets.filter(~pl.col("newest")), key)
+        return store
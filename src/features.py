@@ -0,0 +1,258 @@
+"""
+Single source of truth for the engineered model features.
+
+Offline (preprocess, extract_ref, training data) and online (inference,
+serve, dashboard) paths all derive features through this module:
+
+ - polars frames (eager or lazy) get the same expressions `preprocess_data`
+   streams through, so they stay in the lazy plan;
+ - pandas frames and NumPy record batches go through one vectorized NumPy
+   kernel;
+ - a single dict (one transaction) goes through a scalar kernel doing the
+   same float64 operations in the same order, so results are bit-identical.
+
+The transform is idempotent: running it on rows that already carry the
+derived columns reproduces them, so scoring paths can always call it.
+"""
+
+import math
+import sys
+
+import numpy as np
+import polars as pl
+
+# Model input columns, in training order
+FEATURE_COLUMNS = [
+    "step",
+    "type",
+    "amount",
+    "oldbalanceOrg",
+    "newbalanceOrig",
+    "oldbalanceDest",
+    "newbalanceDest",
+    "errorBalanceOrig",
+    "errorBalanceDest",
+    "is_large_transaction",
+    "hour",
+    "day",
+]
+RAW_COLUMNS = FEATURE_COLUMNS[:7]
+DERIVED_COLUMNS = FEATURE_COLUMNS[7:]
+
+TYPE_CODES = {"TRANSFER": 0, "CASH_OUT": 1}
+LARGE_TRANSACTION = 200_000
+# Destination balances that are both zero on a non-zero transfer are flagged
+# with this sentinel; the same pattern on the origin side becomes null/NaN.
+DEST_SENTINEL = -1.0
+
+
+# ---------------- polars ---------------- #
+def encode_type_expr() -> pl.Expr:
+    return (
+        pl.when(pl.col("type") == "TRANSFER").then(0)
+          .when(pl.col("type") == "CASH_OUT").then(1)
+          .alias("type")
+          .cast(pl.Int8)
+    )
+
+
+def dest_sentinel_exprs() -> list[pl.Expr]:
+    condition_dest = (
+        (pl.col("oldbalanceDest") == 0) &
+        (pl.col("newbalanceDest") == 0) &
+        (pl.col("amount") != 0)
+    )
+    return [
+        pl.when(condition_dest).then(DEST_SENTINEL).otherwise(pl.col("oldbalanceDest")).alias("oldbalanceDest"),
+        pl.when(condition_dest).then(DEST_SENTINEL).otherwise(pl.col("newbalanceDest")).alias("newbalanceDest"),
+    ]
+
+
+def orig_sentinel_exprs() -> list[pl.Expr]:
+    condition_orig = (
+        (pl.col("oldbalanceOrg") == 0) &
+        (pl.col("newbalanceOrig") == 0) &
+        (pl.col("amount") != 0)
+    )
+    return [
+        pl.when(condition_orig).then(None).otherwise(pl.col("oldbalanceOrg")).alias("oldbalanceOrg"),
+        pl.when(condition_orig).then(None).otherwise(pl.col("newbalanceOrig")).alias("newbalanceOrig"),
+    ]
+
+
+def derived_exprs() -> list[pl.Expr]:
+    return [
+        (pl.col("newbalanceOrig") + pl.col("amount") - pl.col("oldbalanceOrg")).alias("errorBalanceOrig"),
+        (pl.col("oldbalanceDest") + pl.col("amount") - pl.col("newbalanceDest")).alias("errorBalanceDest"),
+        (pl.col("amount") > LARGE_TRANSACTION).cast(pl.Int8).alias("is_large_transaction"),
+        (pl.col("step") % 24).alias("hour"),
+        (pl.col("step") // 24).alias("day"),
+    ]
+
+
+def _transform_polars(df: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
+    lf = df.lazy()
+    if lf.collect_schema()["type"] == pl.Utf8:
+        lf = lf.with_columns(encode_type_expr())
+    lf = lf.with_columns([pl.col(c).cast(pl.Float64) for c in RAW_COLUMNS[2:]])
+    lf = lf.with_columns(dest_sentinel_exprs())
+    lf = lf.with_columns(orig_sentinel_exprs())
+    lf = lf.with_columns(derived_exprs())
+    return lf.collect() if isinstance(df, pl.DataFrame) else lf
+
+
+# ---------------- NumPy (vectorized) ---------------- #
+def _encode_type_array(values) -> np.ndarray:
+    values = np.asarray(values)
+    if values.dtype.kind in "iufb":
+        return values.astype(np.float64)
+    out = np.full(values.shape, np.nan)
+    for name, code in TYPE_CODES.items():
+        out[values == name] = code
+    return out
+
+
+def engineer_arrays(cols: dict) -> dict[str, np.ndarray]:
+    """
+    Vectorized kernel: raw column arrays in, all FEATURE_COLUMNS out (float64).
+    Missing values are NaN (the polars path's null).
+    """
+    step = np.asarray(cols["step"], dtype=np.float64)
+    amount = np.asarray(cols["amount"], dtype=np.float64)
+    old_orig = np.array(cols["oldbalanceOrg"], dtype=np.float64)
+    new_orig = np.array(cols["newbalanceOrig"], dtype=np.float64)
+    old_dest = np.array(cols["oldbalanceDest"], dtype=np.float64)
+    new_dest = np.array(cols["newbalanceDest"], dtype=np.float64)
+
+    condition_dest = (old_dest == 0) & (new_dest == 0) & (amount != 0)
+    old_dest[condition_dest] = DEST_SENTINEL
+    new_dest[condition_dest] = DEST_SENTINEL
+
+    condition_orig = (old_orig == 0) & (new_orig == 0) & (amount != 0)
+    old_orig[condition_orig] = np.nan
+    new_orig[condition_orig] = np.nan
+
+    return {
+        "step": step,
+        "type": _encode_type_array(cols["type"]),
+        "amount": amount,
+        "oldbalanceOrg": old_orig,
+        "newbalanceOrig": new_orig,
+        "oldbalanceDest": old_dest,
+        "newbalanceDest": new_dest,
+        "errorBalanceOrig": new_orig + amount - old_orig,
+        "errorBalanceDest": old_dest + amount - new_dest,
+        "is_large_transaction": (amount > LARGE_TRANSACTION).astype(np.float64),
+        "hour": step % 24,
+        "day": step // 24,
+    }
+
+
+# ---------------- single transaction ---------------- #
+def _float(value) -> float:
+    return math.nan if value is None else float(value)
+
+
+def engineer_row(tx: dict) -> dict[str, float]:
+    """Scalar kernel for one transaction; same operations as `engineer_arrays`."""
+    step = _float(tx["step"])
+    amount = _float(tx["amount"])
+    old_orig = _float(tx["oldbalanceOrg"])
+    new_orig = _float(tx["newbalanceOrig"])
+    old_dest = _float(tx["oldbalanceDest"])
+    new_dest = _float(tx["newbalanceDest"])
+
+    tx_type = tx["type"]
+    if isinstance(tx_type, str):
+        tx_type = TYPE_CODES.get(tx_type, math.nan)
+
+    if old_dest == 0 and new_dest == 0 and amount != 0:
+        old_dest = new_dest = DEST_SENTINEL
+    if old_orig == 0 and new_orig == 0 and amount != 0:
+        old_orig = new_orig = math.nan
+
+    return {
+        "step": step,
+        "type": _float(tx_type),
+        "amount": amount,
+        "oldbalanceOrg": old_orig,
+        "newbalanceOrig": new_orig,
+        "oldbalanceDest": old_dest,
+        "newbalanceDest": new_dest,
+        "errorBalanceOrig": new_orig + amount - old_orig,
+        "errorBalanceDest": old_dest + amount - new_dest,
+        "is_large_transaction": float(amount > LARGE_TRANSACTION),
+        "hour": step % 24,
+        "day": step // 24,
+    }
+
+
+def fill_row(out: np.ndarray, tx: dict) -> np.ndarray:
+    """Write one transaction's features into `out` (length 12) in FEATURE_COLUMNS order."""
+    row = engineer_row(tx)
+    for i, name in enumerate(FEATURE_COLUMNS):
+        out[i] = row[name]
+    return out
+
+
+# ---------------- dispatch ---------------- #
+def _is_pandas(data) -> bool:
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(data, pd.DataFrame)
+
+
+def transform(data):
+    """
+    Add/refresh the engineered columns on `data`, returning the same kind of
+    object: polars DataFrame/LazyFrame, pandas DataFrame, NumPy record batch
+    (structured array) or a single-transaction dict.
+    """
+    if isinstance(data, (pl.DataFrame, pl.LazyFrame)):
+        return _transform_polars(data)
+    if isinstance(data, dict):
+        return {**data, **engineer_row(data)}
+    if _is_pandas(data):
+        return data.assign(**engineer_arrays({c: data[c].to_numpy() for c in RAW_COLUMNS}))
+    if isinstance(data, np.ndarray) and data.dtype.names:
+        out = engineer_arrays({c: data[c] for c in RAW_COLUMNS})
+        extra = [n for n in data.dtype.names if n not in out]
+        dtype = [(n, data.dtype[n]) for n in extra] + [(n, np.float64) for n in FEATURE_COLUMNS]
+        result = np.empty(data.shape, dtype=dtype)
+        for n in extra:
+            result[n] = data[n]
+        for n in FEATURE_COLUMNS:
+            result[n] = out[n]
+        return result
+    raise TypeError(f"Unsupported input type for feature transform: {type(data).__name__}")
+
+
+def to_matrix(data, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Engineered features as a float32 (n, 12) matrix in FEATURE_COLUMNS order,
+    ready for the booster. Besides the `transform` inputs this accepts a plain
+    2-D array whose first columns are RAW_COLUMNS. `out` may be a
+    preallocated buffer to fill.
+    """
+    if isinstance(data, dict):
+        X = out[:1] if out is not None else np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float32)
+        fill_row(X[0], data)
+        return X
+
+    if isinstance(data, (pl.DataFrame, pl.LazyFrame)):
+        df = _transform_polars(data.lazy()).select(FEATURE_COLUMNS).collect()
+        cols = {c: df[c].to_numpy() for c in FEATURE_COLUMNS}
+    elif _is_pandas(data):
+        cols = engineer_arrays({c: data[c].to_numpy() for c in RAW_COLUMNS})
+    elif isinstance(data, np.ndarray) and data.dtype.names:
+        cols = engineer_arrays({c: data[c] for c in RAW_COLUMNS})
+    elif isinstance(data, np.ndarray) and data.ndim == 2:
+        # Plain matrix whose leading columns follow FEATURE_COLUMNS order
+        cols = engineer_arrays({c: data[:, i] for i, c in enumerate(RAW_COLUMNS)})
+    else:
+        raise TypeError(f"Unsupported input type for feature transform: {type(data).__name__}")
+
+    n = len(cols["step"])
+    X = out[:n] if out is not None else np.empty((n, len(FEATURE_COLUMNS)), dtype=np.float32)
+    for i, name in enumerate(FEATURE_COLUMNS):
+        X[:, i] = cols[name]
+    return X
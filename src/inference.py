@@ -1,39 +1,231 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import joblib
-import pandas as pd
+import numpy as np
+import polars as pl
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from pathlib import Path
 from utils.logger import logger
+from utils.instrument import span
+from features import FEATURE_COLUMNS, to_matrix, transform
+from compiled_model import CompiledModel
+from registry import ModelRegistry, HotModel
+from shadow import ShadowModel, load_candidate
+from pred_cache import CachedModel
 
 BASE = Path(__file__).resolve().parent
 MODEL_PATH = (BASE / ".." / "models" / "xgb_model.joblib").resolve()
 INPUT_PATH = (BASE / ".." / "data" / "input_data.csv").resolve()
 OUTPUT_PATH = (BASE / ".." / "monitoring" / "production.csv").resolve()
 
-def load_model():
-    logger.info(f"Loading model from {MODEL_PATH}")
-    return joblib.load(MODEL_PATH)
+# Feature columns expected by model, in training order
+columns_needed = FEATURE_COLUMNS
 
-def predict(model, data: pd.DataFrame):
-    logger.info("Making prediction...")
-    pred = model.predict(data)
-    proba = model.predict_proba(data)
-    return pred, proba
+def load_model(path: Path | None = None, watch: bool = True, kind: str = "joblib",
+               registry: ModelRegistry | None = None):
+    """
+    Load a model artifact. `.npz` files written by `train.save_model` load
+    as a `CompiledModel` (NumPy only, no sklearn/xgboost import); anything
+    else is the joblib-pickled XGBClassifier.
 
-if __name__ == "__main__":
-    logger.info("Running batch inference for monitoring...")
+    Without `path`, the registry's current version is used (falling back to
+    MODEL_PATH when nothing is registered). With `watch=True` that returns a
+    `HotModel`, which follows the registry pointer and swaps in newly
+    promoted versions in the background.
+    """
+    registry = registry or ModelRegistry()
+    if path is None and registry.current_version() is not None:
+        logger.info("Loading model version %s from registry %s", registry.current_version(), registry.root)
+        return HotModel(registry, kind=kind) if watch else registry.load(kind=kind)
+
+    path = path or MODEL_PATH
+    logger.info("Loading model from %s", path)
+    if Path(path).suffix == ".npz":
+        return CompiledModel.load(path)
+    return joblib.load(path)
+
+@span("predict")
+def predict(model, data):
+    """
+    Score `data` (pandas/polars frame, record batch or one transaction dict).
+    Features are (re)derived through `features` so online and offline agree.
+    """
+    logger.debug("Making prediction...")
+    pred, proba = score_array(model, to_matrix(data))
+    return pred, np.column_stack([1.0 - proba, proba])
+
+def score_array(model, X: np.ndarray, threshold: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Score a float32 matrix laid out in `columns_needed` order.
+
+    Goes straight to the booster (no DataFrame, no sklearn wrapper) and
+    traverses the trees once: returns (label, fraud probability). A
+    `ShadowModel` serves the call and queues the comparison with its candidate;
+    a `CachedModel` only scores the rows it has no cached probability for.
+    """
+    if isinstance(model, CachedModel):
+        return model.score(X, threshold)
+    if isinstance(model, ShadowModel):
+        return model.score(X, threshold)
+    if isinstance(model, HotModel):
+        model = model.model
+    if isinstance(model, CompiledModel):
+        return model.predict(X, threshold)
+    proba = model.get_booster().inplace_predict(X, validate_features=False)
+    return (proba > threshold).astype(np.int8), proba
+
+def score_frame(model, df: pl.DataFrame) -> pl.DataFrame:
+    """Engineer features for one record batch and append prediction columns."""
+    df = transform(df)
+    pred, proba = score_array(model, to_matrix(df))
+    return df.with_columns(
+        pl.Series("prediction", pred.astype(np.int64)),
+        pl.Series("fraud_proba", proba),
+    )
+
+def _record_batches(path: Path, batch_size: int, skip_rows: int = 0):
+    """
+    Stream `path` as polars frames of exactly `batch_size` rows (the last may
+    be shorter), starting `skip_rows` data rows in. Parsing is done by
+    pyarrow's multi-threaded streaming CSV reader, so memory stays bounded.
+    """
+    # Pin the money columns so a block of whole numbers can't be inferred as int
+    numeric = {c: pa.float64() for c in FEATURE_COLUMNS if "balance" in c.lower() or c == "amount"}
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=16 << 20, skip_rows_after_names=skip_rows),
+        convert_options=pa_csv.ConvertOptions(column_types=numeric),
+    )
+    pending, n_pending = [], 0
+    for block in reader:
+        pending.append(block)
+        n_pending += block.num_rows
+        while n_pending >= batch_size:
+            table = pa.Table.from_batches(pending)
+            yield pl.from_arrow(table.slice(0, batch_size))
+            rest = table.slice(batch_size)
+            pending, n_pending = rest.to_batches(), rest.num_rows
+    if n_pending:
+        yield pl.from_arrow(pa.Table.from_batches(pending))
+
+def _checkpoint_path(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + ".ckpt.json")
+
+def _write_checkpoint(path: Path, state: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
 
+def run_batch(model, input_path: Path = INPUT_PATH, output_path: Path = OUTPUT_PATH,
+              batch_size: int = 100_000, workers: int = 4, fmt: str = "csv", resume: bool = True) -> int:
+    """
+    Score an arbitrarily large CSV in fixed-size record batches.
+
+    Batches are scored on a pool of `workers` threads and written to
+    `output_path` in input order as they complete: appended to one CSV, or as
+    numbered part files under a directory for `fmt="parquet"`. At most
+    2 * workers batches are in flight, so memory is bounded by batch size,
+    not file size. After each batch a checkpoint records how many rows are
+    durable; with `resume=True` a rerun truncates any partial output and
+    continues from there. Returns the number of rows written.
+    """
+    input_path, output_path = Path(input_path), Path(output_path)
+    ckpt_path = _checkpoint_path(output_path)
+    state = {"input": str(input_path), "batch_size": batch_size, "rows_done": 0, "batches_done": 0, "output_bytes": 0}
+    if resume and ckpt_path.exists():
+        with open(ckpt_path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("input") == str(input_path) and saved.get("batch_size") == batch_size:
+            state = saved
+            logger.info("Resuming batch inference at row %d from %s", state["rows_done"], ckpt_path)
+    if fmt == "csv" and (not output_path.exists() or output_path.stat().st_size < state["output_bytes"]):
+        # Checkpoint without the output it describes: start over
+        state.update(rows_done=0, batches_done=0, output_bytes=0)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        output_path.mkdir(parents=True, exist_ok=True)
+        for part in output_path.glob("part-*.parquet"):
+            if int(part.stem.split("-")[1]) >= state["batches_done"]:
+                part.unlink()
+        sink = None
+    else:
+        sink = open(output_path, "r+b" if state["output_bytes"] and output_path.exists() else "wb")
+        sink.truncate(state["output_bytes"])
+        sink.seek(state["output_bytes"])
+
+    def write(df: pl.DataFrame) -> None:
+        if fmt == "parquet":
+            df.write_parquet(output_path / f"part-{state['batches_done']:06d}.parquet")
+        else:
+            df.write_csv(sink, include_header=state["output_bytes"] == 0)
+            sink.flush()
+            os.fsync(sink.fileno())
+            state["output_bytes"] = sink.tell()
+        state["rows_done"] += df.height
+        state["batches_done"] += 1
+        _write_checkpoint(ckpt_path, state)
+
+    start, rows_at_start = time.perf_counter(), state["rows_done"]
+    in_flight = deque()
     try:
-        new_data = pd.read_csv(INPUT_PATH)
-        logger.info(f"Loaded input data from {INPUT_PATH}, shape: {new_data.shape}")
-    except FileNotFoundError:
-        logger.error(f"Input file not found: {INPUT_PATH}")
-        exit()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for batch in _record_batches(input_path, batch_size, skip_rows=state["rows_done"]):
+                in_flight.append(pool.submit(score_frame, model, batch))
+                if len(in_flight) >= 2 * workers:
+                    write(in_flight.popleft().result())
+                    _log_rate(state["rows_done"] - rows_at_start, start)
+            while in_flight:
+                write(in_flight.popleft().result())
+    finally:
+        if sink is not None:
+            sink.close()
 
-    model = load_model()
-    y_pred, y_proba = predict(model, new_data)
+    _log_rate(state["rows_done"] - rows_at_start, start)
+    ckpt_path.unlink(missing_ok=True)
+    logger.info("Saved predictions for %d rows to %s", state["rows_done"], output_path)
+    return state["rows_done"]
 
-    new_data["prediction"] = y_pred
-    new_data["fraud_proba"] = y_proba[:, 1]
+def _log_rate(rows: int, start: float) -> None:
+    elapsed = time.perf_counter() - start
+    logger.info("Scored %d rows in %.1fs (%.0f rows/s)", rows, elapsed, rows / max(elapsed, 1e-9))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch inference for monitoring.")
+    parser.add_argument("--input", type=Path, default=INPUT_PATH)
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any checkpoint and start over")
+    parser.add_argument("--shadow", default=None, help="Candidate model (registry version or file) to compare in shadow")
+    parser.add_argument("--canary-percent", type=float, default=0.0, help="Percent of rows scored by the candidate")
+    args = parser.parse_args()
+
+    logger.info("Running batch inference for monitoring...")
+    if not args.input.exists():
+        logger.error("Input file not found: %s", args.input)
+        exit()
 
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    new_data.to_csv(OUTPUT_PATH, index=False)
-    logger.info(f"Saved predictions to {OUTPUT_PATH}")
+    # Pin one version for the whole run so every row is scored by the same model
+    model = load_model(watch=False)
+    if args.shadow:
+        model = ShadowModel(model, load_candidate(args.shadow), canary_percent=args.canary_percent,
+                            shadow_version=args.shadow)
+    start = time.perf_counter()
+    rows = run_batch(model, args.input, args.output, batch_size=args.batch_size,
+                     workers=args.workers, fmt=args.format, resume=not args.no_resume)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Scored {rows:,} rows at {rows / max(elapsed, 1e-9):,.0f} rows/s → {args.output}")
+    if isinstance(model, ShadowModel):
+        model.close()
+        shadow = model.stats()
+        print(f"🌓 Shadow {args.shadow}: {shadow['rows']:,} rows compared, "
+              f"disagreement {shadow['disagreement_rate']:.4%}, score PSI {shadow['score_psi']:.4f}")
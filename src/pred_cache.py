@@ -0,0 +1,300 @@
+"""
+Prediction cache in front of the model.
+
+Retries, replays and re-submitted dashboard forms score the same
+transactions over and over. `CachedModel` wraps a model (plain or
+`HotModel`) and is accepted anywhere a model is (`inference.predict`,
+`score_array`, serve.py). Rows are looked up before anything is scored, and
+only the misses reach the wrapped model.
+
+A `ShadowModel` goes on top of the cache, never under it: it has to see
+every call to compare it, and the scores it serves to canary rows come
+from another model than the version the key names.
+
+ - Key: the model version plus the bytes of the canonical feature row, i.e.
+   the float32 row `features.to_matrix` builds in `columns_needed` order,
+   with -0.0 folded into 0.0 and every NaN into one bit pattern. Raw
+   transactions that derive the same model input share an entry.
+ - Memory tier: a bounded LRU (OrderedDict) with a TTL per entry.
+ - Shared tier (optional): a SQLite table in WAL mode that several worker
+   processes can share; on /dev/shm it is RAM-backed. Memory misses are
+   looked up there before scoring, and scored rows are written to both.
+ - Invalidation: entries carry the model version, so a swapped-in model
+   never reads an old score; with a `HotModel` underneath, a swap also
+   clears the memory tier and deletes the old version's shared rows.
+
+Only probabilities are cached; labels are recomputed against the caller's
+threshold. Calls with more than `bypass_rows` rows (batch scoring) skip
+the cache.
+
+    python src/serve.py --cache-size 100000 --cache-ttl 300 [--cache-db /dev/shm/breeboost-cache.db]
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from shadow import ShadowModel
+from utils.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    key        BLOB PRIMARY KEY,
+    version    TEXT NOT NULL,
+    proba      REAL NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_predictions_expires ON predictions (expires_at);
+"""
+SQLITE_MAX_PARAMS = 900
+
+
+def model_version(model) -> str:
+    """The registry version of a (wrapped) model, else a content hash of its booster."""
+    version = getattr(model, "version", None)
+    if version:
+        return str(version)
+    node = model
+    while node is not None and not hasattr(node, "get_booster") and not hasattr(node, "save_raw"):
+        node = getattr(node, "model", None)
+    if node is None:
+        return f"object-{id(model):x}"  # not stable across processes: memory tier only
+    booster = node.get_booster() if hasattr(node, "get_booster") else node
+    return hashlib.sha256(bytes(booster.save_raw("ubj"))).hexdigest()[:16]
+
+
+def canonical_rows(X: np.ndarray) -> np.ndarray:
+    """Float32 rows with one representation per value: no -0.0, a single NaN."""
+    C = np.ascontiguousarray(X, dtype=np.float32) + np.float32(0.0)  # -0.0 + 0.0 == +0.0
+    nan = np.isnan(C)
+    if nan.any():
+        C[nan] = np.float32("nan")
+    return C
+
+
+class SharedTier:
+    """Cross-process cache tier in a SQLite file (one connection per thread and process)."""
+
+    def __init__(self, path: str | Path, max_entries: int = 1_000_000, timeout: float = 5.0):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # a cache: losing the tail on a crash is fine
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get_many(self, keys: list[bytes], now: float) -> dict:
+        found = {}
+        conn = self._conn()
+        for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+            chunk = keys[start:start + SQLITE_MAX_PARAMS]
+            rows = conn.execute(
+                f"SELECT key, proba FROM predictions WHERE key IN ({','.join('?' * len(chunk))}) AND expires_at > ?",
+                (*chunk, now),
+            )
+            found.update(rows.fetchall())
+        return found
+
+    def put_many(self, rows: list[tuple]) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)", rows)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._writes += len(rows)
+        if self._writes >= max(self.max_entries // 10, 1):
+            self._writes = 0
+            self.trim()
+
+    def trim(self, now: float | None = None) -> None:
+        """Drop expired rows, then the soonest-expiring ones beyond `max_entries`."""
+        conn = self._conn()
+        conn.execute("DELETE FROM predictions WHERE expires_at <= ?", (time.time() if now is None else now,))
+        conn.execute(
+            "DELETE FROM predictions WHERE key IN (SELECT key FROM predictions ORDER BY expires_at "
+            "LIMIT max((SELECT count(*) FROM predictions) - ?, 0))",
+            (self.max_entries,),
+        )
+
+    def drop_other_versions(self, version: str) -> None:
+        self._conn().execute("DELETE FROM predictions WHERE version != ?", (version,))
+
+
+class CachedModel:
+    """
+    A model with an LRU/TTL prediction cache in front of it.
+
+    `max_entries` bounds the memory tier; entries older than `ttl_seconds`
+    are treated as misses. `shared_path` enables the SQLite tier.
+    """
+
+    def __init__(self, model, max_entries: int = 100_000, ttl_seconds: float = 300.0,
+                 shared_path: str | Path | None = None, shared_max_entries: int = 1_000_000,
+                 bypass_rows: int = 4096):
+        from inference import score_array  # inference dispatches to CachedModel, so import late
+
+        if isinstance(model, ShadowModel):
+            raise TypeError("Wrap the cache in the ShadowModel (ShadowModel(CachedModel(primary), candidate)), "
+                            "not the other way round")
+        self._score = score_array
+        self.inner = model
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.bypass_rows = bypass_rows
+        self.shared = SharedTier(shared_path, shared_max_entries) if shared_path else None
+        self._entries: "OrderedDict[bytes, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._set_version(model_version(model))
+        self.counters = dict.fromkeys(["hits", "shared_hits", "misses", "bypassed", "evictions", "expired",
+                                       "invalidations"], 0)
+        self._miss_seconds = 0.0  # time spent scoring misses, for the saved-latency estimate
+        self._lookup_seconds = 0.0
+
+        # Follow model swaps: the innermost HotModel tells us when the version changes
+        node = model
+        while node is not None and not hasattr(node, "subscribe"):
+            node = getattr(node, "model", None) or getattr(node, "primary", None)
+        if node is not None:
+            node.subscribe(self._on_swap)
+
+    # sklearn-style passthroughs, like HotModel
+    @property
+    def model(self):
+        return self.inner
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    def get_booster(self):
+        return self.inner.get_booster()
+
+    def _set_version(self, version: str) -> None:
+        self._version = version
+        self._prefix = version.encode() + b"\0"
+
+    def _on_swap(self, old: str, new: str) -> None:
+        with self._lock:
+            self._set_version(model_version(self.inner))
+            self._entries.clear()
+            self.counters["invalidations"] += 1
+        if self.shared is not None:
+            self.shared.drop_other_versions(self._version)
+        logger.info("Prediction cache invalidated on model swap %s -> %s", old, new)
+
+    # ---------------- scoring ---------------- #
+    def score(self, X: np.ndarray, threshold: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+        if len(X) > self.bypass_rows:
+            self._tally(bypassed=len(X))
+            return self._score(self.inner, X, threshold)
+
+        start = time.perf_counter()
+        now = time.time()
+        rows = canonical_rows(X)
+        width = rows.shape[1] * 4
+        buf, prefix, version = rows.tobytes(), self._prefix, self._version
+        keys = [prefix + buf[i:i + width] for i in range(0, len(buf), width)]
+
+        proba = np.empty(len(keys), dtype=np.float32)
+        missing = []
+        with self._lock:
+            entries = self._entries
+            for i, key in enumerate(keys):
+                entry = entries.get(key)
+                if entry is not None and entry[1] > now:
+                    entries.move_to_end(key)
+                    proba[i] = entry[0]
+                else:
+                    if entry is not None:
+                        del entries[key]
+                        self.counters["expired"] += 1
+                    missing.append(i)
+            self.counters["hits"] += len(keys) - len(missing)
+
+        if missing and self.shared is not None:
+            found = self.shared.get_many([keys[i] for i in missing], now)
+            if found:
+                self._remember([(keys[i], found[keys[i]], now + self.ttl) for i in missing if keys[i] in found])
+                for i in missing:
+                    if keys[i] in found:
+                        proba[i] = found[keys[i]]
+                missing = [i for i in missing if keys[i] not in found]
+            self._tally(shared_hits=len(found))
+        self._tally(lookup_seconds=time.perf_counter() - start)
+
+        if missing:
+            scored_at = time.perf_counter()
+            idx = np.asarray(missing)
+            fresh = self._score(self.inner, X[idx] if len(idx) < len(X) else X, threshold)[1]
+            proba[idx] = fresh
+            self._tally(miss_seconds=time.perf_counter() - scored_at, misses=len(missing))
+            expires = now + self.ttl
+            new = [(keys[i], float(p), expires) for i, p in zip(missing, fresh)]
+            self._remember(new)
+            if self.shared is not None:
+                self.shared.put_many([(key, version, p, exp) for key, p, exp in new])
+        return (proba > threshold).astype(np.int8), proba
+
+    def _tally(self, lookup_seconds: float = 0.0, miss_seconds: float = 0.0, **counts: int) -> None:
+        """Add to the counters and timers; concurrent requests score from several threads."""
+        with self._lock:
+            for name, n in counts.items():
+                self.counters[name] += n
+            self._lookup_seconds += lookup_seconds
+            self._miss_seconds += miss_seconds
+
+    def _remember(self, entries: list[tuple]) -> None:
+        with self._lock:
+            for key, p, expires in entries:
+                self._entries[key] = (p, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    # ---------------- reporting ---------------- #
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+            miss_seconds, lookup_seconds, entries = self._miss_seconds, self._lookup_seconds, len(self._entries)
+        hits = c["hits"] + c["shared_hits"]
+        lookups = hits + c["misses"]
+        per_miss = miss_seconds / c["misses"] if c["misses"] else 0.0
+        per_lookup = lookup_seconds / lookups if lookups else 0.0
+        return {
+            "model_version": self._version,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            **c,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "miss_ms_per_row": 1e3 * per_miss,
+            "lookup_ms_per_row": 1e3 * per_lookup,
+            # What the hits would have cost to score, less what every lookup cost
+            "saved_ms": 1e3 * (hits * per_miss - lookups * per_lookup),
+        }
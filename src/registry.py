@@ -0,0 +1,259 @@
+"""
+Local file-backed model registry.
+
+Layout under models/registry/:
+
+    versions/<version>/model.joblib   sklearn-wrapped classifier
+    versions/<version>/model.ubj      booster (UBJSON)
+    versions/<version>/model.npz      compiled trees (see compiled_model)
+    versions/<version>/meta.json      AUPRC, features, training-data hash, ...
+    CURRENT                           version id being served
+    history.jsonl                     promotions, newest last (for rollback)
+
+Versions are content hashes of the booster, so re-registering the same
+model is a no-op. CURRENT is swapped with an atomic rename; `HotModel`
+watches it and swaps models in the background without pausing callers.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import joblib
+
+from compiled_model import CompiledModel, compile_booster
+from utils.logger import logger
+
+BASE = Path(__file__).resolve().parent.parent
+REGISTRY_DIR = BASE / "models" / "registry"
+ARTIFACTS = {"joblib": "model.joblib", "compiled": "model.npz", "booster": "model.ubj"}
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    def __init__(self, root: Path = REGISTRY_DIR, keep_warm: int = 3):
+        self.root = Path(root)
+        self.keep_warm = keep_warm
+        self._warm: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def pointer(self) -> Path:
+        return self.root / "CURRENT"
+
+    def _version_dir(self, version: str) -> Path:
+        return self.root / "versions" / version
+
+    # ---------------- writing ---------------- #
+    def register(self, model, metadata: dict | None = None, promote: bool = True) -> str:
+        """Store `model` (an XGBClassifier) as a new version; optionally make it current."""
+        raw = model.get_booster().save_raw("ubj")
+        version = hashlib.sha256(bytes(raw)).hexdigest()[:16]
+        target = self._version_dir(version)
+
+        if not target.exists():
+            staging = self.root / "versions" / f".{version}.tmp"
+            shutil.rmtree(staging, ignore_errors=True)
+            staging.mkdir(parents=True)
+            joblib.dump(model, staging / "model.joblib")
+            (staging / "model.ubj").write_bytes(bytes(raw))
+            compile_booster(model).save(staging / "model.npz")
+            meta = {
+                "version": version,
+                "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                **(metadata or {}),
+            }
+            with open(staging / "meta.json", "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2, default=str)
+            os.replace(staging, target)
+            logger.info(f"Registered model version {version}")
+        else:
+            logger.info(f"Model version {version} already registered")
+
+        if promote:
+            self.promote(version)
+        return version
+
+    def promote(self, version: str) -> None:
+        """Atomically point CURRENT at `version`."""
+        if not self._version_dir(version).exists():
+            raise KeyError(f"Unknown model version: {version}")
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / "history.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps({"version": version, "promoted_at": time.time()}) + "\n")
+        _atomic_write(self.pointer, version + "\n")
+        logger.info(f"Promoted model version {version}")
+
+    def rollback(self, steps: int = 1) -> str:
+        """Re-promote the version that was current `steps` promotions ago."""
+        history = [h["version"] for h in self.history()]
+        # Collapse repeated promotions of the same version
+        distinct = [v for i, v in enumerate(history) if i == 0 or v != history[i - 1]]
+        if len(distinct) <= steps:
+            raise RuntimeError("No earlier version to roll back to")
+        version = distinct[-1 - steps]
+        self.promote(version)
+        return version
+
+    # ---------------- reading ---------------- #
+    def current_version(self) -> str | None:
+        try:
+            return self.pointer.read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def history(self) -> list[dict]:
+        path = self.root / "history.jsonl"
+        if not path.exists():
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def metadata(self, version: str) -> dict:
+        with open(self._version_dir(version) / "meta.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def versions(self) -> list[dict]:
+        root = self.root / "versions"
+        if not root.exists():
+            return []
+        metas = [self.metadata(p.name) for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")]
+        return sorted(metas, key=lambda m: m["created_at"])
+
+    def artifact_path(self, version: str, kind: str = "joblib") -> Path:
+        return self._version_dir(version) / ARTIFACTS[kind]
+
+    def load(self, version: str | None = None, kind: str = "joblib"):
+        """Load a version (default: current), served from the warm cache when possible."""
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No current model in registry {self.root}")
+        key = (version, kind)
+        with self._lock:
+            if key in self._warm:
+                self._warm.move_to_end(key)
+                return self._warm[key]
+
+        path = self.artifact_path(version, kind)
+        if kind == "compiled":
+            model = CompiledModel.load(path)
+        elif kind == "booster":
+            import xgboost as xgb
+            model = xgb.Booster(model_file=str(path))
+        else:
+            model = joblib.load(path)
+
+        with self._lock:
+            self._warm[key] = model
+            while len(self._warm) > self.keep_warm:
+                self._warm.popitem(last=False)
+        return model
+
+
+class HotModel:
+    """
+    A model handle that follows the registry's CURRENT pointer.
+
+    A daemon thread polls the pointer; a new version is loaded off the
+    request path and then swapped in with a single reference assignment, so
+    callers never wait on a reload. Read `.model` once per request and use
+    that object for the whole request.
+    """
+
+    def __init__(self, registry: ModelRegistry, kind: str = "joblib", poll_interval: float = 2.0):
+        self.registry = registry
+        self.kind = kind
+        self.poll_interval = poll_interval
+        self._callbacks: list[Callable[[str, str], None]] = []
+        version = registry.current_version()
+        self._current = (version, registry.load(version, kind))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def model(self):
+        return self._current[1]
+
+    @property
+    def version(self) -> str:
+        return self._current[0]
+
+    def subscribe(self, callback: Callable[[str, str], None]) -> None:
+        """Call `callback(old_version, new_version)` after each swap."""
+        self._callbacks.append(callback)
+
+    def refresh(self) -> bool:
+        """Swap to the pointer's version if it changed. Returns True on swap."""
+        version = self.registry.current_version()
+        old = self._current[0]
+        if version is None or version == old:
+            return False
+        model = self.registry.load(version, self.kind)
+        self._current = (version, model)
+        logger.info(f"Hot-swapped model {old} -> {version}")
+        for callback in self._callbacks:
+            callback(old, version)
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the current model; try again next poll
+                logger.error(f"Model reload failed: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+
+    # sklearn-style passthroughs so a HotModel can stand in for the model
+    def get_booster(self):
+        return self.model.get_booster()
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and manage the model registry.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list")
+    sub.add_parser("current")
+    promote = sub.add_parser("promote")
+    promote.add_argument("version")
+    rollback = sub.add_parser("rollback")
+    rollback.add_argument("--steps", type=int, default=1)
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    if args.cmd == "list":
+        current = registry.current_version()
+        for meta in registry.versions():
+            marker = "*" if meta["version"] == current else " "
+            print(f"{marker} {meta['version']}  {meta['created_at']}  AUPRC={meta.get('auprc', 'n/a')}")
+    elif args.cmd == "current":
+        print(registry.current_version())
+    elif args.cmd == "promote":
+        registry.promote(args.version)
+    else:
+        print(f"Rolled back to {registry.rollback(args.steps)}")
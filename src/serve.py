@@ -0,0 +1,301 @@
+"""
+Long-lived HTTP scoring service.
+
+Loads the model once and scores JSON transactions without going through
+pandas: request fields go through `features` (so raw transactions get the
+same derived columns as training) straight into a preallocated float32
+matrix in `columns_needed` order and are handed to the booster.
+
+Endpoints:
+  POST /score        one transaction as a JSON object (raw PaySim fields;
+                     `type` may be "TRANSFER"/"CASH_OUT" or its code)
+  POST /score/batch  {"transactions": [{...}, ...]} or {"rows": [[...], ...]}
+                     (rows in `columns_needed` order)
+  GET  /stats        request counts and p50/p99 latency
+  GET  /metrics      Prometheus text format: request latency histograms,
+                     pipeline spans (`utils.instrument`) and the /stats values
+  GET  /health
+
+With --micro-batch, concurrent /score requests are coalesced into one model
+call by `batcher.MicroBatcher`. With --shadow, a candidate model is scored
+on the same traffic off the request path (`shadow.ShadowModel`), optionally
+serving a --canary-percent of rows; /stats then includes the comparison.
+With --cache-size, repeated transactions are answered from a prediction
+cache (`pred_cache.CachedModel`, shared between workers with --cache-db);
+/stats then includes its hit rate and the latency it saved. With
+--velocity, transactions carrying `nameOrig`/`nameDest` get the accounts'
+velocity features as of before them (`feature_store.FeatureStore`,
+warm-started from --velocity-history). Like the training data, only
+TRANSFER and CASH_OUT transactions are recorded, each once: a retry of the
+same transaction (same `transaction_id`, or step, accounts and amount) gets
+its first answer back. The features are returned next to the score; they
+are not model inputs yet.
+
+    python src/serve.py --port 8000 [--micro-batch --max-batch-size 256 --max-wait-ms 2]
+    python src/serve.py --shadow <version or model path> [--canary-percent 5]
+    python src/serve.py --cache-size 100000 --cache-ttl 300 [--cache-db /dev/shm/breeboost-cache.db]
+    python src/serve.py --velocity [--velocity-history data/raw/PS_20174392719_1491204439457_log.csv]
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from batcher import MicroBatcher, start_in_thread
+from data_preprocess import scan_raw_data
+from feature_store import ENTITIES, FeatureStore
+from features import TYPE_CODES, fill_row, to_matrix
+from inference import load_model, score_array, columns_needed, MODEL_PATH
+from pred_cache import CachedModel
+from shadow import SHADOW_LOG, ShadowModel, load_candidate
+from utils.instrument import histogram, register_collector, render
+from utils.latency import LatencyWindow
+from utils.logger import logger
+
+N_FEATURES = len(columns_needed)
+RECORDED_TYPES = set(TYPE_CODES) | set(TYPE_CODES.values())  # by name or code
+REQUEST_SECONDS = {kind: histogram("serve_request_seconds", "Request latency, parse to response", kind=kind)
+                   for kind in ("single", "batch")}
+
+
+class Scorer:
+    """Holds the model and per-thread feature buffers."""
+
+    def __init__(self, model, batch_capacity: int = 8192, batcher: MicroBatcher | None = None,
+                 feature_store: FeatureStore | None = None):
+        self.model = model
+        self.batcher = batcher
+        self.feature_store = feature_store
+        self._loop = start_in_thread(batcher) if batcher is not None else None
+        self.batch_capacity = batch_capacity
+        self._local = threading.local()
+        self.latency = {
+            "single_model": LatencyWindow(),
+            "single_total": LatencyWindow(),
+            "batch_model": LatencyWindow(),
+            "batch_total": LatencyWindow(),
+        }
+        self.rows_scored = 0
+        self._count_lock = threading.Lock()
+
+    def _buffer(self, n: int) -> np.ndarray:
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[0] < n:
+            buf = np.empty((max(n, self.batch_capacity), N_FEATURES), dtype=np.float32)
+            self._local.buf = buf
+        return buf[:n]
+
+    def features_from_json(self, transactions: list[dict]) -> np.ndarray:
+        X = self._buffer(len(transactions))
+        for i, tx in enumerate(transactions):
+            fill_row(X[i], tx)
+        return X
+
+    def score(self, X: np.ndarray, kind: str) -> tuple[np.ndarray, np.ndarray]:
+        start = time.perf_counter()
+        pred, proba = score_array(self.model, X)
+        self.latency[f"{kind}_model"].record((time.perf_counter() - start) * 1e3)
+        with self._count_lock:
+            self.rows_scored += len(X)
+        return pred, proba
+
+    def velocity(self, tx: dict) -> dict | None:
+        """Record `tx` in the feature store; its accounts' features from before it (NaN as null)."""
+        if self.feature_store is None or not all(key in tx for key in ENTITIES.values()):
+            return None
+        if tx.get("type") in RECORDED_TYPES:
+            key = tx.get("transaction_id") or (int(tx["step"]), tx["nameOrig"], tx["nameDest"], float(tx["amount"]))
+            features = self.feature_store.observe(tx, key=key)
+        else:
+            # The training data has no other types: answer, but don't count them
+            features = self.feature_store.lookup(tx)
+        return {name: None if value != value else value for name, value in features.items()}
+
+    def score_one(self, tx: dict) -> dict:
+        X = self.features_from_json([tx])
+        if self.batcher is not None:
+            pred, proba = asyncio.run_coroutine_threadsafe(self.batcher.submit(X[0]), self._loop).result()
+            result = {"prediction": pred, "fraud_proba": proba}
+        else:
+            pred, proba = self.score(X, "single")
+            result = {"prediction": int(pred[0]), "fraud_proba": float(proba[0])}
+        velocity = self.velocity(tx)
+        if velocity is not None:
+            result["velocity"] = velocity
+        return result
+
+    def score_batch(self, body: dict) -> dict:
+        if "rows" in body:
+            rows = np.asarray(body["rows"], dtype=np.float64).reshape(-1, N_FEATURES)
+            X = to_matrix(rows, out=self._buffer(len(rows)))
+        else:
+            transactions = body.get("transactions", [])
+            X = self.features_from_json(transactions)
+        if len(X) == 0:
+            return {"predictions": [], "fraud_proba": []}
+        pred, proba = self.score(X, "batch")
+        result = {"predictions": pred.tolist(), "fraud_proba": proba.tolist()}
+        if self.feature_store is not None and "rows" not in body:
+            result["velocity"] = [self.velocity(tx) for tx in transactions]
+        return result
+
+    def stats(self) -> dict:
+        out = {
+            "model_version": getattr(self.model, "version", None),
+            "rows_scored": self.rows_scored,
+            "latency": {name: window.summary() for name, window in self.latency.items()},
+        }
+        if self.batcher is not None:
+            out["micro_batch"] = self.batcher.stats()
+        model = self.model
+        if isinstance(model, ShadowModel):
+            out["shadow"] = model.stats()
+            model = model.primary
+        if isinstance(model, CachedModel):
+            out["cache"] = model.stats()
+        if self.feature_store is not None:
+            out["feature_store"] = self.feature_store.stats()
+        return out
+
+
+def stats_samples(stats: dict, prefix: str = "serve") -> list[tuple]:
+    """/stats numbers as gauges for /metrics: {"cache": {"hits": 3}} -> serve_cache_hits 3."""
+    samples = []
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            samples += stats_samples(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and value == value:
+            samples.append((name, "gauge", "", value, {}))
+    return samples
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for load generators
+    scorer: Scorer = None
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; don't let Nagle hold the body back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send(200, self.scorer.stats())
+        elif self.path == "/metrics":
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        try:
+            body = self._read_json()
+            if self.path == "/score":
+                kind, result = "single", self.scorer.score_one(body)
+            elif self.path == "/score/batch":
+                kind, result = "batch", self.scorer.score_batch(body)
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+                return
+        except (ValueError, TypeError, AttributeError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        self._send(200, result)
+        elapsed = time.perf_counter() - start
+        self.scorer.latency[f"{kind}_total"].record(elapsed * 1e3)
+        REQUEST_SECONDS[kind].observe(elapsed)
+
+    def log_message(self, format, *args):
+        # Per-request access logging would dominate the hot path
+        pass
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # default backlog of 5 resets bursts of concurrent clients
+
+
+def make_server(model, host: str = "127.0.0.1", port: int = 8000, batcher: MicroBatcher | None = None,
+                feature_store: FeatureStore | None = None) -> ScoringServer:
+    scorer = Scorer(model, batcher=batcher, feature_store=feature_store)
+    register_collector(lambda: stats_samples(scorer.stats()))
+    handler = type("BoundScoringHandler", (ScoringHandler,), {"scorer": scorer})
+    return ScoringServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the BreeBoost scoring service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", type=Path, default=None,
+                        help=f"Model file to serve (default: registry's current version, hot-reloaded; else {MODEL_PATH.name})")
+    parser.add_argument("--micro-batch", action="store_true", help="Coalesce concurrent /score requests")
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--shadow", default=None, help="Candidate model (registry version or file) to score in shadow")
+    parser.add_argument("--canary-percent", type=float, default=0.0, help="Percent of rows served by the candidate")
+    parser.add_argument("--shadow-sample-rate", type=float, default=1.0, help="Fraction of calls compared")
+    parser.add_argument("--shadow-log", type=Path, default=SHADOW_LOG)
+    parser.add_argument("--cache-size", type=int, default=0, help="Prediction cache entries (0 disables the cache)")
+    parser.add_argument("--cache-ttl", type=float, default=300.0, help="Seconds a cached prediction stays valid")
+    parser.add_argument("--cache-db", type=Path, default=None, help="SQLite file shared by workers as a second cache tier")
+    parser.add_argument("--velocity", action="store_true", help="Track per-account velocity features")
+    parser.add_argument("--velocity-history", type=Path, default=None, help="Raw log to warm-start the feature store from")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    if args.cache_size > 0:
+        # Under the shadow layer: every call is still compared (and canary rows served) per row
+        model = CachedModel(model, max_entries=args.cache_size, ttl_seconds=args.cache_ttl, shared_path=args.cache_db)
+    if args.shadow:
+        model = ShadowModel(model, load_candidate(args.shadow), canary_percent=args.canary_percent,
+                            sample_rate=args.shadow_sample_rate, log_path=args.shadow_log, shadow_version=args.shadow)
+    batcher = None
+    if args.micro_batch:
+        batcher = MicroBatcher.for_model(model, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    feature_store = None
+    if args.velocity_history is not None:
+        history = scan_raw_data(args.velocity_history).filter(pl.col("type").is_in(list(TYPE_CODES)))
+        feature_store = FeatureStore.from_history(history)
+        logger.info("Feature store warm-started from %s: %s", args.velocity_history, feature_store.stats())
+    elif args.velocity:
+        feature_store = FeatureStore()
+    server = make_server(model, args.host, args.port, batcher=batcher, feature_store=feature_store)
+    logger.info("Scoring service listening on %s:%d", args.host, args.port)
+    print(f"🚀 Scoring service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(model, ShadowModel):
+            model.close()
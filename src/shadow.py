@@ -0,0 +1,324 @@
+"""
+Shadow and canary scoring: compare a candidate model with the serving one
+on live traffic.
+
+`ShadowModel` wraps a primary model and a candidate, and is accepted
+anywhere a model is (`inference.score_array`, `predict`, `run_batch`,
+serve.py, the micro-batcher). Each call:
+
+ - scores the rows on the request path: with the primary model, except for
+   the `canary_percent` of rows served by the candidate instead;
+ - hands a copy of the feature matrix and the served scores to a background
+   thread through a queue bounded by rows, not calls (never blocking: rows
+   that don't fit are dropped from the comparison and counted; a call
+   larger than the room left is subsampled to fit).
+
+The background thread coalesces queued calls for up to `linger_ms` into one
+call of the other model, so the comparison costs one model call per batch
+rather than per request. It folds both scores into streaming aggregates
+(disagreement rate at the threshold, score histograms and their PSI, mean
+and max score difference, comparison cost) and appends them to a CSV log.
+
+    python src/serve.py --shadow <registry version or model path> [--canary-percent 5]
+"""
+
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from utils.latency import LatencyWindow
+from utils.logger import logger
+
+BASE = Path(__file__).resolve().parent
+SHADOW_LOG = (BASE / ".." / "monitoring" / "shadow.csv").resolve()
+SCORE_BINS = 50
+
+
+class ShadowStats:
+    """Streaming comparison of primary and candidate scores; updated by the shadow thread only."""
+
+    def __init__(self, threshold: float = 0.5):
+        self.threshold = threshold
+        self.edges = np.linspace(0.0, 1.0, SCORE_BINS + 1)
+        self.rows = 0
+        self.canary_rows = 0
+        self.disagreements = 0
+        self.diff_sum = 0.0
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+        self.primary_sum = 0.0
+        self.shadow_sum = 0.0
+        self.primary_hist = np.zeros(SCORE_BINS, dtype=np.int64)
+        self.shadow_hist = np.zeros(SCORE_BINS, dtype=np.int64)
+        self.compare_seconds = 0.0
+        self.batches = 0
+
+    def update(self, primary: np.ndarray, shadow: np.ndarray, canary: np.ndarray, seconds: float) -> None:
+        diff = shadow.astype(np.float64) - primary
+        self.rows += len(primary)
+        self.canary_rows += int(canary.sum())
+        self.disagreements += int(((primary > self.threshold) != (shadow > self.threshold)).sum())
+        self.diff_sum += float(diff.sum())
+        self.abs_diff_sum += float(np.abs(diff).sum())
+        self.max_abs_diff = max(self.max_abs_diff, float(np.abs(diff).max(initial=0.0)))
+        self.primary_sum += float(primary.sum(dtype=np.float64))
+        self.shadow_sum += float(shadow.sum(dtype=np.float64))
+        self.primary_hist += np.histogram(np.clip(primary, 0.0, 1.0), bins=self.edges)[0]
+        self.shadow_hist += np.histogram(np.clip(shadow, 0.0, 1.0), bins=self.edges)[0]
+        self.compare_seconds += seconds
+        self.batches += 1
+
+    def psi(self, eps: float = 1e-6) -> float:
+        """Population stability index of the candidate's score distribution against the primary's."""
+        p = self.primary_hist / max(self.primary_hist.sum(), 1) + eps
+        q = self.shadow_hist / max(self.shadow_hist.sum(), 1) + eps
+        return float(np.sum((q - p) * np.log(q / p)))
+
+    def summary(self) -> dict:
+        n = max(self.rows, 1)
+        return {
+            "rows": self.rows,
+            "canary_rows": self.canary_rows,
+            "disagreements": self.disagreements,
+            "disagreement_rate": self.disagreements / n,
+            "primary_mean_proba": self.primary_sum / n,
+            "shadow_mean_proba": self.shadow_sum / n,
+            "mean_diff": self.diff_sum / n,
+            "mean_abs_diff": self.abs_diff_sum / n,
+            "max_abs_diff": self.max_abs_diff,
+            "score_psi": self.psi(),
+            "compare_us_per_row": 1e6 * self.compare_seconds / n,
+            "compare_batches": self.batches,
+        }
+
+
+class ShadowModel:
+    """
+    A primary model with a candidate scored alongside it.
+
+    `canary_percent` of rows (chosen at random, per row) are served by the
+    candidate; the primary then becomes their comparison side. `sample_rate`
+    is the fraction of calls compared at all. Call `close()` to drain the
+    queue and stop the thread.
+    """
+
+    def __init__(self, primary, shadow, canary_percent: float = 0.0, sample_rate: float = 1.0,
+                 threshold: float = 0.5, log_path: Path | None = SHADOW_LOG, max_queued_rows: int = 131_072,
+                 max_batch_rows: int = 8192, linger_ms: float = 100.0, shadow_version: str | None = None,
+                 seed: int | None = None):
+        from inference import score_array  # inference dispatches to ShadowModel, so import late
+
+        if not 0.0 <= canary_percent <= 100.0:
+            raise ValueError(f"canary_percent must be within [0, 100], got {canary_percent}")
+        self._score = score_array
+        self.primary = primary
+        self.shadow = shadow
+        self.shadow_version = shadow_version or getattr(shadow, "version", None)
+        self.canary_fraction = canary_percent / 100.0
+        self.sample_rate = sample_rate
+        self.log_path = Path(log_path) if log_path is not None else None
+        self.max_batch_rows = max_batch_rows
+        self.linger = linger_ms / 1e3
+        self.max_queued_rows = max_queued_rows
+        self.comparison = ShadowStats(threshold)
+        self.overhead = LatencyWindow()
+        self.dropped = 0
+        self.errors = 0
+        self._seeds = np.random.SeedSequence(seed)
+        self._local = threading.local()
+        self._queue: queue.Queue = queue.Queue()
+        self._queued_rows = 0
+        self._rows_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._log = None
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    # sklearn-style passthroughs, like HotModel: the primary stands in for the model
+    @property
+    def model(self):
+        return self.primary
+
+    @property
+    def version(self) -> str | None:
+        return getattr(self.primary, "version", None)
+
+    def get_booster(self):
+        return self.primary.get_booster()
+
+    # ---------------- request path ---------------- #
+    def _rng(self) -> np.random.Generator:
+        rng = getattr(self._local, "rng", None)
+        if rng is None:
+            rng = self._local.rng = np.random.default_rng(self._seeds.spawn(1)[0])
+        return rng
+
+    def score(self, X: np.ndarray, threshold: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+        """Score `X` for the caller; the comparison happens later on the shadow thread."""
+        rng = self._rng() if self.canary_fraction or self.sample_rate < 1.0 else None
+        canary = rng.random(len(X)) < self.canary_fraction if self.canary_fraction else None
+        if canary is None or not canary.any():
+            canary = None
+            pred, proba = self._score(self.primary, X, threshold)
+        elif canary.all():
+            pred, proba = self._score(self.shadow, X, threshold)
+        else:
+            pred, proba = self._split_score(X, canary, threshold)
+        served = time.perf_counter()
+
+        if rng is None or rng.random() < self.sample_rate:
+            self._enqueue(X, proba, canary)
+        self.overhead.record((time.perf_counter() - served) * 1e3)
+        return pred, proba
+
+    def _enqueue(self, X: np.ndarray, proba: np.ndarray, canary: np.ndarray | None) -> None:
+        # Reserve room by rows: a few 100k-row batch calls would otherwise pin GBs
+        n = len(X)
+        with self._rows_lock:
+            take = min(n, self.max_queued_rows - self._queued_rows)
+            if take > 0:
+                self._queued_rows += take
+            if take < n:
+                self.dropped += n - max(take, 0)
+        if take <= 0:
+            return
+        if take < n:
+            keep = np.sort(self._rng().choice(n, take, replace=False))
+            X, proba = X[keep], proba[keep]  # fancy indexing copies
+            canary = canary[keep] if canary is not None else None
+        else:
+            X = X.copy()
+        self._queue.put_nowait((X, proba, canary, time.time()))
+
+    def _split_score(self, X: np.ndarray, canary: np.ndarray, threshold: float) -> tuple[np.ndarray, np.ndarray]:
+        p0, q0 = self._score(self.primary, X[~canary], threshold)
+        p1, q1 = self._score(self.shadow, X[canary], threshold)
+        pred, proba = np.empty(len(X), dtype=p0.dtype), np.empty(len(X), dtype=q0.dtype)
+        pred[~canary], proba[~canary] = p0, q0
+        pred[canary], proba[canary] = p1, q1
+        return pred, proba
+
+    # ---------------- shadow thread ---------------- #
+    def _run(self) -> None:
+        try:
+            # Linux schedules threads individually: let request threads win the CPU
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is not None:
+                # Sleep out the linger rather than waiting on the queue, so requests
+                # enqueueing meanwhile don't wake this thread (and contend for the GIL)
+                time.sleep(self.linger)
+            batch, rows = [], 0
+            while True:
+                if item is None:
+                    stop = True
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+                rows += len(item[0])
+                if rows >= self.max_batch_rows:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+            try:
+                self._compare(batch)
+            except Exception as e:
+                # The comparison must never affect serving; count it and carry on
+                self.errors += 1
+                logger.error("Shadow scoring failed: %s", e)
+            finally:
+                with self._rows_lock:
+                    self._queued_rows -= rows
+                for _ in batch:
+                    self._queue.task_done()
+        if self._log is not None:
+            self._log.close()
+
+    def _compare(self, batch: list) -> None:
+        X = np.concatenate([b[0] for b in batch])
+        served = np.concatenate([b[1] for b in batch]).astype(np.float64)
+        canary = np.concatenate([b[2] if b[2] is not None else np.zeros(len(b[0]), dtype=bool) for b in batch])
+
+        start = time.perf_counter()
+        other = np.empty(len(X), dtype=np.float64)
+        if not canary.all():
+            other[~canary] = self._score(self.shadow, X[~canary])[1]
+        if canary.any():
+            other[canary] = self._score(self.primary, X[canary])[1]
+        seconds = time.perf_counter() - start
+
+        primary, shadow = np.where(canary, other, served), np.where(canary, served, other)
+        with self._stats_lock:
+            self.comparison.update(primary, shadow, canary, seconds)
+        if self.log_path is not None:
+            self._write_log(batch, primary, shadow, canary)
+
+    def _write_log(self, batch: list, primary: np.ndarray, shadow: np.ndarray, canary: np.ndarray) -> None:
+        if self._log is None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            new = not self.log_path.exists() or self.log_path.stat().st_size == 0
+            self._log = open(self.log_path, "a", encoding="utf-8", newline="")
+            if new:
+                self._log.write("timestamp,primary_version,shadow_version,served_by,primary_proba,shadow_proba\n")
+        versions = f"{self.version or ''},{self.shadow_version or ''}"
+        served_by = np.where(canary, "shadow", "primary").tolist()
+        primary, shadow, i = primary.tolist(), shadow.tolist(), 0
+        lines = []
+        for X, _, _, stamp in batch:
+            ts = datetime.fromtimestamp(stamp, timezone.utc).isoformat()
+            for j in range(i, i + len(X)):
+                lines.append(f"{ts},{versions},{served_by[j]},{primary[j]!r},{shadow[j]!r}\n")
+            i += len(X)
+        self._log.write("".join(lines))
+        self._log.flush()
+
+    # ---------------- reporting ---------------- #
+    def flush(self) -> None:
+        """Block until every queued call has been compared."""
+        self._queue.join()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            out = self.comparison.summary()
+        return {
+            "primary_version": self.version,
+            "shadow_version": self.shadow_version,
+            "canary_percent": 100.0 * self.canary_fraction,
+            "sample_rate": self.sample_rate,
+            **out,
+            "dropped_rows": self.dropped,
+            "errors": self.errors,
+            "queue_depth": self._queue.qsize(),
+            "queued_rows": self._queued_rows,
+            "overhead": self.overhead.summary(),
+        }
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+def load_candidate(spec: str, registry=None):
+    """A candidate model from a registry version id or a model file path."""
+    from inference import load_model
+    from registry import ModelRegistry
+
+    if Path(spec).exists():
+        return load_model(Path(spec), watch=False)
+    registry = registry or ModelRegistry()
+    logger.info("Loading shadow model version %s from registry %s", spec, registry.root)
+    return registry.load(spec)
@@ -1,38 +1,67 @@
-import polars as pl
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
 import numpy as np
+import polars as pl
+import xgboost as xgb
 from pathlib import Path
 from sklearn.metrics import average_precision_score
 from xgboost import XGBClassifier
 from sklearn.model_selection import train_test_split
 import joblib
 from utils.logger import logger
+from utils.instrument import span
+from utils.storage import load_dataset, scan_dataset, list_partitions, dataset_fingerprint, PROCESSED_DIR
+from compiled_model import compile_booster
+from features import FEATURE_COLUMNS
+from registry import ModelRegistry
 
 # Paths
 BASE = Path(__file__).resolve().parent.parent
-DATA_PATH = BASE / "data" / "processed" / "paysim_cleaned.csv"
+DATA_PATH = PROCESSED_DIR
 MODEL_PATH = BASE / "models" / "xgb_model.joblib"
+SPLIT_PATH = BASE / "models" / "split.npz"
 MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# Streaming modes hold out 1 row in TEST_BUCKETS (the 0.2 test split of
+# train_model), chosen by a hash of the raw columns so it doesn't depend on
+# how the data is partitioned or read
+TEST_BUCKETS = 5
+SPLIT_SEED = 42
+
 def load_data(path: Path) -> tuple[np.ndarray, np.ndarray]:
-    logger.info(f"Loading processed data from {path}")
-    df = pl.read_csv(path)
+    # Select the model's columns by name, as the streaming modes do: inference
+    # scores matrices positionally, so the dataset's column order must not leak in
+    logger.info("Loading processed data from %s", path)
+    df = load_dataset(path, columns=FEATURE_COLUMNS + ["isFraud"])
     Y = df["isFraud"].to_numpy()
-    X = df.drop("isFraud").to_pandas()
+    X = df.select(FEATURE_COLUMNS).to_pandas()
     return X, Y
 
-def train_model(X, Y) -> XGBClassifier:
+def split_indices(Y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Row positions of the stratified 80/20 train/test split `train_model` uses."""
+    return train_test_split(np.arange(len(Y)), test_size=0.2, random_state=42, stratify=Y)
+
+@span("train_model", log=True)
+def train_model(X, Y, params: dict | None = None,
+                split: tuple[np.ndarray, np.ndarray] | None = None) -> tuple[XGBClassifier, dict]:
     logger.info("Splitting dataset into train/test sets")
-    trainX, testX, trainY, testY = train_test_split(X, Y, test_size=0.2, random_state=42, stratify=Y)
+    train_idx, test_idx = split_indices(Y) if split is None else split
+    trainX, testX, trainY, testY = X.iloc[train_idx], X.iloc[test_idx], Y[train_idx], Y[test_idx]
 
     weights = (trainY == 0).sum() / (1.0 * (trainY == 1).sum())
-    logger.info(f"Class imbalance weight (scale_pos_weight): {weights:.2f}")
+    logger.info("Class imbalance weight (scale_pos_weight): %.2f", weights)
 
     clf = XGBClassifier(
         max_depth=3,
         scale_pos_weight=weights,
         n_jobs=4,
         use_label_encoder=False,
-        eval_metric="logloss"
+        eval_metric="logloss",
+        **(params or {}),
     )
 
     logger.info("Training XGBoost model...")
@@ -41,18 +70,236 @@ def train_model(X, Y) -> XGBClassifier:
     logger.info("Evaluating model on test set...")
     probabilities = clf.predict_proba(testX)
     auprc = average_precision_score(testY, probabilities[:, 1])
-    logger.info(f"AUPRC on test set: {auprc:.4f}")
+    logger.info("AUPRC on test set: %.4f", auprc)
     print(f"✅ AUPRC = {auprc:.4f}")
 
+    return clf, {"auprc": float(auprc), "n_train": int(len(trainY)), "n_test": int(len(testY))}
+
+# ---------------- out-of-core training ---------------- #
+def bucket_expr() -> pl.Expr:
+    """Stable per-row bucket in [0, TEST_BUCKETS); bucket 0 is the held-out test split."""
+    return pl.struct(FEATURE_COLUMNS[:7]).hash(SPLIT_SEED) % TEST_BUCKETS
+
+def _split_expr(test: bool) -> pl.Expr:
+    return bucket_expr() == 0 if test else bucket_expr() != 0
+
+def _partition_arrays(path: Path, days: list[int] | None, test: bool | None = None,
+                      where: pl.Expr | None = None) -> tuple[np.ndarray, np.ndarray]:
+    where = _split_expr(test) if where is None else where
+    df = (
+        scan_dataset(path, columns=FEATURE_COLUMNS + ["isFraud"], days=days)
+        .filter(where)
+        .collect()
+    )
+    X = df.select(FEATURE_COLUMNS).to_numpy().astype(np.float32, copy=False)
+    return X, df["isFraud"].to_numpy()
+
+class PartitionIter(xgb.DataIter):
+    """
+    Feeds a dataset to XGBoost `days_per_batch` day partitions at a time,
+    straight from the columnar files as NumPy (no pandas), so only one batch
+    of raw rows is resident while the quantized matrix is built.
+    """
+
+    def __init__(self, path: Path, days: list[int], test: bool = False, days_per_batch: int = 1,
+                 cache_prefix: str | None = None, where: pl.Expr | None = None):
+        self.path = path
+        self.where = _split_expr(test) if where is None else where
+        self.batches = [days[i:i + days_per_batch] for i in range(0, len(days), days_per_batch)]
+        self._it = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> bool:
+        while self._it < len(self.batches):
+            X, y = _partition_arrays(self.path, self.batches[self._it], where=self.where)
+            self._it += 1
+            if len(y):
+                input_data(data=X, label=y, feature_names=FEATURE_COLUMNS)
+                return True
+        return False
+
+    def reset(self) -> None:
+        self._it = 0
+
+def class_weight(path: Path, days: list[int] | None = None) -> float:
+    """scale_pos_weight of the training split, counted in one streaming pass."""
+    counts = (
+        scan_dataset(path, columns=FEATURE_COLUMNS[:7] + ["isFraud"], days=days)
+        .filter(_split_expr(False))
+        .select(pl.len().alias("n"), pl.col("isFraud").cast(pl.Int64).sum().alias("pos"))
+        .collect(engine="streaming")
+    )
+    n, pos = counts["n"][0], counts["pos"][0]
+    return (n - pos) / max(pos, 1)
+
+def default_params(scale_pos_weight: float) -> dict:
+    # The same model train_model fits through the sklearn wrapper
+    return {
+        "objective": "binary:logistic",
+        "tree_method": "hist",
+        "max_depth": 3,
+        "scale_pos_weight": scale_pos_weight,
+        "nthread": 4,
+        "eval_metric": "logloss",
+    }
+
+def _as_classifier(booster: xgb.Booster) -> XGBClassifier:
+    clf = XGBClassifier()
+    clf.load_model(bytearray(booster.save_raw("ubj")))
     return clf
 
+def evaluate_streaming(booster: xgb.Booster, path: Path, days: list[int]) -> float:
+    """Held-out AUPRC, scoring one partition at a time."""
+    labels, probas = [], []
+    for day in days:
+        X, y = _partition_arrays(path, [day], test=True)
+        if len(y):
+            labels.append(y)
+            probas.append(booster.inplace_predict(X, validate_features=False))
+    return float(average_precision_score(np.concatenate(labels), np.concatenate(probas)))
+
+def train_streaming(path: Path = DATA_PATH, days: list[int] | None = None, params: dict | None = None,
+                    num_boost_round: int = 100, init_model: xgb.Booster | None = None,
+                    external_memory: bool = False, days_per_batch: int = 1) -> tuple[XGBClassifier, dict]:
+    """
+    Train from the partitioned dataset without materializing it.
+
+    Rows are streamed through `PartitionIter` into a `QuantileDMatrix` (the
+    raw floats are never held all at once, only their 1-byte bins) or, with
+    `external_memory=True`, an `ExtMemQuantileDMatrix` paged through a disk
+    cache. With `init_model`, boosting continues from that booster.
+    """
+    days = list_partitions(path) if days is None else days
+    params = params or default_params(class_weight(path, days))
+    logger.info("Streaming %d day partitions from %s (scale_pos_weight=%.2f)",
+                len(days), path, params["scale_pos_weight"])
+
+    with tempfile.TemporaryDirectory(prefix="xgb-cache-") as cache_dir:
+        if external_memory:
+            it = PartitionIter(path, days, days_per_batch=days_per_batch, cache_prefix=str(Path(cache_dir) / "train"))
+            dtrain = xgb.ExtMemQuantileDMatrix(it, max_bin=256)
+        else:
+            dtrain = xgb.QuantileDMatrix(PartitionIter(path, days, days_per_batch=days_per_batch), max_bin=256)
+        n_train = dtrain.num_row()
+        logger.info("Training XGBoost model on %d rows%s", n_train, " (warm start)" if init_model else "")
+        booster = xgb.train(params, dtrain, num_boost_round=num_boost_round, xgb_model=init_model)
+        del dtrain
+
+    auprc = evaluate_streaming(booster, path, days)
+    logger.info("AUPRC on held-out rows: %.4f", auprc)
+    print(f"✅ AUPRC = {auprc:.4f}")
+    return _as_classifier(booster), {"auprc": auprc, "n_train": int(n_train), "days": days}
+
+def warm_start(path: Path = DATA_PATH, registry: ModelRegistry | None = None, n_days: int = 1,
+               num_boost_round: int = 20, **kwargs) -> tuple[XGBClassifier, dict]:
+    """Continue boosting the registry's current model on the newest `n_days` partitions."""
+    registry = registry or ModelRegistry()
+    base_version = registry.current_version()
+    if base_version is None:
+        raise FileNotFoundError(f"No registered model to warm-start from in {registry.root}")
+    days = list_partitions(path)[-n_days:]
+    booster = registry.load(base_version, kind="booster")
+    logger.info("Warm-starting from version %s on days %s", base_version, days)
+    clf, metrics = train_streaming(path, days=days, num_boost_round=num_boost_round, init_model=booster, **kwargs)
+    return clf, {**metrics, "warm_start_from": base_version}
+
+# ---------------- held-out split cache ---------------- #
+def holdout_indices(path: Path, days: list[int] | None = None) -> np.ndarray:
+    """Row positions (in `scan_dataset` order) of the streaming modes' held-out bucket within `days`."""
+    where = _split_expr(True) if days is None else _split_expr(True) & pl.col("day").is_in(days)
+    return (
+        scan_dataset(path, columns=FEATURE_COLUMNS[:7] + ["day"])
+        .with_row_index("row")
+        .filter(where)
+        .select("row")
+        .collect(engine="streaming")["row"]
+        .to_numpy()
+    )
+
+def save_split(test_index: np.ndarray, data_path: Path, mode: str, model_version: str | None = None,
+               path: Path = SPLIT_PATH) -> Path:
+    """
+    Cache the held-out row positions of a training run, keyed by the
+    dataset's fingerprint, so `eval.py` scores exactly those rows without
+    re-reading the data to split it again.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "data": str(data_path),
+        "data_hash": dataset_fingerprint(data_path),
+        "mode": mode,
+        "model_version": model_version,
+        "n_test": int(len(test_index)),
+        "created_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+    }
+    tmp = path.with_name(path.name + ".tmp.npz")
+    np.savez(tmp, test_index=np.sort(np.asarray(test_index, dtype=np.int64)), meta=np.array(json.dumps(meta)))
+    os.replace(tmp, path)
+    logger.info("Cached %d held-out row positions in %s", len(test_index), path)
+    return path
+
+def load_split(data_path: Path, path: Path = SPLIT_PATH) -> tuple[np.ndarray, dict]:
+    """Held-out row positions cached by `save_split`; the dataset must be the one the split was made on."""
+    if not Path(path).exists():
+        raise FileNotFoundError(f"No cached held-out split at {path}; run train.py first")
+    with np.load(path, allow_pickle=False) as f:
+        test_index, meta = f["test_index"], json.loads(str(f["meta"]))
+    if meta["data_hash"] != dataset_fingerprint(data_path):
+        raise ValueError(f"Held-out split in {path} was made on a different dataset ({meta['data']}); retrain first")
+    return test_index, meta
+
 def save_model(model, path: Path):
-    logger.info(f"Saving trained model to {path}")
+    """
+    Save the joblib-pickled classifier plus two pickle-free artifacts next
+    to it: the booster as UBJSON (`.ubj`) and the flattened trees for
+    `compiled_model.CompiledModel` (`.npz`).
+    """
+    path = Path(path)
+    logger.info("Saving trained model to %s", path)
     joblib.dump(model, path)
+    model.get_booster().save_model(path.with_suffix(".ubj"))
+    compile_booster(model).save(path.with_suffix(".npz"))
+    logger.info("Saved booster (.ubj) and compiled trees (.npz) alongside %s", path.name)
 
-if __name__ == "__main__":
-    logger.info("🚀 Training pipeline started")
-    X, Y = load_data(DATA_PATH)
-    model = train_model(X, Y)
+def register_model(model: XGBClassifier, metrics: dict, data_path: Path, mode: str,
+                   registry: ModelRegistry | None = None) -> str:
+    """Save `model` to MODEL_PATH and register it (made current) with its provenance."""
     save_model(model, MODEL_PATH)
-    logger.info("✅ Training complete. Model saved.")
+    return (registry or ModelRegistry()).register(model, {
+        **metrics,
+        "mode": mode,
+        "features": list(model.get_booster().feature_names or FEATURE_COLUMNS),
+        "training_data": str(data_path),
+        "training_data_hash": dataset_fingerprint(data_path),
+        "params": {k: v for k, v in model.get_params().items() if v is not None and k != "missing"},
+    })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the fraud model and register it.")
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--mode", choices=["full", "stream", "warm-start"], default="full",
+                        help="full: in-memory (pandas); stream: out-of-core from partitions; "
+                             "warm-start: continue the current model on the newest days")
+    parser.add_argument("--external-memory", action="store_true", help="Page the training matrix through a disk cache")
+    parser.add_argument("--days", type=int, default=1, help="Newest day partitions to use for --mode warm-start")
+    parser.add_argument("--rounds", type=int, default=None, help="Boosting rounds (default 100; 20 for warm-start)")
+    args = parser.parse_args()
+
+    logger.info("🚀 Training pipeline started (%s)", args.mode)
+    if args.mode == "full":
+        X, Y = load_data(args.data)
+        split = split_indices(Y)
+        model, metrics = train_model(X, Y, split=split)
+        test_index = split[1]
+    elif args.mode == "stream":
+        model, metrics = train_streaming(args.data, num_boost_round=args.rounds or 100,
+                                         external_memory=args.external_memory)
+        test_index = holdout_indices(args.data, metrics["days"])
+    else:
+        model, metrics = warm_start(args.data, n_days=args.days, num_boost_round=args.rounds or 20,
+                                    external_memory=args.external_memory)
+        test_index = holdout_indices(args.data, metrics["days"])
+    version = register_model(model, metrics, args.data, args.mode)
+    save_split(test_index, args.data, args.mode, model_version=version)
+    logger.info("✅ Training complete. Model saved and registered as version %s.", version)
@@ -0,0 +1,198 @@
+"""
+Parallel hyperparameter search for the fraud model.
+
+The fit and validation matrices (including the quantile sketch) are built
+once in the parent and inherited by fork-started workers, so trials never
+re-read or re-bin the data. Configurations are pruned by successive halving
+on validation AUPRC, and each trial also early-stops on the validation set.
+Every finished (trial, rung) is appended to a JSONL ledger, so rerunning an
+interrupted search with the same settings and the same dataset contents
+picks up where it stopped.
+
+Rows come from the same hash buckets as `train`: bucket 0 stays the
+untouched test split, bucket 1 is validation, the rest is fit data.
+
+    python src/tune.py --trials 27 --workers 4 [--register]
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import os
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import average_precision_score
+
+from train import (DATA_PATH, PartitionIter, bucket_expr, default_params, register_model, train_streaming)
+from utils.logger import logger
+from utils.storage import dataset_fingerprint, list_partitions
+
+BASE = Path(__file__).resolve().parent.parent
+LEDGER_DIR = BASE / "models" / "tuning"
+VALID_BUCKET = 1
+
+# name -> list of choices, or (low, high, scale)
+SEARCH_SPACE = {
+    "max_depth": [3, 4, 5, 6, 8],
+    "learning_rate": (0.02, 0.3, "log"),
+    "min_child_weight": (1.0, 20.0, "log"),
+    "subsample": (0.6, 1.0, "linear"),
+    "colsample_bytree": (0.6, 1.0, "linear"),
+    "reg_lambda": (0.1, 10.0, "log"),
+}
+
+# Set in the parent before the pool forks; workers read it, never pickle it
+_SHARED: dict = {}
+
+
+def _trial_id(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:10]
+
+
+def sample_configs(n: int, seed: int = 0) -> list[dict]:
+    """`n` random configurations; the same seed always yields the same trials."""
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n):
+        params = {}
+        for name, space in SEARCH_SPACE.items():
+            if isinstance(space, list):
+                params[name] = space[rng.integers(len(space))]
+            else:
+                low, high, scale = space
+                value = np.exp(rng.uniform(np.log(low), np.log(high))) if scale == "log" else rng.uniform(low, high)
+                params[name] = round(float(value), 4)
+        params["max_depth"] = int(params["max_depth"])
+        configs.append({"trial_id": _trial_id(params), "params": params})
+    return configs
+
+
+class TrialLedger:
+    """Append-only JSONL record of finished trials, keyed by (trial_id, rung)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.records: dict[tuple[str, int], dict] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        rec = json.loads(line)
+                        self.records[(rec["trial_id"], rec["rung"])] = rec
+
+    def get(self, trial_id: str, rung: int) -> dict | None:
+        return self.records.get((trial_id, rung))
+
+    def append(self, rec: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.records[(rec["trial_id"], rec["rung"])] = rec
+
+
+def build_matrices(path: Path, days: list[int] | None = None, max_bin: int = 256):
+    """Quantized fit matrix plus a validation matrix sharing its bins, streamed from partitions."""
+    days = list_partitions(path) if days is None else days
+    dfit = xgb.QuantileDMatrix(PartitionIter(path, days, where=bucket_expr() > VALID_BUCKET), max_bin=max_bin)
+    dvalid = xgb.QuantileDMatrix(PartitionIter(path, days, where=bucket_expr() == VALID_BUCKET), ref=dfit)
+    y = dfit.get_label()
+    return dfit, dvalid, float((y == 0).sum() / max((y == 1).sum(), 1))
+
+
+def _run_trial(task: tuple[dict, int, int]) -> dict:
+    config, rung, rounds = task
+    dfit, dvalid = _SHARED["fit"], _SHARED["valid"]
+    params = {**default_params(_SHARED["scale_pos_weight"]), **config["params"],
+              "nthread": _SHARED["nthread"], "eval_metric": "aucpr"}
+    booster = xgb.train(params, dfit, num_boost_round=rounds, evals=[(dvalid, "valid")],
+                        early_stopping_rounds=_SHARED["patience"], verbose_eval=False)
+    best_rounds = booster.best_iteration + 1
+    proba = booster.predict(dvalid, iteration_range=(0, best_rounds))
+    return {
+        **config,
+        "rung": rung,
+        "rounds": rounds,
+        "best_rounds": best_rounds,
+        "auprc": float(average_precision_score(dvalid.get_label(), proba)),
+    }
+
+
+def successive_halving(configs: list[dict], ledger: TrialLedger, workers: int, min_rounds: int = 25,
+                       max_rounds: int = 400, eta: int = 3) -> dict:
+    """
+    Train every config for `min_rounds`, keep the best 1/eta on validation
+    AUPRC, multiply the budget by `eta`, and repeat until one config or
+    `max_rounds` is left. Returns the best ledger record.
+    """
+    survivors, rung, rounds = configs, 0, min_rounds
+    ctx = mp.get_context("fork")
+    with ctx.Pool(processes=workers) as pool:
+        while True:
+            todo = [(c, rung, rounds) for c in survivors if ledger.get(c["trial_id"], rung) is None]
+            logger.info("Rung %d: %d configs x %d rounds (%d from ledger)",
+                        rung, len(survivors), rounds, len(survivors) - len(todo))
+            for rec in pool.imap_unordered(_run_trial, todo):
+                ledger.append(rec)
+                logger.info("Trial %s rung %d: AUPRC=%.4f (%d rounds)",
+                            rec["trial_id"], rung, rec["auprc"], rec["best_rounds"])
+
+            results = sorted((ledger.get(c["trial_id"], rung) for c in survivors),
+                             key=lambda r: r["auprc"], reverse=True)
+            if len(results) == 1 or rounds >= max_rounds:
+                return results[0]
+            keep = {r["trial_id"] for r in results[:max(1, len(results) // eta)]}
+            survivors = [c for c in survivors if c["trial_id"] in keep]
+            rung, rounds = rung + 1, min(rounds * eta, max_rounds)
+
+
+def search(path: Path = DATA_PATH, n_trials: int = 27, workers: int = 4, seed: int = 0, min_rounds: int = 25,
+           max_rounds: int = 400, eta: int = 3, patience: int = 20, ledger_path: Path | None = None) -> dict:
+    # The dataset's content hash is part of the key: re-preprocessing in place starts a fresh ledger
+    settings = {"data": str(path), "data_hash": dataset_fingerprint(path), "trials": n_trials, "seed": seed, "min_rounds": min_rounds,
+                "max_rounds": max_rounds, "eta": eta, "patience": patience}
+    if ledger_path is None:
+        ledger_path = LEDGER_DIR / f"search-{_trial_id(settings)}.jsonl"
+    ledger = TrialLedger(ledger_path)
+    logger.info(f"Hyperparameter search: {n_trials} trials, {workers} workers, ledger {ledger_path}")
+
+    dfit, dvalid, weight = build_matrices(path)
+    _SHARED.update(fit=dfit, valid=dvalid, scale_pos_weight=weight, patience=patience,
+                   nthread=max(1, (os.cpu_count() or 1) // workers))
+    logger.info(f"Built shared matrices: fit={dfit.num_row():,} rows, valid={dvalid.num_row():,} rows")
+
+    best = successive_halving(sample_configs(n_trials, seed), ledger, workers, min_rounds, max_rounds, eta)
+    best = {**best, "scale_pos_weight": weight, "settings": settings}
+    with open(ledger_path.with_suffix(".best.json"), "w", encoding="utf-8") as f:
+        json.dump(best, f, indent=2)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search.")
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--trials", type=int, default=27)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-rounds", type=int, default=25)
+    parser.add_argument("--max-rounds", type=int, default=400)
+    parser.add_argument("--eta", type=int, default=3, help="Keep 1/eta of configs per rung")
+    parser.add_argument("--patience", type=int, default=20, help="Early-stopping rounds within a trial")
+    parser.add_argument("--ledger", type=Path, default=None, help="Trial ledger (default: derived from settings)")
+    parser.add_argument("--register", action="store_true", help="Retrain the best config and register it")
+    args = parser.parse_args()
+
+    best = search(args.data, args.trials, args.workers, args.seed, args.min_rounds, args.max_rounds,
+                  args.eta, args.patience, args.ledger)
+    print(f"✅ Best trial {best['trial_id']}: AUPRC={best['auprc']:.4f} "
+          f"after {best['best_rounds']} rounds with {best['params']}")
+
+    if args.register:
+        params = {**default_params(best["scale_pos_weight"]), **best["params"]}
+        model, metrics = train_streaming(args.data, params=params, num_boost_round=best["best_rounds"])
+        version = register_model(model, {**metrics, "tuning": best}, args.data, mode="tuned")
+        logger.info(f"Registered tuned model as version {version}")
@@ -1,46 +1,68 @@
-import pandas as pd
+import argparse
+import sys
 from pathlib import Path
-import joblib
-
-# Paths
-DATA_PATH = Path("../breeboost/data/processed/paysim_cleaned.csv").resolve()
-REFERENCE_PATH = Path("../breeboost/monitoring/reference.csv").resolve()
-MODEL_PATH = Path("../breeboost/models/xgb_model.joblib").resolve()
-
-# Feature columns expected by model
-columns_needed = [
-    "step",
-    "type",
-    "amount",
-    "oldbalanceOrg",
-    "newbalanceOrig",
-    "oldbalanceDest",
-    "newbalanceDest",
-    "errorBalanceOrig",
-    "errorBalanceDest",
-    "is_large_transaction",
-    "hour",
-    "day",
-]
-
-# Load raw data
-df = pd.read_csv(DATA_PATH)
-
-# Check missing columns
-missing = [col for col in columns_needed if col not in df.columns]
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from utils.storage import PROCESSED_DIR, scan_dataset, read_manifest, stratified_sample, dataset_fingerprint
+from inference import columns_needed, load_model, predict, score_frame
+from features import transform
+from incident.attribution import model_version, summarize_contributions
+from incident.drift import build_profile, save_profile
+
+# Paths, from the repository root wherever the script is run from
+BASE = Path(__file__).resolve().parents[2]
+DATA_PATH = PROCESSED_DIR
+REFERENCE_PATH = BASE / "monitoring" / "reference.csv"
+PROFILE_PATH = BASE / "monitoring" / "reference_profile.json"
+MODEL_PATH = BASE / "models" / "xgb_model.joblib"
+STRATA = ["isFraud", "type"]
+
+parser = argparse.ArgumentParser(description="Build the monitoring reference (CSV sample or profile).")
+parser.add_argument("--data", type=Path, default=DATA_PATH)
+parser.add_argument("--model", type=Path, default=MODEL_PATH)
+parser.add_argument("--profile", action="store_true",
+                    help="Write a compact reference profile (JSON) from a stratified sample instead of reference.csv")
+parser.add_argument("--sample-size", type=int, default=1_000_000, help="Rows in the stratified sample (--profile)")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--out", type=Path, default=None,
+                    help=f"Output path (default: {REFERENCE_PATH.name}, or {PROFILE_PATH.name} with --profile)")
+args = parser.parse_args()
+
+# Check missing columns against the dataset schema (no data is read yet)
+available = read_manifest(args.data)["schema"]
+missing = [col for col in columns_needed if col not in available]
 if missing:
     print(f"⚠️ Missing columns in dataset: {missing}")
     exit(1)
 
-# Extract features (take first 500 rows)
-df_features = df[columns_needed].head(500).copy()
-
 # Load model
-model = joblib.load(MODEL_PATH)
+model = load_model(args.model)
+
+if args.profile:
+    # Stratified by label and transaction type, so the sample keeps the population mix
+    lf = stratified_sample(scan_dataset(args.data, columns=columns_needed + ["isFraud"]),
+                           args.sample_size, by=STRATA, seed=args.seed)
+    scored = score_frame(model, lf.collect()).select(columns_needed + ["prediction", "fraud_proba"])
+    # Reference contribution sums, so RCA attribution only has to score production
+    contributions = summarize_contributions(model, scored.select(columns_needed).to_numpy(), columns_needed,
+                                            seed=args.seed)
+    profile = build_profile(
+        scored.to_pandas(),
+        source={"data": str(args.data), "fingerprint": dataset_fingerprint(args.data)},
+        sample={"rows": scored.height, "strata": STRATA, "seed": args.seed},
+        model={"path": str(args.model), "version": getattr(model, "version", None)},
+        contributions=contributions.to_dict(model_version=model_version(model)),
+    )
+    out = save_profile(profile, args.out or PROFILE_PATH)
+    print(f"✅ reference profile {profile['profile_id']} ({scored.height:,} rows) saved to: {out}")
+    exit(0)
 
-# Predict
-predictions = model.predict(df_features)
-probabilities = model.predict_proba(df_features)[:, 1]
+# Extract features (take first 500 rows), reading only the model columns
+df_features = transform(scan_dataset(args.data, columns=columns_needed).head(500)).collect().to_pandas()
+# Predict (label and probability from one pass)
+predictions, probabilities = predict(model, df_features)
+probabilities = probabilities[:, 1]
 
 # Add prediction columns
 df_features["prediction"] = predictions
@@ -51,7 +73,8 @@ final_cols = columns_needed + ["prediction", "fraud_proba"]
 df_features = df_features[final_cols]
 
 # Save CSV
-REFERENCE_PATH.parent.mkdir(parents=True, exist_ok=True)
-df_features.to_csv(REFERENCE_PATH, index=False)
+out = args.out or REFERENCE_PATH
+out.parent.mkdir(parents=True, exist_ok=True)
+df_features.to_csv(out, index=False)
 
-print(f"✅ reference.csv saved to: {REFERENCE_PATH}")
+print(f"✅ reference.csv saved to: {out}")
@@ -0,0 +1,28 @@
+import threading
+
+import numpy as np
+
+
+class LatencyWindow:
+    """Fixed-size ring of recent latencies (ms); percentiles over the window."""
+
+    def __init__(self, size: int = 10_000):
+        self._values = np.zeros(size, dtype=np.float64)
+        self._size = size
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def record(self, ms: float) -> None:
+        with self._lock:
+            self._values[self._count % self._size] = ms
+            self._count += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            n = min(self._count, self._size)
+            window = self._values[:n].copy()
+            total = self._count
+        if n == 0:
+            return {"count": total, "p50_ms": None, "p99_ms": None}
+        p50, p99 = np.percentile(window, [50, 99])
+        return {"count": total, "p50_ms": round(float(p50), 4), "p99_ms": round(float(p99), 4)}
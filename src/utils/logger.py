@@ -1,15 +1,77 @@
+"""
+Pipeline logging to logs/pipeline.log.
+
+Records are put on an in-memory queue and written by a background listener
+thread, so a caller (the scoring hot path included) never waits on disk I/O.
+Each line is one JSON object: timestamp, level, logger and message, plus any
+structured fields passed as `extra={"fields": {...}}`.
+
+The level is INFO unless BREEBOOST_LOG_LEVEL says otherwise.
+"""
+
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+from datetime import datetime, timezone
+
+LOG_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "logs")
+LOG_FILE = os.path.join(LOG_DIR, "pipeline.log")
+LOG_LEVEL = os.environ.get("BREEBOOST_LOG_LEVEL", "INFO").upper()
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message now (args may change after the call); the queue stays
+        # in-process, so no copy or pickling, and JSON formatting happens on the listener
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+
+def _start_listener(handler: _QueueHandler, file_handler: logging.Handler) -> None:
+    handler.queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(handler.queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # drains the queue before the process exits
+
 
-# Simple logging setup
-log_dir = os.path.join(os.path.dirname(__file__), "..", "..", "logs")
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, "pipeline.log")
+def _configure() -> None:
+    root = logging.getLogger()
+    if any(getattr(h, "breeboost", False) for h in root.handlers):
+        return  # imported again under another module name
+    os.makedirs(LOG_DIR, exist_ok=True)
+    file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+    file_handler.setFormatter(StructuredFormatter())
+    handler = _QueueHandler(queue.SimpleQueue())
+    handler.breeboost = True
+    _start_listener(handler, file_handler)
+    # A forked child (tune.py's trial pool) inherits the handler but not the listener thread
+    os.register_at_fork(after_in_child=lambda: _start_listener(handler, file_handler))
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
 
-logging.basicConfig(
-   filename=log_file,
-   level=logging.INFO,
-   format="%(asctime)s — %(levelname)s — %(message)s"
-)
 
-logger = logging.getLogger(__name__)
\ No newline at end of file
+_configure()
+logger = logging.getLogger(__name__)
@@ -0,0 +1,187 @@
+"""
+Columnar storage for the processed PaySim dataset.
+
+The cleaned data lives in a hive-partitioned directory (``day=<n>/``) of
+Parquet (zstd) or Arrow IPC files with an explicit schema recorded in
+``_manifest.json``. Readers scan it lazily, so only the requested columns
+and ``day`` partitions are touched and files are memory-mapped rather than
+re-parsed from text. CSV is kept as an export format.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import polars as pl
+
+from .logger import logger
+
+BASE = Path(__file__).resolve().parent.parent.parent
+PROCESSED_DIR = BASE / "data" / "processed" / "paysim_cleaned"
+PROCESSED_CSV = BASE / "data" / "processed" / "paysim_cleaned.csv"
+
+MANIFEST = "_manifest.json"
+PARTITION_KEY = "day"
+FORMATS = {"parquet": "parquet", "ipc": "ipc"}
+
+# Output schema of data_preprocess.preprocess_data
+PROCESSED_SCHEMA = {
+    "step": pl.Int32,
+    "type": pl.Int8,
+    "amount": pl.Float64,
+    "oldbalanceOrg": pl.Float64,
+    "newbalanceOrig": pl.Float64,
+    "oldbalanceDest": pl.Float64,
+    "newbalanceDest": pl.Float64,
+    "isFraud": pl.Int8,
+    "errorBalanceOrig": pl.Float64,
+    "errorBalanceDest": pl.Float64,
+    "is_large_transaction": pl.Int8,
+    "hour": pl.Int8,
+    "day": pl.Int16,
+}
+
+
+def _cast(lf: pl.LazyFrame, schema: dict) -> pl.LazyFrame:
+    present = lf.collect_schema().names()
+    return lf.with_columns([pl.col(c).cast(t) for c, t in schema.items() if c in present])
+
+
+def write_dataset(df: pl.DataFrame | pl.LazyFrame, path: Path = PROCESSED_DIR, fmt: str = "parquet",
+                  schema: dict = PROCESSED_SCHEMA, partition_by: str = PARTITION_KEY) -> Path:
+    """
+    Write `df` as a typed, partitioned dataset under `path`.
+
+    LazyFrames are streamed straight into the partition files. The dataset is
+    staged in a sibling directory and swapped in at the end, so readers never
+    see a half-written or mixed-version dataset.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown dataset format: {fmt!r} (expected one of {sorted(FORMATS)})")
+
+    path = Path(path)
+    staging = path.with_name(path.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    lf = _cast(df.lazy(), schema)
+    target = pl.PartitionBy(staging, key=partition_by)
+    if fmt == "parquet":
+        lf.sink_parquet(target, compression="zstd", mkdir=True)
+    else:
+        # Uncompressed IPC is memory-mapped zero-copy on read
+        lf.sink_ipc(target, compression=None, mkdir=True)
+
+    final_schema = lf.collect_schema()
+    manifest = {
+        "format": fmt,
+        "partition_by": partition_by,
+        "schema": {name: str(dtype) for name, dtype in final_schema.items()},
+    }
+    with open(staging / MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    if path.exists():
+        old = path.with_name(path.name + ".old")
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(path, old)
+        os.replace(staging, path)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        os.replace(staging, path)
+    logger.info(f"Wrote {fmt} dataset partitioned by {partition_by} to {path}")
+    return path
+
+
+def read_manifest(path: Path = PROCESSED_DIR) -> dict:
+    with open(Path(path) / MANIFEST, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _partition_files(path: Path, fmt: str, key: str, days: list[int] | None = None) -> list[str]:
+    """Partition files in numeric key order, so scans preserve `step` order."""
+    parts = []
+    for part in path.glob(f"{key}=*"):
+        value = int(part.name.split("=", 1)[1])
+        if days is None or value in days:
+            parts.append((value, part))
+    return [str(f) for _, part in sorted(parts) for f in sorted(part.glob(f"*.{FORMATS[fmt]}"))]
+
+
+def list_partitions(path: Path = PROCESSED_DIR) -> list[int]:
+    """Partition key values (days) present in a dataset, ascending."""
+    path = Path(path)
+    key = read_manifest(path)["partition_by"]
+    return sorted(int(p.name.split("=", 1)[1]) for p in path.glob(f"{key}=*") if p.is_dir())
+
+
+def scan_dataset(path: Path = PROCESSED_DIR, columns: list[str] | None = None,
+                 days: list[int] | None = None) -> pl.LazyFrame:
+    """
+    Lazily open a dataset written by `write_dataset`.
+
+    `days` prunes partitions before anything is opened and `columns` is
+    pushed down into the scan, so only those bytes are read from disk.
+    """
+    path = Path(path)
+    manifest = read_manifest(path)
+    fmt = manifest["format"]
+    key = manifest["partition_by"]
+    hive_schema = {key: getattr(pl, manifest["schema"][key])}
+
+    files = _partition_files(path, fmt, key, days=None if days is None else set(days))
+    if not files:
+        empty = pl.DataFrame(schema={c: getattr(pl, t) for c, t in manifest["schema"].items()})
+        lf = empty.lazy()
+    elif fmt == "parquet":
+        lf = pl.scan_parquet(files, hive_partitioning=True, hive_schema=hive_schema)
+    else:
+        lf = pl.scan_ipc(files, hive_partitioning=True, hive_schema=hive_schema)
+
+    if columns is not None:
+        lf = lf.select(columns)
+    return lf
+
+
+def load_dataset(path: Path = PROCESSED_DIR, columns: list[str] | None = None,
+                 days: list[int] | None = None) -> pl.DataFrame:
+    logger.info(f"Loading dataset from {path}")
+    return scan_dataset(path, columns=columns, days=days).collect()
+
+
+def dataset_fingerprint(path: Path = PROCESSED_DIR) -> str:
+    """Content hash of a dataset (manifest plus every partition file), for provenance."""
+    path = Path(path)
+    manifest = read_manifest(path)
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode())
+    for file in _partition_files(path, manifest["format"], manifest["partition_by"]):
+        digest.update(os.path.relpath(file, path).encode())
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stratified_sample(lf: pl.LazyFrame, n_rows: int, by: list[str], seed: int = 0) -> pl.LazyFrame:
+    """
+    About `n_rows` rows with each `by` stratum kept at its population share
+    (at least one row per stratum). Rows are picked by a seeded hash, so the
+    same seed gives the same sample.
+    """
+    total = lf.select(pl.len()).collect().item()
+    if n_rows >= total:
+        return lf
+    fraction = n_rows / total
+    rank = pl.struct(pl.all()).hash(seed).rank("ordinal").over(by)
+    return lf.filter(rank <= (pl.len().over(by) * fraction).ceil())
+
+
+def export_csv(path: Path = PROCESSED_DIR, out_path: Path = PROCESSED_CSV) -> Path:
+    """Stream a dataset back out to a single CSV file."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    scan_dataset(path).sink_csv(out_path)
+    logger.info(f"Exported dataset {path} to {out_path}")
+    return out_path
@@ -0,0 +1,42 @@
+"""Dashboard aggregates: the precomputed numbers match a direct computation over the rows."""
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate
+from dashboard import aggregates
+from data_preprocess import preprocess_data
+from utils.storage import load_dataset, write_dataset
+
+
+def _box(values: np.ndarray) -> dict:
+    q1, med, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    lo, hi = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    inside = values[(values >= lo) & (values <= hi)]
+    return {"count": len(values), "q1": q1, "med": med, "q3": q3, "mean": values.mean(),
+            "whislo": inside.min(), "whishi": inside.max(), "outliers": int(len(values) - len(inside))}
+
+
+def test_aggregates_match_the_rows_and_round_trip(tmp_path):
+    write_dataset(preprocess_data(generate(20_000, fraud_rate=0.05, seed=7)), tmp_path / "dataset")
+    agg = aggregates.build_aggregates(tmp_path / "dataset", preview_rows=50)
+    df = load_dataset(tmp_path / "dataset")
+
+    assert agg["target"] == "isFraud" and agg["rows"] == df.height
+    counts = df["isFraud"].value_counts()
+    assert agg["class_counts"] == {str(k): v for k, v in counts.iter_rows()}
+
+    amount, fraud = df["amount"].to_numpy(), df["isFraud"].to_numpy()
+    assert agg["correlations"]["amount"] == pytest.approx(np.corrcoef(amount, fraud)[0, 1])
+    for label in (0, 1):
+        assert agg["box_stats"]["amount"][str(label)] == pytest.approx(_box(amount[fraud == label]))
+
+    preview = agg["preview"]
+    assert len(preview["rows"]) == 50 and set(preview["columns"]) == set(df.columns)
+    assert any(row[preview["columns"].index("isFraud")] == 1 for row in preview["rows"])  # stratified
+
+    path = aggregates.save_aggregates(agg, tmp_path / "aggregates.json")
+    assert aggregates.load_aggregates(path) == agg
+    path.write_text(path.read_text().replace('"aggregates_version": 1', '"aggregates_version": 0'))
+    with pytest.raises(ValueError):
+        aggregates.load_aggregates(path)
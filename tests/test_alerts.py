@@ -0,0 +1,43 @@
+"""Alert aggregation: dedup window, counters, escalation and resume."""
+
+from incident.alerts import AlertAggregator
+from incident.store import IncidentStore
+
+
+def test_repeats_roll_into_one_incident_and_escalate(tmp_path):
+    store = IncidentStore(tmp_path / "incidents.db")
+    agg = AlertAggregator(store, window_seconds=60, flush_interval=1e9, clock=lambda: 0.0)
+
+    assert agg.fire("Data Drift", {"drift_score": 0.25}, ["amount", "step"], now=0) == "opened"
+    assert agg.fire("Data Drift", {"drift_score": 0.22}, ["step", "amount"], now=30) == "suppressed"
+    assert agg.fire("Data Drift", {"drift_score": 0.5}, ["amount", "step"], now=60) == "escalated"
+    assert agg.fire("Data Drift", {"drift_score": 0.3}, ["amount"], now=61) == "opened"
+    assert agg.fire("Data Drift", {"drift_score": 0.3}, ["amount", "step"], now=200) == "opened"
+    agg.close()
+
+    incidents = store.tail(10)
+    assert len(incidents) == 3
+    first = incidents[0]
+    assert first["severity"] == "P1"
+    assert first["details"]["count"] == 3 and first["details"]["escalated_from"] == "P2"
+    assert first["details"]["peak"] == {"drift_score": 0.5}
+    assert first["details"]["last_seen"] == "1970-01-01T00:01:00Z"
+
+    # A new process resumes the open incident that fired within the window
+    again = AlertAggregator(store, window_seconds=60, clock=lambda: 230.0)
+    assert again.fire("Data Drift", {"drift_score": 0.3}, ["amount", "step"]) == "suppressed"
+    again.close()
+    assert store.tail(1)[0]["details"]["count"] == 2
+
+
+def test_missing_report_is_aggregated_like_drift(tmp_path):
+    from alert_manager import check_drift
+
+    store = IncidentStore(tmp_path / "incidents.db")
+    agg = AlertAggregator(store, window_seconds=3600, flush_interval=1e9, clock=lambda: 0.0)
+    for _ in range(3):  # three cron ticks without a report
+        check_drift(report_path=tmp_path / "missing.json", profile_path=None, aggregator=agg)
+    agg.close()
+    [incident] = store.tail(10)
+    assert incident["incident_type"] == "Missing Report" and incident["severity"] == "HIGH"
+    assert incident["details"]["count"] == 3
@@ -0,0 +1,32 @@
+"""Contribution-shift attribution: additivity, chunking and ranking."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from incident.attribution import ContributionSummary, contribution_shift, margin_shift, summarize_contributions
+
+
+def test_shift_splits_margin_change_and_ignores_unused_drift():
+    rng = np.random.default_rng(0)
+    ref = pd.DataFrame(rng.normal(size=(4000, 3)), columns=["used", "weak", "unused"])
+    y = (ref["used"] + 0.2 * ref["weak"] + rng.normal(0, 0.5, len(ref)) > 1).astype(int)
+    model = xgb.XGBClassifier(n_estimators=20, max_depth=2).fit(ref[["used", "weak"]].assign(unused=0.0), y)
+
+    # "unused" drifts hard but the model never splits on it
+    prod = ref.assign(used=ref["used"] + 0.5, unused=ref["unused"] * 5 + 3)
+    ref_s = summarize_contributions(model, ref)
+    prod_s = summarize_contributions(model, prod, memory_mb=0.01, max_rows=None)  # many 1k-row chunks
+    shift = contribution_shift(ref_s, prod_s)
+
+    assert shift.index[0] == "used"
+    assert shift.loc["unused", "abs_shift"] == pytest.approx(0.0, abs=1e-9)
+    margin = model.get_booster().predict(xgb.DMatrix(prod), output_margin=True).mean() - \
+        model.get_booster().predict(xgb.DMatrix(ref), output_margin=True).mean()
+    assert shift["shift"].sum() == pytest.approx(margin, abs=1e-4)
+    assert margin_shift(ref_s, prod_s)["margin_shift"] == pytest.approx(margin, abs=1e-4)
+
+    restored = ContributionSummary.from_dict(ref_s.to_dict(model_version="x"))
+    assert np.allclose(restored.mean, ref_s.mean) and restored.n == 4000
@@ -0,0 +1,31 @@
+"""Micro-batcher shutdown: no caller is left waiting on a stopped batcher."""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from batcher import MicroBatcher
+
+
+def test_stop_fails_queued_and_in_flight_rows():
+    release = threading.Event()
+
+    def slow_score(X):
+        release.wait(5)
+        return np.zeros(len(X), dtype=int), np.zeros(len(X))
+
+    async def main():
+        batcher = MicroBatcher(slow_score, max_batch_size=2, max_wait_ms=0, n_features=3)
+        await batcher.start()
+        calls = [asyncio.ensure_future(batcher.submit(np.zeros(3))) for _ in range(5)]
+        await asyncio.sleep(0.05)  # the first batch is in the model, the rest queued
+        threading.Timer(0.05, release.set).start()  # stop() waits for the model call to return
+        await batcher.stop()
+        results = await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), 1)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        with pytest.raises(RuntimeError):
+            await batcher.submit(np.zeros(3))
+
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+"""Numeric parity between CompiledModel and xgboost."""
+
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from compiled_model import CompiledModel, compile_booster
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(4000, 6)).astype(np.float32)
+    X[rng.random(X.shape) < 0.1] = np.nan  # exercise default directions
+    y = ((np.nan_to_num(X[:, 0]) + np.nan_to_num(X[:, 1]) ** 2 + rng.normal(0, 0.5, len(X))) > 1).astype(int)
+    clf = xgb.XGBClassifier(n_estimators=60, max_depth=5, scale_pos_weight=3.0, eval_metric="logloss")
+    clf.fit(X, y)
+    return clf, X
+
+
+def test_probability_and_label_match_xgboost(fitted):
+    clf, X = fitted
+    label, proba = compile_booster(clf).predict(X)
+    np.testing.assert_allclose(proba, clf.predict_proba(X)[:, 1], rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(label, clf.predict(X))
+
+
+def test_margin_matches_xgboost(fitted):
+    clf, X = fitted
+    margin = compile_booster(clf).predict_margin(X)
+    np.testing.assert_allclose(margin, clf.get_booster().inplace_predict(X, predict_type="margin"), atol=1e-5)
+
+
+def test_round_trip_without_pickle(fitted, tmp_path):
+    clf, X = fitted
+    compiled = compile_booster(clf)
+    path = compiled.save(tmp_path / "model.npz")
+    loaded = CompiledModel.load(path)
+    assert loaded.n_trees == compiled.n_trees
+    np.testing.assert_array_equal(loaded.predict(X)[1], compiled.predict(X)[1])
+
+
+def test_single_row(fitted):
+    clf, X = fitted
+    _, proba = compile_booster(clf).predict(X[3])
+    assert proba.shape == (1,)
+    assert abs(proba[0] - clf.predict_proba(X[3:4])[0, 1]) < 1e-6
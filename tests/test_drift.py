@@ -0,0 +1,59 @@
+"""Drift engine scores against scipy and known cases."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from incident.drift import DriftEngine, build_profile, ks_statistic
+
+stats = pytest.importorskip("scipy.stats")
+
+
+def test_ks_matches_scipy_with_ties():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        n, m = rng.integers(2, 60, 2)
+        ref = np.sort(rng.integers(0, 5, n).astype(float))
+        prod = np.sort(rng.integers(0, 5, m).astype(float) + rng.integers(0, 2))
+        assert ks_statistic(ref, prod) == pytest.approx(stats.ks_2samp(ref, prod).statistic, abs=1e-12)
+
+
+def test_compare_scores_every_column():
+    rng = np.random.default_rng(1)
+    ref = pd.DataFrame({"a": rng.normal(size=5000), "b": rng.normal(size=5000),
+                        "kind": rng.choice(["x", "y"], 5000), "label": 0})
+    prod = pd.DataFrame({"a": rng.normal(size=8000), "b": rng.normal(2.0, 1.0, size=8000),
+                         "kind": rng.choice(["x", "y", "z"], 8000)})
+    prod.loc[::5, "a"] = np.nan
+
+    out = DriftEngine(ref).compare(prod)
+    assert set(out.index) == {"a", "b", "kind"}
+    assert out.loc["a", "ks"] == pytest.approx(stats.ks_2samp(ref["a"], prod["a"].dropna()).statistic)
+    assert out.loc["b"].gt(out.loc["a"]).all()
+    assert out.loc["a", "psi"] < 0.01 and out.loc["b", "psi"] > 1.0
+    assert 0.0 <= out["js"].min() and out["js"].max() <= 1.0
+    assert out.loc["kind", "ks"] == pytest.approx(1 / 3, abs=0.05)
+
+
+def test_identical_samples_have_no_drift():
+    ref = pd.DataFrame({"a": np.arange(1000, dtype=float)})
+    out = DriftEngine(ref).compare(ref)
+    assert out.loc["a"].abs().max() < 1e-9
+
+
+def test_profile_matches_raw_reference():
+    rng = np.random.default_rng(2)
+    ref = pd.DataFrame({"a": rng.lognormal(size=20_000), "t": rng.integers(0, 2, 20_000),
+                        "kind": rng.choice(["x", "y"], 20_000)})
+    prod = pd.DataFrame({"a": rng.lognormal(0.3, 1.0, size=30_000), "t": rng.integers(0, 2, 30_000),
+                         "kind": rng.choice(["x", "y", "z"], 30_000)})
+
+    profile = json.loads(json.dumps(build_profile(ref, bins=10, n_quantiles=201)))
+    raw = DriftEngine(ref, bins=10).compare(prod)
+    from_profile = DriftEngine.from_profile(profile).compare(prod)
+
+    np.testing.assert_allclose(from_profile[["psi", "js"]], raw[["psi", "js"]])
+    np.testing.assert_allclose(from_profile["ks"], raw["ks"], atol=1 / 200)
+    assert profile["features"]["t"]["categories"].keys() == {"0", "1"}
@@ -0,0 +1,38 @@
+"""Threshold curves and bootstrap AUPRC against sklearn."""
+
+import numpy as np
+import pytest
+from sklearn.metrics import average_precision_score, precision_recall_curve
+
+import eval as evaluation
+
+
+def _scores(n=50_000, seed=0):
+    rng = np.random.default_rng(seed)
+    y = rng.random(n) < 0.02
+    return y, np.round(np.clip(rng.normal(0.3 + 0.3 * y, 0.2), 0, 1), 3)  # rounded: many ties
+
+
+def test_curve_matches_sklearn_with_ties():
+    y, score = _scores()
+    curve = evaluation.threshold_curve(y, score, cost_fp=1.0, cost_fn=10.0)
+    precision, recall, thresholds = precision_recall_curve(y, score)
+
+    assert np.allclose(curve["threshold"][::-1], thresholds)
+    assert np.allclose(curve["precision"][::-1], precision[:-1])
+    assert np.allclose(curve["recall"][::-1], recall[:-1])
+    assert evaluation.average_precision(curve) == pytest.approx(average_precision_score(y, score), abs=1e-12)
+
+    row = curve.iloc[len(curve) // 2]
+    flagged = score >= row["threshold"]
+    assert row["fp"] == (flagged & ~y).sum()
+    assert row["cost"] == pytest.approx((flagged & ~y).sum() + 10.0 * (~flagged & y).sum())
+
+
+def test_bootstrap_interval_covers_the_estimate_and_is_reproducible():
+    y, score = _scores(seed=1)
+    ap = average_precision_score(y, score)
+    ci = evaluation.bootstrap_auprc(y, score, n_boot=400, seed=3, memory_mb=0.1, workers=2)  # many small blocks
+    assert ci["low"] < ap < ci["high"]
+    assert 0 < ci["std"] < 0.05
+    assert ci == evaluation.bootstrap_auprc(y, score, n_boot=400, seed=3, memory_mb=0.1, workers=1)
@@ -0,0 +1,104 @@
+"""
+Parity tests: every input type must produce byte-identical model features,
+and they must match what preprocess_data writes for training.
+"""
+
+import numpy as np
+import polars as pl
+import pytest
+
+import features
+from features import FEATURE_COLUMNS, RAW_COLUMNS, to_matrix, transform
+
+
+@pytest.fixture
+def raw() -> pl.DataFrame:
+    # Covers both balance sentinels, the large-transaction boundary, day
+    # rollover, string and pre-encoded types
+    return pl.DataFrame({
+        "step": [1, 23, 24, 25, 743, 100],
+        "type": ["TRANSFER", "CASH_OUT", "TRANSFER", "CASH_OUT", "TRANSFER", "CASH_OUT"],
+        "amount": [181.0, 200_000.0, 200_000.01, 0.0, 1_234_567.89, 0.1 + 0.2],
+        "oldbalanceOrg": [181.0, 0.0, 5000.0, 0.0, 1_234_567.89, 0.3],
+        "newbalanceOrig": [0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+        "oldbalanceDest": [0.0, 21182.0, 0.0, 0.0, 10.5, 0.0],
+        "newbalanceDest": [0.0, 0.0, 200_000.01, 0.0, 1_234_578.39, 0.0],
+    })
+
+
+def _record_batch(df: pl.DataFrame) -> np.ndarray:
+    return df.to_pandas().to_records(index=False)
+
+
+def test_matrix_identical_across_input_types(raw):
+    expected = to_matrix(raw)
+    from_lazy = to_matrix(raw.lazy())
+    from_pandas = to_matrix(raw.to_pandas())
+    from_records = to_matrix(_record_batch(raw))
+    from_dicts = np.vstack([to_matrix(row) for row in raw.iter_rows(named=True)])
+
+    for other in (from_lazy, from_pandas, from_records, from_dicts):
+        assert other.dtype == np.float32
+        assert other.tobytes() == expected.tobytes()
+
+
+def test_transform_values_identical_across_input_types(raw):
+    polars_out = transform(raw)
+    pandas_out = transform(raw.to_pandas())
+    records_out = transform(_record_batch(raw))
+    dict_out = [transform(row) for row in raw.iter_rows(named=True)]
+
+    for col in FEATURE_COLUMNS:
+        expected = polars_out[col].cast(pl.Float64).to_numpy()
+        np.testing.assert_array_equal(pandas_out[col].to_numpy(np.float64), expected)
+        np.testing.assert_array_equal(records_out[col], expected)
+        np.testing.assert_array_equal(np.array([r[col] for r in dict_out]), expected)
+
+
+def test_encoded_type_matches_string_type(raw):
+    encoded = raw.with_columns(features.encode_type_expr())
+    assert to_matrix(encoded).tobytes() == to_matrix(raw).tobytes()
+    assert to_matrix(encoded.to_pandas()).tobytes() == to_matrix(raw).tobytes()
+
+
+def test_sentinels(raw):
+    out = transform(raw.row(0, named=True))
+    assert out["oldbalanceDest"] == out["newbalanceDest"] == features.DEST_SENTINEL
+    out = transform(raw.row(1, named=True))
+    assert np.isnan(out["oldbalanceOrg"]) and np.isnan(out["newbalanceOrig"])
+    assert np.isnan(out["errorBalanceOrig"])
+    # amount == 0 never triggers a sentinel
+    zero = transform(raw.row(3, named=True))
+    assert zero["oldbalanceDest"] == 0.0 and zero["oldbalanceOrg"] == 0.0
+
+
+def test_transform_is_idempotent(raw):
+    once = transform(raw)
+    twice = transform(once)
+    assert to_matrix(twice).tobytes() == to_matrix(once).tobytes()
+
+
+def test_matches_preprocess_output(raw):
+    from data_preprocess import preprocess_data
+
+    full = raw.with_columns(
+        pl.lit("C1").alias("nameOrig"),
+        pl.lit("M1").alias("nameDest"),
+        pl.lit(0).alias("isFraud"),
+        pl.lit(0).alias("isFlaggedFraud"),
+    )
+    processed = preprocess_data(full)
+    assert to_matrix(processed.select(FEATURE_COLUMNS)).tobytes() == to_matrix(raw).tobytes()
+
+
+def test_missing_values_become_nan():
+    tx = {c: 1.0 for c in RAW_COLUMNS}
+    tx["amount"] = None
+    X = to_matrix(tx)
+    assert np.isnan(X[0, FEATURE_COLUMNS.index("amount")])
+    assert np.isnan(X[0, FEATURE_COLUMNS.index("errorBalanceDest")])
+
+
+def test_rejects_unknown_input():
+    with pytest.raises(TypeError):
+        transform([1, 2, 3])
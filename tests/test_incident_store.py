@@ -0,0 +1,70 @@
+"""Incident store: migration, queries and concurrent writers."""
+
+import csv
+import json
+import multiprocessing as mp
+
+from incident.store import IncidentStore
+
+
+def _write(path, worker, n):
+    store = IncidentStore(path)
+    with store.batch():
+        for i in range(n):
+            store.append({"incident_type": "Load", "severity": "P4", "details": {"worker": worker, "i": i}})
+
+
+def test_migrate_both_logs_once(tmp_path):
+    jsonl = tmp_path / "incident_log.jsonl"
+    jsonl.write_text("\n".join(json.dumps(e) for e in [
+        {"timestamp": "2025-11-21T16:32:10Z", "incident_type": "Missing Feature", "severity": "P1",
+         "details": {"rows_affected_pct": 0.12}, "status": "resolved", "notes": "fixed"},
+        {"timestamp": "2025-11-22T08:00:00Z", "incident_type": "Data Drift", "severity": "P2",
+         "details": {"drift_score": 0.27}, "status": "open", "notes": ""},
+    ]) + "\n")
+    log_csv = tmp_path / "log.csv"
+    with open(log_csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "alert_type", "severity", "root_cause", "status", "notes"])
+        writer.writerow(["2025-11-23 10:00:00", "Data Drift", "HIGH", "PENDING", "OPEN", "drift_score=0.3"])
+
+    store = IncidentStore(tmp_path / "incidents.db")
+    assert store.migrate(jsonl, log_csv) == {"jsonl": 2, "csv": 1}
+    assert store.migrate(jsonl, log_csv) == {"jsonl": 0, "csv": 0}
+
+    assert [i["incident_type"] for i in store.tail(2)] == ["Data Drift", "Data Drift"]
+    assert store.tail(1)[0]["status"] == "open" and store.tail(1)[0]["details"] == {"root_cause": "PENDING"}
+    assert [i["severity"] for i in store.query(since="2025-11-22", severity=["P1", "P2"])] == ["P2"]
+    assert [i["notes"] for i in store.query(until="2025-11-22T00:00:00Z")] == ["fixed"]
+    assert store.counts("status") == {"open": 2, "resolved": 1}
+
+
+def test_concurrent_process_writers(tmp_path):
+    path = str(tmp_path / "incidents.db")
+    IncidentStore(path)
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=_write, args=(path, w, 200)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+
+    store = IncidentStore(path)
+    assert len(store) == 800
+    assert store.counts("incident_type") == {"Load": 800}
+    assert len(store.query(after_id=790)) == 10
+
+
+def test_batch_discards_its_rows_when_the_block_raises(tmp_path):
+    store = IncidentStore(tmp_path / "incidents.db")
+    try:
+        with store.batch():
+            store.append({"incident_type": "Load", "severity": "P4", "details": {}})
+            raise RuntimeError("half-built batch")
+    except RuntimeError:
+        pass
+    assert len(store) == 0
+    with store.batch():
+        store.append({"incident_type": "Load", "severity": "P4", "details": {}})
+    assert len(store) == 1
@@ -0,0 +1,62 @@
+"""Batch inference: a run interrupted mid-file resumes from its checkpoint to the same output."""
+
+import json
+
+import numpy as np
+import polars as pl
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from benchmarks.synthetic import generate
+from features import to_matrix
+from inference import run_batch
+
+
+class _Crashing:
+    """Scores like `model` until `after` batches have been scored, then fails."""
+
+    def __init__(self, model, after):
+        self.model, self.after = model, after
+
+    def get_booster(self):
+        return self
+
+    def inplace_predict(self, X, **kwargs):
+        if self.after == 0:
+            raise RuntimeError("worker killed")
+        self.after -= 1
+        return self.model.get_booster().inplace_predict(X, **kwargs)
+
+
+@pytest.fixture
+def model_and_input(tmp_path):
+    raw = generate(3_000, fraud_rate=0.05, seed=5)
+    model = xgb.XGBClassifier(n_estimators=5, max_depth=3).fit(to_matrix(raw), raw["isFraud"].to_numpy())
+    path = tmp_path / "transactions.csv"
+    raw.write_csv(path)
+    return model, path
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_interrupted_run_resumes_to_the_same_output(model_and_input, tmp_path, fmt):
+    model, input_path = model_and_input
+    expected = tmp_path / f"expected.{fmt}"
+    assert run_batch(model, input_path, expected, batch_size=500, workers=1, fmt=fmt) == 3_000
+
+    output = tmp_path / f"resumed.{fmt}"
+    with pytest.raises(RuntimeError):
+        run_batch(_Crashing(model, after=3), input_path, output, batch_size=500, workers=1, fmt=fmt)
+    ckpt = output.with_name(output.name + ".ckpt.json")
+    assert 0 < json.loads(ckpt.read_text())["rows_done"] < 3_000
+    if fmt == "csv":
+        with open(output, "ab") as f:
+            f.write(b"half a row,0.")  # bytes past the checkpoint: truncated on resume
+
+    assert run_batch(model, input_path, output, batch_size=500, workers=1, fmt=fmt) == 3_000
+    assert not ckpt.exists()
+    read = pl.read_csv if fmt == "csv" else (lambda p: pl.read_parquet(p / "*.parquet"))
+    resumed, full = read(output), read(expected)
+    assert resumed.height == 3_000
+    assert resumed["nameOrig"].equals(full["nameOrig"])
+    assert np.allclose(resumed["fraud_proba"].to_numpy(), full["fraud_proba"].to_numpy())
@@ -0,0 +1,103 @@
+"""Spans, the Prometheus text format, the cost of a span with sampling off, and structured log lines."""
+
+import json
+import logging
+import time
+
+import pytest
+
+from utils import instrument
+from utils.instrument import Registry, span
+from utils.logger import StructuredFormatter
+
+
+@pytest.fixture
+def sampling():
+    yield instrument.set_sample_rate
+    instrument.set_sample_rate(1.0)
+
+
+def test_span_records_latency_and_errors(sampling):
+    @span("test_op", stage="unit")
+    def op(fail=False):
+        if fail:
+            raise ValueError("boom")
+        return 42
+
+    assert op() == 42
+    with pytest.raises(ValueError):
+        op(fail=True)
+    with span("test_op", stage="unit"):
+        pass
+    sampling(0.0)
+    op()  # not timed
+    with pytest.raises(ValueError):
+        op(fail=True)  # not timed, but still counted as an error
+    with pytest.raises(ValueError), span("test_op", stage="unit"):
+        raise ValueError("boom")
+
+    text = instrument.render()
+    assert 'breeboost_test_op_seconds_count{stage="unit"} 3' in text
+    assert 'breeboost_test_op_seconds_bucket{le="+Inf",stage="unit"} 3' in text
+    assert 'breeboost_test_op_errors_total{stage="unit"} 3' in text
+    assert "# TYPE breeboost_test_op_seconds histogram" in text
+
+
+def test_lazy_preprocess_is_timed_when_sunk(tmp_path):
+    import polars as pl
+    from data_preprocess import preprocess_data, save_preprocessed_data
+
+    raw = pl.DataFrame({
+        "step": [1, 2], "type": ["TRANSFER", "PAYMENT"], "amount": [10.0, 5.0],
+        "nameOrig": ["C1", "C2"], "oldbalanceOrg": [10.0, 5.0], "newbalanceOrig": [0.0, 0.0],
+        "nameDest": ["C3", "M1"], "oldbalanceDest": [0.0, 0.0], "newbalanceDest": [10.0, 0.0],
+        "isFraud": [0, 0], "isFlaggedFraud": [0, 0],
+    })
+    built = instrument.histogram("preprocess_data_seconds")
+    saved = instrument.histogram("save_preprocessed_data_seconds")
+    before = (built.count, saved.count)
+    save_preprocessed_data(preprocess_data(raw.lazy()), tmp_path / "clean.parquet")
+    assert (built.count, saved.count) == (before[0], before[1] + 1)
+    assert pl.read_parquet(tmp_path / "clean.parquet").height == 1
+
+
+def test_registry_renders_cumulative_buckets_and_collectors():
+    registry = Registry("t")
+    hist = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        hist.observe(value)
+    registry.register_collector(lambda: [("cache_hits", "gauge", "Cache hits", 7, {})])
+    lines = registry.render().splitlines()
+    assert 't_latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 't_latency_seconds_bucket{le="1"} 3' in lines
+    assert 't_latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "t_latency_seconds_sum 6.05" in lines
+    assert "t_cache_hits 7" in lines
+
+
+def test_span_costs_under_a_microsecond_with_sampling_off(sampling):
+    def bare(x):
+        return x
+
+    wrapped = span("test_overhead")(bare)
+    sampling(0.0)
+    n = 200_000
+
+    def per_call(fn):
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            for i in range(n):
+                fn(i)
+            best = min(best, (time.perf_counter() - start) / n)
+        return best
+
+    assert per_call(wrapped) - per_call(bare) < 1e-6
+
+
+def test_structured_log_line():
+    record = logging.LogRecord("pipeline", logging.INFO, __file__, 1, "trained in %d s", (3,), None)
+    record.fields = {"span": "train_model", "duration_ms": 3000.0}
+    entry = json.loads(StructuredFormatter().format(record))
+    assert entry["msg"] == "trained in 3 s" and entry["level"] == "INFO"
+    assert entry["span"] == "train_model" and entry["duration_ms"] == 3000.0
@@ -0,0 +1,43 @@
+"""Live monitoring state: refreshes only consume new rows and incidents."""
+
+import numpy as np
+import pandas as pd
+
+from incident.store import IncidentStore
+from monitoring.live import LiveMonitor
+
+
+def _scored(rng, n, shift=0.0):
+    proba = rng.uniform(size=n)
+    return pd.DataFrame({"amount": rng.normal(shift, 1.0, n), "prediction": (proba > 0.9).astype(int),
+                         "fraud_proba": proba})
+
+
+def test_refresh_is_incremental(tmp_path):
+    rng = np.random.default_rng(0)
+    _scored(rng, 5000).to_csv(tmp_path / "reference.csv", index=False)
+    prod = tmp_path / "production.csv"
+    _scored(rng, 1000).to_csv(prod, index=False)
+    store = IncidentStore(tmp_path / "incidents.db")
+    store.append({"incident_type": "Data Drift", "severity": "P2", "details": {"count": 3}})
+
+    now = [0.0]
+    live = LiveMonitor(prod, tmp_path / "reference.csv", store, bucket_seconds=60, history_buckets=2,
+                       clock=lambda: now[0])
+    assert live.refresh() == {"rows": 1000, "incidents": 0}  # history isn't new
+    assert len(live.open_incidents) == 1
+    assert live.refresh() == {"rows": 0, "incidents": 0}
+
+    for t in (30.0, 90.0, 150.0):
+        now[0] = t
+        _scored(rng, 500, shift=2.0).to_csv(prod, mode="a", header=False, index=False)
+        assert live.refresh()["rows"] == 500
+    assert live.rows == 2500
+    assert list(live.fraud_rate()["rows"]) == [500, 500]  # only the last two buckets are kept
+    assert live.score_histogram().sum() == 1000
+    assert live.feature_drift()["drifted_features"] == ["amount"]
+
+    store.append({"incident_type": "Missing Features", "severity": "P1", "details": {}})
+    assert live.refresh() == {"rows": 0, "incidents": 1}
+    assert list(live.incidents()["severity"]) == ["P1", "P2"]
+    assert live.incidents()["count"].tolist() == [1, 3]
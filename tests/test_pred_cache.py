@@ -0,0 +1,126 @@
+"""Prediction cache: identical scores, LRU/TTL eviction, the shared tier and invalidation on model swap."""
+
+import threading
+
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from inference import score_array
+from pred_cache import CachedModel
+
+
+def _model(seed=0, n_estimators=10):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(2000, 12)).astype(np.float32)
+    y = (X[:, 0] + rng.normal(0, 0.5, len(X)) > 1).astype(int)
+    return X, xgb.XGBClassifier(n_estimators=n_estimators, max_depth=2).fit(X, y)
+
+
+class _Swappable:
+    """The HotModel surface the cache relies on: `model`, `version` and `subscribe`."""
+
+    def __init__(self, model, version):
+        self.model, self.version, self._callbacks = model, version, []
+
+    def get_booster(self):
+        return self.model.get_booster()
+
+    def subscribe(self, callback):
+        self._callbacks.append(callback)
+
+    def swap(self, model, version):
+        old, self.model, self.version = self.version, model, version
+        for callback in self._callbacks:
+            callback(old, version)
+
+
+def test_cache_serves_identical_scores_and_evicts(monkeypatch):
+    X, model = _model()
+    cached = CachedModel(model, max_entries=500, ttl_seconds=60)
+    _, expected = score_array(model, X[:400])
+
+    pred, first = score_array(cached, X[:400])
+    signed = X[:400].copy()
+    signed[signed == 0] = -0.0
+    _, second = score_array(cached, signed)
+    assert np.array_equal(first, expected) and np.array_equal(second, expected)
+    assert np.array_equal(pred, (expected > 0.5).astype(np.int8))
+    stats = cached.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (400, 400, 0.5)
+
+    score_array(cached, X[400:800])  # 800 distinct rows in a 500-entry cache
+    assert cached.stats()["entries"] == 500 and cached.stats()["evictions"] == 300
+
+    import pred_cache
+    now = pred_cache.time.time()
+    monkeypatch.setattr(pred_cache.time, "time", lambda: now + 120)
+    score_array(cached, X[700:800])
+    assert cached.stats()["expired"] == 100
+
+
+def test_shared_tier_is_read_by_other_workers(tmp_path):
+    X, model = _model()
+    first = CachedModel(model, shared_path=tmp_path / "cache.db")
+    _, expected = score_array(first, X[:300])
+
+    second = CachedModel(model, shared_path=tmp_path / "cache.db")  # another worker, same artifact
+    _, proba = score_array(second, X[:300])
+    assert np.array_equal(proba, expected)
+    assert second.stats()["shared_hits"] == 300 and second.stats()["misses"] == 0
+
+
+def test_counters_add_up_under_concurrent_requests():
+    X, model = _model()
+    cached = CachedModel(model, bypass_rows=8)
+
+    def requests(offset):
+        for i in range(200):
+            start = (offset + i) % 100
+            score_array(cached, X[start:start + (1 if i % 3 else 16)])
+
+    threads = [threading.Thread(target=requests, args=(n * 7,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = cached.stats()
+    single = sum(1 for i in range(200) if i % 3)
+    assert stats["hits"] + stats["misses"] == 8 * single
+    assert stats["bypassed"] == 8 * (200 - single) * 16
+
+
+def test_model_swap_invalidates(tmp_path):
+    X, old = _model()
+    _, new = _model(seed=1, n_estimators=30)
+    hot = _Swappable(old, "v1")
+    cached = CachedModel(hot, shared_path=tmp_path / "cache.db")
+    score_array(cached, X[:200])
+
+    hot.swap(new, "v2")
+    _, proba = score_array(cached, X[:200])
+    assert np.array_equal(proba, score_array(new, X[:200])[1])
+    stats = cached.stats()
+    assert stats["model_version"] == "v2" and stats["invalidations"] == 1 and stats["misses"] == 400
+    versions = cached.shared._conn().execute("SELECT DISTINCT version FROM predictions").fetchall()
+    assert versions == [("v2",)]
+
+
+def test_cache_goes_under_the_shadow_layer(tmp_path):
+    from shadow import ShadowModel
+
+    X, primary = _model()
+    _, candidate = _model(seed=1, n_estimators=30)
+    with pytest.raises(TypeError):
+        CachedModel(ShadowModel(primary, candidate, log_path=None))
+
+    cached = CachedModel(primary)
+    shadow = ShadowModel(cached, candidate, canary_percent=50, log_path=None, linger_ms=1, seed=0)
+    rows = X[:200]
+    for _ in range(5):  # replays
+        for i in range(0, len(rows), 20):
+            score_array(shadow, rows[i:i + 20])
+    shadow.close()
+    assert shadow.stats()["rows"] == 5 * len(rows)  # every call compared, hits included
+    assert cached.stats()["hits"] > 0
@@ -0,0 +1,33 @@
+"""Preprocessing: the lazy, streamed pipeline writes the same rows as the eager one."""
+
+import polars as pl
+import pytest
+
+from benchmarks.synthetic import generate
+from data_preprocess import load_raw_data, preprocess_data, save_preprocessed_data, scan_raw_data
+from features import FEATURE_COLUMNS
+from utils.storage import PROCESSED_SCHEMA, load_dataset
+
+
+@pytest.fixture
+def raw_csv(tmp_path):
+    path = tmp_path / "raw.csv"
+    generate(5_000, fraud_rate=0.02, seed=4).write_csv(path)
+    return path
+
+
+def test_streamed_output_matches_eager(raw_csv, tmp_path):
+    eager = preprocess_data(load_raw_data(raw_csv))
+    assert isinstance(eager, pl.DataFrame)
+    assert eager["type"].n_unique() <= 2 and set(FEATURE_COLUMNS + ["isFraud"]) <= set(eager.columns)
+    assert not {"nameOrig", "nameDest", "isFlaggedFraud"} & set(eager.columns)
+
+    lazy = preprocess_data(scan_raw_data(raw_csv))
+    assert isinstance(lazy, pl.LazyFrame)
+    save_preprocessed_data(lazy, tmp_path / "dataset")
+    save_preprocessed_data(preprocess_data(scan_raw_data(raw_csv)), tmp_path / "clean.csv")
+
+    order = ["step", "amount"]
+    expected = eager.cast(PROCESSED_SCHEMA).sort(order)
+    assert load_dataset(tmp_path / "dataset").select(eager.columns).sort(order).equals(expected)
+    assert pl.read_csv(tmp_path / "clean.csv").cast(PROCESSED_SCHEMA).sort(order).equals(expected)
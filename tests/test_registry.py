@@ -0,0 +1,42 @@
+"""Registry versioning, rollback and hot reload."""
+
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from registry import HotModel, ModelRegistry
+
+
+def _fit(n_estimators):
+    rng = np.random.default_rng(n_estimators)
+    X = rng.normal(size=(500, 4)).astype(np.float32)
+    y = (X[:, 0] > 0.5).astype(int)
+    return xgb.XGBClassifier(n_estimators=n_estimators, max_depth=2).fit(X, y)
+
+
+def test_register_is_content_addressed(tmp_path):
+    registry = ModelRegistry(tmp_path)
+    clf = _fit(3)
+    version = registry.register(clf, {"auprc": 0.5})
+    assert registry.register(clf) == version
+    assert registry.current_version() == version
+    assert registry.metadata(version)["auprc"] == 0.5
+    assert {p.name for p in (tmp_path / "versions" / version).iterdir()} == {
+        "model.joblib", "model.ubj", "model.npz", "meta.json"}
+
+
+def test_hot_model_follows_pointer_and_rollback(tmp_path):
+    registry = ModelRegistry(tmp_path, keep_warm=2)
+    v1 = registry.register(_fit(3))
+    hot = HotModel(registry, poll_interval=3600)
+    swaps = []
+    hot.subscribe(lambda old, new: swaps.append((old, new)))
+
+    v2 = registry.register(_fit(5))
+    assert hot.version == v1
+    assert hot.refresh() and hot.version == v2
+    assert registry.rollback() == v1
+    assert hot.refresh() and hot.version == v1
+    assert swaps == [(v1, v2), (v2, v1)]
+    hot.close()
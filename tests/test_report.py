@@ -0,0 +1,33 @@
+"""Drift report: the JSON alert_manager reads, its files, and the on-demand Evidently page."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from incident.drift import DriftEngine
+from monitoring import report
+
+
+def test_native_report_is_written_where_alert_manager_reads_it(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    ref = pd.DataFrame({"a": rng.normal(size=5000), "b": rng.normal(size=5000)})
+    prod = pd.DataFrame({"a": rng.normal(2.0, 1.0, 2000), "b": rng.normal(size=2000)})
+    prod.loc[:99, "b"] = np.nan
+
+    out = report.native_report(prod, DriftEngine(ref), {"rows": len(ref)})
+    assert out["metrics"]["data_drift"]["drifted_features"] == ["a"]
+    assert out["metrics"]["data_drift"]["drift_score"] == 0.5
+    assert out["metrics"]["data_quality"]["missing_by_feature"] == {"b": 0.05}
+
+    monkeypatch.setattr(report, "REPORT_DIR", tmp_path)
+    monkeypatch.setattr(report, "LATEST_REPORT", tmp_path / "latest_report.json")
+    path = report.write_report(out, html_page=True)
+    assert json.loads((tmp_path / "latest_report.json").read_text()) == out
+    assert "50% of 2 features drifted" in path.with_suffix(".html").read_text()
+
+
+def test_evidently_report_without_reference_rows_is_skippable(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        report.evidently_report(pd.DataFrame({"a": [1.0]}), ref_path=tmp_path / "reference.csv")
@@ -0,0 +1,78 @@
+"""Scoring service: every endpoint over HTTP, with and without micro-batching."""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from batcher import MicroBatcher
+from benchmarks.synthetic import generate
+from features import to_matrix
+from inference import score_array
+from serve import make_server
+
+
+@pytest.fixture(scope="module")
+def model_and_rows():
+    raw = generate(3_000, fraud_rate=0.05, seed=6)
+    model = xgb.XGBClassifier(n_estimators=5, max_depth=3).fit(to_matrix(raw), raw["isFraud"].to_numpy())
+    return model, raw.head(20)
+
+
+@pytest.fixture(params=[False, True], ids=["direct", "micro-batch"])
+def service(request, model_and_rows):
+    model, rows = model_and_rows
+    batcher = MicroBatcher.for_model(model, max_batch_size=8, max_wait_ms=1) if request.param else None
+    server = make_server(model, port=0, batcher=batcher)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", model, rows
+    server.shutdown()
+    server.server_close()
+
+
+def _call(url, body=None):
+    data = None if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=5) as resp:
+            raw = resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        raw, status = e.read(), e.code
+    return status, raw
+
+
+def test_single_and_batch_scores_match_offline(service):
+    url, model, rows = service
+    _, expected = score_array(model, to_matrix(rows))
+    transactions = rows.to_dicts()
+
+    singles = [json.loads(_call(f"{url}/score", tx)[1]) for tx in transactions]
+    assert np.allclose([s["fraud_proba"] for s in singles], expected, atol=1e-6)
+    assert [s["prediction"] for s in singles] == (expected > 0.5).astype(int).tolist()
+
+    status, body = _call(f"{url}/score/batch", {"transactions": transactions})
+    assert status == 200 and np.allclose(json.loads(body)["fraud_proba"], expected, atol=1e-6)
+    status, body = _call(f"{url}/score/batch", {"rows": to_matrix(rows).tolist()})
+    assert status == 200 and np.allclose(json.loads(body)["fraud_proba"], expected, atol=1e-6)
+    assert json.loads(_call(f"{url}/score/batch", {"transactions": []})[1]) == {"predictions": [], "fraud_proba": []}
+
+
+def test_health_stats_metrics_and_errors(service):
+    url, _, rows = service
+    assert json.loads(_call(f"{url}/health")[1]) == {"status": "ok"}
+    _call(f"{url}/score/batch", {"transactions": rows.to_dicts()})
+
+    stats = json.loads(_call(f"{url}/stats")[1])
+    # batch_total is recorded after the response is sent; batch_model before it
+    assert stats["rows_scored"] == len(rows) and stats["latency"]["batch_model"]["count"] == 1
+    status, metrics = _call(f"{url}/metrics")
+    assert status == 200 and b"serve_request_seconds" in metrics and b"serve_rows_scored 20" in metrics
+
+    assert _call(f"{url}/score", b"{not json")[0] == 400
+    assert _call(f"{url}/score/batch", {"rows": [[1.0, 2.0]]})[0] == 400
+    assert _call(f"{url}/nope")[0] == 404
@@ -0,0 +1,59 @@
+"""Shadow/canary scoring: served scores, comparison aggregates and the never-blocking request path."""
+
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from inference import score_array
+from shadow import ShadowModel
+
+
+def _models():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 12)).astype(np.float32)
+    y = (X[:, 0] + rng.normal(0, 0.5, len(X)) > 1).astype(int)
+    primary = xgb.XGBClassifier(n_estimators=10, max_depth=2).fit(X, y)
+    candidate = xgb.XGBClassifier(n_estimators=30, max_depth=3).fit(X, y)
+    return X, primary, candidate
+
+
+def test_shadow_compares_without_changing_served_scores(tmp_path):
+    X, primary, candidate = _models()
+    model = ShadowModel(primary, candidate, log_path=tmp_path / "shadow.csv", linger_ms=1)
+    served = np.concatenate([score_array(model, X[i:i + 100])[1] for i in range(0, len(X), 100)])
+    model.close()
+
+    p, s = score_array(primary, X)[1], score_array(candidate, X)[1]
+    assert np.array_equal(served, p)
+    stats = model.stats()
+    assert stats["rows"] == len(X) and stats["dropped_rows"] == 0
+    assert stats["disagreements"] == int(((p > 0.5) != (s > 0.5)).sum())
+    assert stats["mean_abs_diff"] == pytest.approx(np.abs(s.astype(float) - p).mean(), rel=1e-6)
+    assert len((tmp_path / "shadow.csv").read_text().splitlines()) == len(X) + 1
+
+
+def test_canary_serves_a_share_from_the_candidate_and_full_queue_drops(tmp_path):
+    X, primary, candidate = _models()
+    model = ShadowModel(primary, candidate, canary_percent=30, log_path=None, linger_ms=1, seed=0)
+    _, proba = score_array(model, X)
+    model.close()
+    from_candidate = proba == score_array(candidate, X)[1]
+    assert 0.25 < from_candidate.mean() < 0.35
+    assert model.stats()["canary_rows"] == int((from_candidate & (proba != score_array(primary, X)[1])).sum())
+
+    stalled = ShadowModel(primary, candidate, log_path=None, max_queued_rows=2, linger_ms=60_000)
+    for i in range(5):
+        score_array(stalled, X[i:i + 1])  # returns at once: the shadow thread is asleep with a full queue
+    assert stalled.stats()["dropped_rows"] == 3 and stalled.stats()["queued_rows"] == 2
+
+
+def test_queue_is_bounded_by_rows_and_subsamples_large_calls():
+    X, primary, candidate = _models()
+    model = ShadowModel(primary, candidate, log_path=None, max_queued_rows=1000, linger_ms=1, seed=0)
+    served = score_array(model, X)[1]
+    model.close()
+    assert np.array_equal(served, score_array(primary, X)[1])
+    stats = model.stats()
+    assert stats["rows"] == 1000 and stats["dropped_rows"] == len(X) - 1000
+    assert stats["queued_rows"] == 0
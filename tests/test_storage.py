@@ -0,0 +1,51 @@
+"""Processed dataset: typed partitions and manifest, pruned scans, and the staged swap on rewrite."""
+
+import polars as pl
+import pytest
+
+from benchmarks.synthetic import generate
+from data_preprocess import preprocess_data
+from utils.storage import (MANIFEST, PROCESSED_SCHEMA, dataset_fingerprint, list_partitions, load_dataset,
+                           read_manifest, scan_dataset, write_dataset)
+
+
+@pytest.fixture
+def clean() -> pl.DataFrame:
+    return preprocess_data(generate(5_000, fraud_rate=0.02, seed=3))
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "ipc"])
+def test_round_trip_with_manifest_and_partition_pruning(clean, tmp_path, fmt):
+    path = write_dataset(clean, tmp_path / "dataset", fmt=fmt)
+    manifest = read_manifest(path)
+    assert manifest["format"] == fmt and manifest["partition_by"] == "day"
+    assert manifest["schema"] == {c: str(t) for c, t in PROCESSED_SCHEMA.items()}
+
+    days = sorted(clean["day"].unique().to_list())
+    assert list_partitions(path) == days
+    back = load_dataset(path).select(clean.columns)
+    assert back.schema == pl.Schema(PROCESSED_SCHEMA)
+    assert back.sort("step", "amount").equals(clean.cast(PROCESSED_SCHEMA).sort("step", "amount"))
+
+    one_day = scan_dataset(path, columns=["amount", "day"], days=[days[0]]).collect()
+    assert one_day.columns == ["amount", "day"] and one_day["day"].unique().to_list() == [days[0]]
+
+
+def test_failed_rewrite_leaves_the_previous_dataset_in_place(clean, tmp_path):
+    path = write_dataset(clean, tmp_path / "dataset")
+    before = dataset_fingerprint(path)
+
+    def boom(s: pl.Series) -> pl.Series:
+        raise RuntimeError("disk full")
+
+    broken = clean.lazy().with_columns(pl.col("amount").map_batches(boom, return_dtype=pl.Float64))
+    with pytest.raises(Exception):
+        write_dataset(broken, path)
+    assert dataset_fingerprint(path) == before
+    assert load_dataset(path).height == clean.height
+
+    # A successful rewrite replaces everything: no partitions of the old version survive
+    write_dataset(clean.filter(pl.col("day") == clean["day"].min()), path)
+    assert list_partitions(path) == [clean["day"].min()]
+    assert [p.name for p in tmp_path.iterdir()] == ["dataset"]  # no staging or .old directory left
+    assert (path / MANIFEST).exists()
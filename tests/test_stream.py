@@ -0,0 +1,50 @@
+"""Windowed drift monitor and CSV tailing."""
+
+import numpy as np
+import pandas as pd
+
+from monitoring.stream import CsvTail, StreamMonitor
+
+
+def test_windows_detect_shift_and_slide():
+    rng = np.random.default_rng(0)
+    ref = pd.DataFrame({"a": rng.normal(size=20_000), "b": rng.exponential(size=20_000)})
+    monitor = StreamMonitor.from_reference(ref, window_seconds=10, sliding_windows=2)
+
+    reports = []
+    for t in range(0, 60, 2):
+        shift = 1.0 if t >= 30 else 0.0
+        batch = pd.DataFrame({"a": rng.normal(shift, 1.0, 1000), "b": rng.exponential(size=1000)})
+        batch.loc[::10, "b"] = np.nan
+        reports += monitor.update(batch, now=t)
+
+    before, after = reports[1], reports[-1]
+    assert before["tumbling"]["rows"] == 5000 and before["sliding"]["rows"] == 10_000
+    assert before["tumbling"]["drifted_features"] == []
+    assert after["tumbling"]["drifted_features"] == ["a"]
+    assert after["tumbling"]["features"]["b"]["null_rate"] == 0.1
+    assert len(monitor.closed) == 2
+
+
+def test_tail_reads_only_complete_appended_lines(tmp_path):
+    path = tmp_path / "production.csv"
+    path.write_text("a,b\n1,2\n")
+    tail = CsvTail(path)
+    assert tail.read() is None
+
+    with open(path, "a") as f:
+        f.write("3,4\n5,")
+    assert tail.read().to_dict("list") == {"a": [3], "b": [4]}
+    with open(path, "a") as f:
+        f.write("6\n")
+    assert tail.read().to_dict("list") == {"a": [5], "b": [6]}
+
+
+def test_feature_without_reference_values_is_not_scored():
+    rng = np.random.default_rng(1)
+    ref = pd.DataFrame({"a": rng.normal(size=5000), "empty": np.full(5000, np.nan)})
+    monitor = StreamMonitor.from_reference(ref, window_seconds=10)
+    monitor.update(pd.DataFrame({"a": rng.normal(size=1000), "empty": rng.normal(size=1000)}), now=0)
+    report = monitor.close()["tumbling"]
+    assert report["features"]["empty"]["psi"] == 0.0 and report["features"]["empty"]["js"] == 0.0
+    assert report["drifted_features"] == [] and report["drift_score"] == 0.0
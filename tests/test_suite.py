@@ -0,0 +1,42 @@
+"""Benchmark suite: regression checks against a baseline, and the synthetic log it runs on."""
+
+import polars as pl
+
+from benchmarks import suite
+from benchmarks.synthetic import generate, write_csv
+
+
+def test_compare_flags_regressions_by_metric_direction():
+    baseline = {"stages": {"train": {"seconds": 10.0, "rows_per_s": 1000, "auprc": 0.80, "peak_rss_mb": 500.0,
+                                     "n_train": 5},
+                           "drift": {"p99_ms": 2.0}}}
+    results = {"stages": {"train": {"seconds": 12.0, "rows_per_s": 1100, "auprc": 0.60, "peak_rss_mb": 510.0,
+                                    "n_train": 9},
+                          "drift": {"p99_ms": 0.0},
+                          "eval": {"seconds": 3.0}}}
+    rows = {(stage, metric): (change, regressed)
+            for stage, metric, _, _, change, regressed in suite.compare(results, baseline, tolerance=0.15)}
+
+    assert rows[("train", "seconds")] == (0.2, True)  # slower beyond tolerance
+    assert rows[("train", "rows_per_s")][1] is False  # faster is never a regression
+    assert rows[("train", "auprc")][1] is True
+    assert rows[("train", "peak_rss_mb")][1] is False  # within tolerance
+    assert rows[("drift", "p99_ms")] == (-1.0, False)
+    # No direction (a count), and no baseline for the stage: not compared
+    assert ("train", "n_train") not in rows and ("eval", "seconds") not in rows
+
+
+def test_run_stage_reports_failures_instead_of_raising(tmp_path):
+    assert suite.run_stage("preprocess", tmp_path, 1_000)["error"].startswith("FileNotFoundError")
+
+
+def test_synthetic_log_is_seeded_chunked_and_drifts_late(tmp_path):
+    assert generate(2_000, seed=3).equals(generate(2_000, seed=3))
+
+    path = write_csv(tmp_path / "raw.csv", 10_000, seed=0, chunk_rows=3_000,
+                     drift={"amount_scale": 4.0}, drift_start=0.5)
+    raw = pl.read_csv(path)
+    assert raw.height == 10_000 and raw["step"].is_sorted()
+    early, late = raw["amount"][:5_000].median(), raw["amount"][5_000:].median()
+    assert 3.0 < late / early < 5.5
+    assert set(raw.filter(pl.col("isFraud") == 1)["type"].unique()) <= {"TRANSFER", "CASH_OUT"}
@@ -0,0 +1,78 @@
+"""Training: the model's input columns, the streaming and warm-start modes, and registry metadata."""
+
+import numpy as np
+import polars as pl
+import pytest
+
+pytest.importorskip("xgboost")
+
+import train
+from benchmarks.synthetic import generate
+from data_preprocess import preprocess_data
+from features import FEATURE_COLUMNS, to_matrix
+from inference import score_array
+from registry import ModelRegistry
+from utils.storage import list_partitions, load_dataset, write_dataset
+
+
+@pytest.fixture
+def raw() -> pl.DataFrame:
+    return generate(20_000, fraud_rate=0.02, seed=1)
+
+
+def test_full_mode_trains_on_feature_columns_by_name(raw, tmp_path, monkeypatch):
+    clean = preprocess_data(raw)
+    # Extra pass-through columns and a shuffled order must not reach the model
+    shuffled = clean.with_columns(pl.lit(7.0).alias("extra")).select(["extra"] + clean.columns[::-1])
+    write_dataset(shuffled, tmp_path / "dataset")
+
+    X, Y = train.load_data(tmp_path / "dataset")
+    assert list(X.columns) == FEATURE_COLUMNS
+    model, _ = train.train_model(X, Y, params={"n_estimators": 5})
+
+    monkeypatch.setattr(train, "MODEL_PATH", tmp_path / "model.joblib")
+    registry = ModelRegistry(tmp_path / "registry")
+    version = train.register_model(model, {}, tmp_path / "dataset", "full", registry=registry)
+    assert registry.metadata(version)["features"] == FEATURE_COLUMNS
+    # Inference scores positionally: it sees the columns the model was trained on
+    assert np.allclose(score_array(model, X.to_numpy(np.float32))[1], model.predict_proba(X)[:, 1], atol=1e-6)
+
+
+def test_velocity_dataset_trains_a_model_every_scoring_path_accepts(raw, tmp_path):
+    # preprocess --velocity -> train (full and stream) -> score: velocity columns are not model inputs
+    write_dataset(preprocess_data(raw, velocity=True), tmp_path / "dataset")
+    X, Y = train.load_data(tmp_path / "dataset")
+    full, _ = train.train_model(X, Y, params={"n_estimators": 5})
+    streamed, _ = train.train_streaming(tmp_path / "dataset", num_boost_round=5)
+
+    rows = raw.filter(pl.col("type").is_in(["TRANSFER", "CASH_OUT"])).head(100)
+    for model in (full, streamed):
+        assert model.get_booster().num_features() == len(FEATURE_COLUMNS)
+        pred, proba = score_array(model, to_matrix(rows))
+        assert len(proba) == 100 and np.all((proba >= 0) & (proba <= 1))
+
+
+def test_streaming_and_external_memory_train_on_the_same_split(raw, tmp_path):
+    write_dataset(preprocess_data(raw), tmp_path / "dataset")
+    total = load_dataset(tmp_path / "dataset").height
+    held_out = len(train.holdout_indices(tmp_path / "dataset"))
+    assert 0 < held_out < total
+
+    in_memory, m1 = train.train_streaming(tmp_path / "dataset", num_boost_round=5)
+    paged, m2 = train.train_streaming(tmp_path / "dataset", num_boost_round=5, external_memory=True, days_per_batch=2)
+    assert m1["n_train"] == m2["n_train"] == total - held_out
+    assert 0 < m1["auprc"] <= 1 and 0 < m2["auprc"] <= 1
+    assert in_memory.get_booster().num_boosted_rounds() == paged.get_booster().num_boosted_rounds() == 5
+
+
+def test_warm_start_continues_the_registered_booster(raw, tmp_path, monkeypatch):
+    write_dataset(preprocess_data(raw), tmp_path / "dataset")
+    monkeypatch.setattr(train, "MODEL_PATH", tmp_path / "model.joblib")
+    registry = ModelRegistry(tmp_path / "registry")
+    base, metrics = train.train_streaming(tmp_path / "dataset", num_boost_round=5)
+    version = train.register_model(base, metrics, tmp_path / "dataset", "stream", registry=registry)
+
+    model, metrics = train.warm_start(tmp_path / "dataset", registry=registry, n_days=1, num_boost_round=3)
+    assert metrics["warm_start_from"] == version
+    assert metrics["days"] == list_partitions(tmp_path / "dataset")[-1:]
+    assert model.get_booster().num_boosted_rounds() == 8
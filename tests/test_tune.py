@@ -0,0 +1,38 @@
+"""Tuning ledger: a rerun resumes finished trials, new data contents start a fresh search."""
+
+import pytest
+
+pytest.importorskip("xgboost")
+
+import tune
+from benchmarks.synthetic import generate
+from data_preprocess import preprocess_data
+from utils.storage import write_dataset
+
+
+def _search(path):
+    return tune.search(path, n_trials=3, workers=1, min_rounds=2, max_rounds=6, eta=3, patience=2)
+
+
+def test_rerun_resumes_from_the_ledger_unless_the_data_changed(tmp_path, monkeypatch):
+    monkeypatch.setattr(tune, "LEDGER_DIR", tmp_path / "tuning")
+    data = tmp_path / "dataset"
+    write_dataset(preprocess_data(generate(20_000, fraud_rate=0.02, seed=1)), data)
+
+    best = _search(data)
+    [ledger] = (tmp_path / "tuning").glob("*.jsonl")
+    finished = ledger.read_text()
+    assert len(finished.splitlines()) == 4  # 3 configs at rung 0, the best one at rung 1
+
+    # Same settings, same contents: every trial comes from the ledger, none is retrained
+    monkeypatch.setattr(tune, "_run_trial", lambda task: pytest.fail("trial retrained"))
+    assert _search(data)["trial_id"] == best["trial_id"]
+    assert ledger.read_text() == finished
+
+    # Same path, re-preprocessed contents: the old scores don't apply
+    monkeypatch.undo()
+    monkeypatch.setattr(tune, "LEDGER_DIR", tmp_path / "tuning")
+    write_dataset(preprocess_data(generate(20_000, fraud_rate=0.02, seed=2)), data)
+    _search(data)
+    assert len(list((tmp_path / "tuning").glob("*.jsonl"))) == 2
+    assert ledger.read_text() == finished